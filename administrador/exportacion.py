@@ -0,0 +1,27 @@
+# administrador/exportacion.py
+"""
+Exportaciones del panel de administración. Usan el mismo mecanismo que las
+del proveedor (proveedor.exportacion): lectura por páginas de id y
+respuesta en streaming.
+"""
+from usuarios.models import Comerciante
+
+COLUMNAS_COMERCIANTES = [
+    ('id', 'id'),
+    ('email', 'email'),
+    ('nombre_apellido', 'nombre_apellido'),
+    ('rol', 'rol'),
+    ('tipo_negocio', 'tipo_negocio'),
+    ('nombre_negocio', 'nombre_negocio'),
+    ('whatsapp', 'whatsapp'),
+    ('region', 'region'),
+    ('comuna', 'comuna'),
+    ('intereses', 'intereses'),
+    ('es_proveedor', 'es_proveedor'),
+    ('date_joined', 'fecha_registro'),
+    ('ultima_conexion', 'ultima_conexion'),
+]
+
+
+def comerciantes():
+    return COLUMNAS_COMERCIANTES, Comerciante.objects.all()
@@ -3,6 +3,7 @@
 from django import forms
 from django.contrib.auth.hashers import make_password
 from usuarios.models import Comerciante, Beneficio, Post, CATEGORIA_POST_CHOICES # Importar CATEGORIA_POST_CHOICES
+from usuarios.forms import COMUNA_CHOICES
 
 ADMIN_CATEGORIES_TUPLES = [
     ('NOTICIAS_CA', 'Noticias Club Almacén'),
@@ -12,6 +13,7 @@ ADMIN_CATEGORIES_TUPLES = [
 ]
 
 class ComercianteAdminForm(forms.ModelForm):
+    comuna = forms.ChoiceField(choices=COMUNA_CHOICES, required=False)
     raw_password = forms.CharField(
         required=False,
         label="Contraseña nueva",
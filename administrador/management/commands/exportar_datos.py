@@ -0,0 +1,72 @@
+# administrador/management/commands/exportar_datos.py
+from django.core.management.base import BaseCommand, CommandError
+
+from administrador.exportacion import comerciantes
+from proveedor.exportacion import (
+    EXPORTACIONES_CATALOGO,
+    FORMATOS,
+    LOTE_EXPORTACION,
+    directorio,
+    lineas,
+)
+from proveedor.models import Proveedor
+
+EXPORTACIONES_GENERALES = {
+    'directorio': directorio,
+    'comerciantes': comerciantes,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta comerciantes, el directorio de proveedores o el catálogo de un '
+        'proveedor (productos/promociones) en CSV o JSON Lines, sin cargar la '
+        'tabla completa en memoria.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tipo',
+            choices=sorted([*EXPORTACIONES_GENERALES, *EXPORTACIONES_CATALOGO]),
+            help='Qué exportar.',
+        )
+        parser.add_argument('--proveedor', type=int, help='ID del proveedor (productos y promociones).')
+        parser.add_argument('--formato', choices=sorted(FORMATOS), default='csv')
+        parser.add_argument('--salida', help='Ruta del archivo de salida (por defecto, la salida estándar).')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=LOTE_EXPORTACION,
+            help='Filas leídas por consulta.',
+        )
+
+    def handle(self, *args, **options):
+        tipo = options['tipo']
+        if tipo in EXPORTACIONES_CATALOGO:
+            if not options['proveedor']:
+                raise CommandError(f'La exportación de {tipo} requiere --proveedor.')
+            if not Proveedor.objects.filter(pk=options['proveedor']).exists():
+                raise CommandError(f'No existe el proveedor {options["proveedor"]}.')
+            columnas, queryset = EXPORTACIONES_CATALOGO[tipo](options['proveedor'])
+        else:
+            columnas, queryset = EXPORTACIONES_GENERALES[tipo]()
+
+        contenido = lineas(options['formato'], columnas, queryset, options['lote'])
+        ruta = options['salida']
+        if not ruta:
+            for linea in contenido:
+                self.stdout.write(linea, ending='')
+            return
+
+        total = 0
+        try:
+            with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+                for linea in contenido:
+                    archivo.write(linea)
+                    total += 1
+        except OSError as e:
+            raise CommandError(f'No se pudo escribir el archivo: {e}')
+
+        if options['formato'] == 'csv':
+            total -= 1  # encabezados
+        self.stdout.write(self.style.SUCCESS(f'{total} filas exportadas a {ruta}.'))
@@ -1,3 +1,83 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
+from django.urls import reverse
+
+from proveedor.models import ProductoServicio, Proveedor
+from usuarios.models import Comerciante
+
+
+class ExportacionesAdminTests(TestCase):
+    """Exportaciones del administrador (vistas y comando exportar_datos)."""
+
+    def setUp(self):
+        self.admin = Comerciante.objects.create(
+            email='admin@example.com', password_hash='x', rol='ADMIN',
+        )
+        self.comerciante = Comerciante.objects.create(
+            email='ana@example.com', nombre_apellido='Ana Pérez', password_hash='x', comuna='RM-Nunoa',
+        )
+        self.proveedor = Proveedor.objects.create(
+            email='prov@example.com',
+            password_hash='x',
+            nombre_contacto='Pedro',
+            nombre_empresa='Distribuidora Pedro',
+            descripcion='Abarrotes al por mayor',
+            whatsapp='+56911111111',
+        )
+        ProductoServicio.objects.create(proveedor=self.proveedor, sku='A-1', nombre='Arroz', descripcion='Saco 25 kg')
+
+    def _login(self, comerciante):
+        session = self.client.session
+        session['comerciante_id'] = comerciante.id
+        session.save()
+
+    def test_solo_administradores(self):
+        self._login(self.comerciante)
+        response = self.client.get(reverse('exportar_comerciantes'))
+        self.assertRedirects(response, reverse('registro'), fetch_redirect_response=False)
+
+    def test_exportar_comerciantes(self):
+        self._login(self.admin)
+        response = self.client.get(reverse('exportar_comerciantes'))
+
+        self.assertTrue(response.streaming)
+        contenido = b''.join(response.streaming_content).decode('utf-8-sig')
+        filas = list(csv.DictReader(io.StringIO(contenido)))
+        self.assertEqual([fila['email'] for fila in filas], ['admin@example.com', 'ana@example.com'])
+        self.assertEqual(filas[1]['region'], 'CL-RM')
+        self.assertNotIn('password_hash', filas[0])
+
+    def test_exportar_directorio_y_catalogo(self):
+        self._login(self.admin)
+        response = self.client.get(reverse('exportar_directorio'), {'formato': 'jsonl'})
+        fila = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(fila['nombre_empresa'], 'Distribuidora Pedro')
+
+        url = reverse('exportar_catalogo_proveedor', args=[self.proveedor.id, 'productos'])
+        contenido = b''.join(self.client.get(url).streaming_content).decode('utf-8-sig')
+        self.assertIn('A-1,Arroz', contenido)
+
+    def test_comando(self):
+        salida = io.StringIO()
+        call_command('exportar_datos', 'comerciantes', '--formato', 'jsonl', stdout=salida)
+        self.assertEqual(len(salida.getvalue().splitlines()), 2)
+
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'productos.csv')
+            mensaje = io.StringIO()
+            call_command(
+                'exportar_datos', 'productos', '--proveedor', str(self.proveedor.id), '--salida', ruta, stdout=mensaje,
+            )
+            with open(ruta, encoding='utf-8-sig') as archivo:
+                self.assertEqual(len(list(csv.DictReader(archivo))), 1)
+        self.assertIn('1 filas exportadas', mensaje.getvalue())
 
-# Create your tests here.
+        with self.assertRaises(CommandError):
+            call_command('exportar_datos', 'promociones')
@@ -19,4 +19,9 @@ urlpatterns = [
     path('posts/crear/', views.crear_post_admin_view, name='crear_post_admin'),
     path('posts/editar/<int:post_id>/', views.editar_post_admin_view, name='editar_post_admin'),
     path('posts/eliminar/<int:post_id>/', views.eliminar_post_admin_view, name='eliminar_post_admin'),
+
+    # ======== EXPORTACIONES ========
+    path('exportar/comerciantes/', views.exportar_comerciantes_view, name='exportar_comerciantes'),
+    path('exportar/directorio/', views.exportar_directorio_view, name='exportar_directorio'),
+    path('exportar/proveedor/<int:proveedor_id>/<str:tipo>/', views.exportar_catalogo_proveedor_view, name='exportar_catalogo_proveedor'),
 ]
@@ -1,8 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.http import Http404
 
 from usuarios.models import Comerciante, Beneficio, Post
 from usuarios.views import get_current_user
+from proveedor.exportacion import EXPORTACIONES_CATALOGO, directorio, respuesta_exportacion
+from proveedor.models import Proveedor
+
+from .exportacion import comerciantes
 
 from .forms import (
     ComercianteAdminForm,
@@ -258,3 +263,37 @@ def eliminar_post_admin_view(request, post_id):
     return render(request, 'administrador/post_confirmar_eliminar.html', {
         'post': post
     })
+
+
+# ======================================================
+# EXPORTACIONES (?formato=csv|jsonl)
+# ======================================================
+
+def exportar_comerciantes_view(request):
+    if not require_admin(request):
+        messages.error(request, 'Acceso denegado.')
+        return redirect('registro')
+
+    columnas, queryset = comerciantes()
+    return respuesta_exportacion('comerciantes', request.GET.get('formato', 'csv'), columnas, queryset)
+
+
+def exportar_directorio_view(request):
+    if not require_admin(request):
+        messages.error(request, 'Acceso denegado.')
+        return redirect('registro')
+
+    columnas, queryset = directorio()
+    return respuesta_exportacion('directorio', request.GET.get('formato', 'csv'), columnas, queryset)
+
+
+def exportar_catalogo_proveedor_view(request, proveedor_id, tipo):
+    if not require_admin(request):
+        messages.error(request, 'Acceso denegado.')
+        return redirect('registro')
+
+    proveedor = get_object_or_404(Proveedor, id=proveedor_id)
+    if tipo not in EXPORTACIONES_CATALOGO:
+        raise Http404('Exportación no disponible')
+    columnas, queryset = EXPORTACIONES_CATALOGO[tipo](proveedor.id)
+    return respuesta_exportacion(f'{tipo}-{proveedor.id}', request.GET.get('formato', 'csv'), columnas, queryset)
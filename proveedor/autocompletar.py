@@ -0,0 +1,229 @@
+# proveedor/autocompletar.py
+"""
+Autocompletado del buscador del directorio.
+
+Índice en memoria (por proceso) con los nombres de proveedores activos, de
+sus productos activos y de las categorías activas. Cada nombre entra una
+vez por palabra, desde esa palabra hasta el final ('cafe nunoa' y 'nunoa'),
+normalizado como en indice_texto; las claves se guardan en una lista
+ordenada y un prefijo se resuelve con dos búsquedas binarias, sin importar
+cuántos nombres haya.
+
+El índice se construye en la primera consulta de cada proceso. Las señales
+de proveedor/signals.py guardan cada alta, cambio o baja en
+CambioAutocompletar y la aplican al índice del proceso que la hizo; los
+demás procesos leen los cambios nuevos a lo sumo cada
+INTERVALO_REVISION_SEGUNDOS y los aplican entrada por entrada, sin
+reconstruir el índice.
+"""
+import bisect
+import threading
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .indice_texto import normalizar
+from .models import CambioAutocompletar, CategoriaProveedor, ProductoServicio, Proveedor
+
+LARGO_MINIMO_PREFIJO = 2
+LARGO_MAXIMO_CLAVE = 100
+LIMITE_POR_DEFECTO = 8
+LIMITE_MAXIMO = 20
+# Claves revisadas por consulta: acota el trabajo con prefijos muy comunes
+MAXIMO_CANDIDATOS = 200
+
+INTERVALO_REVISION_SEGUNDOS = 2
+# Cada revisión vuelve a leer los cambios de este margen: una transacción
+# lenta puede confirmar un cambio con fecha anterior a la última revisión
+MARGEN_CAMBIOS_SEGUNDOS = 60
+# Los cambios más antiguos se borran al reconstruir un índice
+CONSERVAR_CAMBIOS_SEGUNDOS = 86400
+
+_claves = []            # [(clave, tipo, id)] ordenada
+_entradas = {}          # (tipo, id) -> {'nombre', 'proveedor_id', 'claves'}
+_construido = False
+_revisado_en = None     # fecha desde la que ya se aplicaron los cambios registrados
+_proxima_revision = 0   # time.monotonic() de la próxima lectura de cambios
+_lock = threading.RLock()
+
+
+def _claves_de(nombre):
+    palabras = normalizar(nombre).split()
+    return [' '.join(palabras[i:])[:LARGO_MAXIMO_CLAVE] for i in range(len(palabras))]
+
+
+def _agregar(tipo, id_, nombre, proveedor_id=None):
+    """Agrega (o reemplaza) una entrada; se llama con _lock tomado."""
+    _quitar(tipo, id_)
+    claves = _claves_de(nombre)
+    _entradas[(tipo, id_)] = {'nombre': nombre, 'proveedor_id': proveedor_id, 'claves': claves}
+    for clave in claves:
+        bisect.insort(_claves, (clave, tipo, id_))
+
+
+def _quitar(tipo, id_):
+    """Quita una entrada si existe; se llama con _lock tomado."""
+    entrada = _entradas.pop((tipo, id_), None)
+    if entrada is None:
+        return
+    for clave in entrada['claves']:
+        i = bisect.bisect_left(_claves, (clave, tipo, id_))
+        if i < len(_claves) and _claves[i] == (clave, tipo, id_):
+            del _claves[i]
+
+
+def _aplicar(tipo, id_, nombre, proveedor_id=None):
+    """Agrega o quita (`nombre` vacío) una entrada; se llama con _lock tomado."""
+    if nombre:
+        _agregar(tipo, id_, nombre, proveedor_id)
+    else:
+        _quitar(tipo, id_)
+
+
+def _nombres_desde_bd():
+    """(tipo, id, nombre, proveedor_id) de todo lo que se puede sugerir."""
+    for id_, nombre in Proveedor.objects.filter(activo=True).values_list('id', 'nombre_empresa').iterator():
+        yield 'proveedor', id_, nombre, id_
+    productos = ProductoServicio.objects.filter(activo=True, proveedor__activo=True)
+    for id_, nombre, proveedor_id in productos.values_list('id', 'nombre', 'proveedor_id').iterator():
+        yield 'producto', id_, nombre, proveedor_id
+    for id_, nombre in CategoriaProveedor.objects.filter(activo=True).values_list('id', 'nombre'):
+        yield 'categoria', id_, nombre, None
+
+
+def reconstruir(nombres=None):
+    """Arma el índice completo desde la base de datos (o desde `nombres`)."""
+    global _claves, _entradas, _construido, _revisado_en, _proxima_revision
+    desde = timezone.now()
+    claves = []
+    entradas = {}
+    for tipo, id_, nombre, proveedor_id in (nombres if nombres is not None else _nombres_desde_bd()):
+        entrada_claves = _claves_de(nombre)
+        entradas[(tipo, id_)] = {'nombre': nombre, 'proveedor_id': proveedor_id, 'claves': entrada_claves}
+        claves.extend((clave, tipo, id_) for clave in entrada_claves)
+    claves.sort()
+    with _lock:
+        _claves, _entradas, _construido = claves, entradas, True
+        _revisado_en = desde
+        _proxima_revision = time.monotonic() + INTERVALO_REVISION_SEGUNDOS
+    if nombres is None:
+        CambioAutocompletar.objects.filter(
+            fecha__lt=desde - timedelta(seconds=CONSERVAR_CAMBIOS_SEGUNDOS)
+        ).delete()
+
+
+def descartar():
+    """Olvida el índice de este proceso; se reconstruye en la próxima consulta."""
+    global _claves, _entradas, _construido
+    with _lock:
+        _claves, _entradas, _construido = [], {}, False
+
+
+def _sincronizar():
+    """Aplica, en orden, los cambios registrados desde la última revisión; se llama con _lock tomado."""
+    global _revisado_en, _proxima_revision
+    ahora = timezone.now()
+    if ahora - _revisado_en > timedelta(seconds=CONSERVAR_CAMBIOS_SEGUNDOS - MARGEN_CAMBIOS_SEGUNDOS):
+        # Los cambios que faltan pueden estar ya borrados
+        reconstruir()
+        return
+    cambios = CambioAutocompletar.objects.filter(
+        fecha__gte=_revisado_en - timedelta(seconds=MARGEN_CAMBIOS_SEGUNDOS)
+    ).order_by('id').values_list('tipo', 'objeto_id', 'nombre', 'id_proveedor')
+    for cambio in cambios:
+        _aplicar(*cambio)
+    _revisado_en = ahora
+    _proxima_revision = time.monotonic() + INTERVALO_REVISION_SEGUNDOS
+
+
+def _al_dia():
+    if not _construido:
+        reconstruir()
+    elif time.monotonic() >= _proxima_revision:
+        _sincronizar()
+
+
+def _registrar(cambios):
+    """Guarda los cambios [(tipo, id, nombre, proveedor_id)] y los aplica al índice de este proceso."""
+    CambioAutocompletar.objects.bulk_create([
+        CambioAutocompletar(tipo=tipo, objeto_id=id_, nombre=nombre or '', id_proveedor=proveedor_id)
+        for tipo, id_, nombre, proveedor_id in cambios
+    ])
+    with _lock:
+        if _construido:
+            for cambio in cambios:
+                _aplicar(*cambio)
+
+
+def actualizar(tipo, id_, nombre=None, proveedor_id=None):
+    """Refleja en el índice un alta, cambio o baja (`nombre=None`)."""
+    _registrar([(tipo, id_, nombre, proveedor_id)])
+
+
+def actualizar_producto(producto):
+    """Los productos solo se sugieren si están activos y su proveedor también."""
+    nombre = producto.nombre if producto.activo and producto.proveedor.activo else None
+    actualizar('producto', producto.id, nombre, producto.proveedor_id)
+
+
+def _cambios_productos(proveedor):
+    productos = ProductoServicio.objects.filter(proveedor=proveedor).values_list('id', 'nombre', 'activo')
+    return [
+        ('producto', id_, nombre if proveedor.activo and activo else None, proveedor.id)
+        for id_, nombre, activo in productos
+    ]
+
+
+def actualizar_productos(proveedor):
+    """Todos los productos del proveedor (p. ej. después de una importación masiva)."""
+    _registrar(_cambios_productos(proveedor))
+
+
+def actualizar_proveedor(proveedor):
+    """
+    Nombre del proveedor y sus productos; si quedó inactivo salen todos del
+    índice. Solo registra lo que cambió respecto de lo leído de la base de
+    datos: un save() del perfil que no toca el nombre ni el estado no escribe.
+    """
+    cambiados = proveedor.campos_cambiados({'nombre_empresa', 'activo'})
+    if not cambiados:
+        return
+    cambios = [('proveedor', proveedor.id, proveedor.nombre_empresa if proveedor.activo else None, proveedor.id)]
+    if 'activo' in cambiados:
+        cambios.extend(_cambios_productos(proveedor))
+    _registrar(cambios)
+
+
+def sugerir(prefijo, limite=LIMITE_POR_DEFECTO):
+    """
+    Hasta `limite` sugerencias [{'tipo', 'id', 'nombre', 'proveedor_id'}]
+    para el prefijo. Primero las que empiezan con el prefijo y luego las que
+    lo tienen al inicio de otra palabra; dentro de cada grupo, los nombres
+    más cortos.
+    """
+    prefijo = ' '.join(normalizar(prefijo).split())[:LARGO_MAXIMO_CLAVE]
+    if len(prefijo) < LARGO_MINIMO_PREFIJO:
+        return []
+    with _lock:
+        _al_dia()
+        inicio = bisect.bisect_left(_claves, (prefijo,))
+        fin = bisect.bisect_left(_claves, (prefijo + '\uffff',), inicio)
+        candidatos = _claves[inicio:min(fin, inicio + MAXIMO_CANDIDATOS)]
+        vistos = {}
+        for clave, tipo, id_ in candidatos:
+            entrada = _entradas[(tipo, id_)]
+            desde_el_inicio = clave == entrada['claves'][0]
+            if (tipo, id_) not in vistos or desde_el_inicio:
+                vistos[(tipo, id_)] = (not desde_el_inicio, len(entrada['nombre']), entrada)
+
+    ordenados = sorted(vistos.items(), key=lambda item: item[1][:2])
+    return [
+        {
+            'tipo': tipo,
+            'id': id_,
+            'nombre': entrada['nombre'],
+            'proveedor_id': entrada['proveedor_id'],
+        }
+        for (tipo, id_), (_, _, entrada) in ordenados[:limite]
+    ]
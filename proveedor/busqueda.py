@@ -0,0 +1,191 @@
+# proveedor/busqueda.py
+"""
+Búsqueda facetada del directorio de proveedores.
+
+Además de la página de resultados retorna, para cada faceta (categoría, región,
+comuna y cobertura), cuántos proveedores quedarían al elegir cada opción. Cada
+faceta se cuenta con una sola consulta agrupada que aplica todos los filtros
+excepto el de la propia faceta, así se pueden ver las alternativas de la
+faceta ya seleccionada. Los conteos se guardan en caché por combinación de
+filtros y se invalidan cuando cambia un proveedor o una categoría (ver
+proveedor/signals.py).
+
+La invalidación cambia una versión guardada en la misma caché, así que solo
+alcanza a todos los procesos si CACHES apunta a un servidor compartido
+(Memcached, Redis). Con la LocMemCache por defecto cada worker tiene su
+propia versión y puede mostrar conteos viejos hasta FACETAS_CACHE_TIMEOUT.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Count
+
+from . import indice_texto
+from .geo import REGIONES_CHOICES, comunas_de_region, nombre_comuna
+from .models import CategoriaProveedor, Proveedor
+
+FACETAS = ('categoria', 'region', 'comuna', 'cobertura')
+
+# Campo del modelo por el que se filtra y agrupa cada faceta
+CAMPO_FACETA = {
+    'categoria': 'categorias',
+    'region': 'region',
+    'comuna': 'comuna',
+    'cobertura': 'cobertura',
+}
+
+# Campos de Proveedor que afectan los conteos (para no invalidar por otros cambios)
+CAMPOS_FACETADOS = {'activo', 'pais', 'region', 'comuna', 'cobertura', 'nombre_empresa', 'descripcion'}
+
+ORDENES = {
+    'nombre': ('nombre_empresa',),
+    '-nombre': ('-nombre_empresa',),
+    '-fecha': ('-fecha_registro',),
+}
+# Por defecto, el puntaje precalculado (proveedor.ranking); usa el índice proveedor_ranking_idx
+ORDEN_POR_DEFECTO = ('-ranking_score', '-fecha_registro')
+# Con texto de búsqueda y sin orden elegido, primero los más relevantes
+ORDEN_RELEVANCIA = ('-relevancia',) + ORDEN_POR_DEFECTO
+
+FACETAS_CACHE_TIMEOUT = 60  # 1 minuto
+_VERSION_KEY = 'directorio:facetas:version'
+
+
+def normalizar_filtros(params):
+    """Toma los filtros conocidos de un QueryDict/dict, descartando los vacíos o inválidos."""
+    filtros = {}
+    busqueda = (params.get('q') or '').strip()
+    if busqueda:
+        filtros['q'] = busqueda
+    for campo in ('pais',) + FACETAS:
+        valor = (params.get(campo) or '').strip()
+        if valor:
+            filtros[campo] = valor
+    if 'categoria' in filtros and not filtros['categoria'].isdigit():
+        del filtros['categoria']
+    return filtros
+
+
+def _aplicar_filtros(proveedores, filtros, excepto=None):
+    if 'pais' in filtros:
+        proveedores = proveedores.filter(pais=filtros['pais'])
+    for faceta in FACETAS:
+        if faceta != excepto and faceta in filtros:
+            proveedores = proveedores.filter(**{CAMPO_FACETA[faceta]: filtros[faceta]})
+    if 'q' in filtros:
+        proveedores = indice_texto.filtrar(proveedores, filtros['q'])
+    return proveedores
+
+
+def _contar_facetas(filtros):
+    """Una consulta GROUP BY por faceta: {faceta: {valor: total}}."""
+    base = Proveedor.objects.filter(activo=True)
+    conteos = {}
+    for faceta in FACETAS:
+        campo = CAMPO_FACETA[faceta]
+        filas = (
+            _aplicar_filtros(base, filtros, excepto=faceta)
+            .order_by()
+            .values(campo)
+            .annotate(total=Count('id', distinct=True))
+        )
+        conteos[faceta] = {
+            str(fila[campo]): fila['total']
+            for fila in filas
+            if fila[campo] not in (None, '')
+        }
+    return conteos
+
+
+def _opcion(valor, nombre, conteos, seleccionado):
+    return {
+        'valor': valor,
+        'nombre': nombre,
+        'total': conteos.get(valor, 0),
+        'seleccionado': valor == seleccionado,
+    }
+
+
+def _opciones_facetas(filtros, conteos):
+    """Listas de opciones (valor, nombre, total, seleccionado) listas para los templates."""
+    categorias = CategoriaProveedor.objects.filter(activo=True).values_list('id', 'nombre')
+    region = filtros.get('region')
+    if region:
+        comunas = comunas_de_region(region)
+    else:
+        # Sin región elegida solo se listan las comunas que tienen proveedores
+        comunas = [(codigo, nombre_comuna(codigo)) for codigo in sorted(conteos['comuna'])]
+
+    return {
+        'categoria': [
+            _opcion(str(id_), nombre, conteos['categoria'], filtros.get('categoria'))
+            for id_, nombre in categorias
+        ],
+        'region': [
+            _opcion(codigo, nombre, conteos['region'], region)
+            for codigo, nombre in REGIONES_CHOICES if codigo
+        ],
+        'comuna': [
+            _opcion(codigo, nombre, conteos['comuna'], filtros.get('comuna'))
+            for codigo, nombre in comunas
+        ],
+        'cobertura': [
+            _opcion(codigo, nombre, conteos['cobertura'], filtros.get('cobertura'))
+            for codigo, nombre in Proveedor.COBERTURA_CHOICES
+        ],
+    }
+
+
+def _cache_key(filtros):
+    version = cache.get_or_set(_VERSION_KEY, time.time_ns, None)
+    firma = hashlib.md5(json.dumps(filtros, sort_keys=True).encode('utf-8')).hexdigest()
+    return f'directorio:facetas:{version}:{firma}'
+
+
+def facetas(filtros):
+    """Opciones y conteos de cada faceta para los filtros dados (en caché)."""
+    key = _cache_key(filtros)
+    opciones = cache.get(key)
+    if opciones is None:
+        opciones = _opciones_facetas(filtros, _contar_facetas(filtros))
+        cache.set(key, opciones, FACETAS_CACHE_TIMEOUT)
+    return opciones
+
+
+def invalidar_facetas():
+    """Descarta todos los conteos en caché cambiando la versión de las claves."""
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        # La versión se perdió (caché reiniciada): partir de un valor que no se repita
+        cache.set(_VERSION_KEY, time.time_ns(), None)
+
+
+def buscar_proveedores(params, orden='', pagina=None, por_pagina=12):
+    """
+    Resultados paginados y facetas del directorio. Con texto de búsqueda los
+    resultados van por relevancia y traen el texto resaltado (ver
+    indice_texto.resaltar_resultados).
+    Retorna {'page_obj', 'filtros', 'facetas'}.
+    """
+    filtros = normalizar_filtros(params)
+    proveedores = _aplicar_filtros(Proveedor.objects.filter(activo=True), filtros).prefetch_related('categorias')
+    if orden in ORDENES:
+        proveedores = proveedores.order_by(*ORDENES[orden])
+    elif 'q' in filtros:
+        proveedores = indice_texto.anotar_relevancia(proveedores, filtros['q']).order_by(*ORDEN_RELEVANCIA)
+    else:
+        proveedores = proveedores.order_by(*ORDEN_POR_DEFECTO)
+
+    page_obj = Paginator(proveedores, por_pagina).get_page(pagina)
+    if 'q' in filtros:
+        page_obj.object_list = list(page_obj.object_list)
+        indice_texto.resaltar_resultados(page_obj.object_list, filtros['q'])
+    return {
+        'page_obj': page_obj,
+        'filtros': filtros,
+        'facetas': facetas(filtros),
+    }
@@ -0,0 +1,182 @@
+# proveedor/contadores.py
+"""
+Contadores de actividad de proveedores: visitas con buffer en memoria y
+resumen diario (EstadisticaDiariaProveedor) para los gráficos del dashboard.
+
+Cada visita solo suma en un diccionario del proceso; las visitas acumuladas se
+vuelcan a la base de datos en lote con UPDATE ... SET visitas = visitas + n,
+como máximo cada VISITAS_FLUSH_SEGUNDOS (o antes si se juntan
+VISITAS_FLUSH_MAXIMO pendientes). Así una página muy visitada no genera un
+UPDATE por request ni compite por el lock de la fila, y no se pierden
+incrementos por el read-modify-write de `visitas += 1; save()`.
+
+Cada volcado también suma las visitas del día en EstadisticaDiariaProveedor;
+los contactos (poco frecuentes) se registran ahí directamente. Después de
+cada volcado se recalcula el ranking_score de los proveedores visitados.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EstadisticaDiariaProveedor, Proveedor
+from .ranking import recalcular_puntajes
+
+logger = logging.getLogger(__name__)
+
+VISITAS_FLUSH_SEGUNDOS = 10
+VISITAS_FLUSH_MAXIMO = 500  # visitas pendientes que fuerzan un volcado inmediato
+
+# Ventanas (en días) que ofrece el dashboard
+VENTANAS_ESTADISTICAS = (7, 30, 90)
+
+_pendientes = Counter()
+_total_pendiente = 0
+_lock = threading.Lock()
+_timer = None
+
+
+def _programar_volcado():
+    """Agenda un volcado; se llama con _lock tomado."""
+    global _timer
+    if _timer is None:
+        _timer = threading.Timer(VISITAS_FLUSH_SEGUNDOS, _volcado_programado)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _volcado_programado():
+    try:
+        volcar_visitas()
+    finally:
+        close_old_connections()
+
+
+def registrar_visita(proveedor_id, cantidad=1):
+    """Suma `cantidad` visitas pendientes al proveedor (sin tocar la base de datos)."""
+    global _total_pendiente
+    fecha = timezone.localdate()
+    with _lock:
+        _pendientes[(proveedor_id, fecha)] += cantidad
+        _total_pendiente += cantidad
+        forzar = _total_pendiente >= VISITAS_FLUSH_MAXIMO
+        if not forzar:
+            _programar_volcado()
+    if forzar:
+        volcar_visitas()
+
+
+def visitas_pendientes(proveedor_id):
+    """Visitas del proveedor que aún no llegan a la base de datos."""
+    with _lock:
+        return sum(n for (pid, _), n in _pendientes.items() if pid == proveedor_id)
+
+
+def volcar_visitas():
+    """
+    Escribe las visitas pendientes (total del proveedor y resumen diario) con
+    un UPDATE por cada cantidad distinta.
+    Si la escritura falla, las visitas vuelven al buffer. Retorna cuántas se
+    escribieron.
+    """
+    global _timer, _total_pendiente
+    with _lock:
+        lote = dict(_pendientes)
+        _pendientes.clear()
+        _total_pendiente = 0
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+
+    if not lote:
+        return 0
+
+    por_proveedor = Counter()
+    for (proveedor_id, _), cantidad in lote.items():
+        por_proveedor[proveedor_id] += cantidad
+
+    ids_por_cantidad = defaultdict(list)
+    for proveedor_id, cantidad in por_proveedor.items():
+        ids_por_cantidad[cantidad].append(proveedor_id)
+
+    try:
+        with transaction.atomic():
+            for cantidad, ids in ids_por_cantidad.items():
+                Proveedor.objects.filter(id__in=ids).update(visitas=F('visitas') + cantidad)
+            _sumar_diario('visitas', lote)
+    except Exception:
+        logger.exception('Error al volcar %s visitas de proveedores', sum(lote.values()))
+        with _lock:
+            _pendientes.update(lote)
+            _total_pendiente += sum(lote.values())
+            _programar_volcado()
+        return 0
+
+    # Las visitas entran al puntaje del directorio
+    try:
+        recalcular_puntajes(por_proveedor)
+    except Exception:
+        logger.exception('Error al recalcular el ranking tras volcar visitas')
+
+    return sum(lote.values())
+
+
+def _sumar_diario(campo, cantidades):
+    """
+    Suma en EstadisticaDiariaProveedor.<campo> las cantidades {(proveedor_id, fecha): n}.
+    Crea las filas que falten y luego hace un UPDATE por cada (fecha, n) distinto.
+    """
+    EstadisticaDiariaProveedor.objects.bulk_create([
+        EstadisticaDiariaProveedor(proveedor_id=proveedor_id, fecha=fecha)
+        for proveedor_id, fecha in cantidades
+    ], ignore_conflicts=True)
+
+    ids_por_grupo = defaultdict(list)
+    for (proveedor_id, fecha), cantidad in cantidades.items():
+        ids_por_grupo[(fecha, cantidad)].append(proveedor_id)
+    for (fecha, cantidad), ids in ids_por_grupo.items():
+        EstadisticaDiariaProveedor.objects.filter(
+            proveedor_id__in=ids, fecha=fecha
+        ).update(**{campo: F(campo) + cantidad})
+
+
+def registrar_contacto(proveedor_id, campo='contactos_enviados'):
+    """Suma un contacto (enviado o aceptado) en el resumen del día."""
+    with transaction.atomic():
+        _sumar_diario(campo, {(proveedor_id, timezone.localdate()): 1})
+
+
+def serie_diaria(proveedor, dias=30):
+    """
+    Serie de los últimos `dias` días (incluido hoy) con visitas y contactos por
+    día; los días sin actividad van en cero. Lee a lo más `dias` filas.
+    """
+    hoy = timezone.localdate()
+    desde = hoy - timedelta(days=dias - 1)
+    filas = {
+        fila['fecha']: fila
+        for fila in EstadisticaDiariaProveedor.objects.filter(
+            proveedor=proveedor, fecha__gte=desde
+        ).values('fecha', 'visitas', 'contactos_enviados', 'contactos_aceptados')
+    }
+
+    serie = []
+    for i in range(dias):
+        fecha = desde + timedelta(days=i)
+        fila = filas.get(fecha, {})
+        serie.append({
+            'fecha': fecha,
+            'visitas': fila.get('visitas', 0),
+            'contactos_enviados': fila.get('contactos_enviados', 0),
+            'contactos_aceptados': fila.get('contactos_aceptados', 0),
+        })
+    return serie
+
+
+# Al terminar el proceso (reinicio del worker) no se pierden las visitas del buffer
+atexit.register(volcar_visitas)
@@ -1,28 +1,13 @@
 def proveedor_context(request):
     """
     Context processor que hace disponible el proveedor logueado
-    en todos los templates de la app proveedor
+    en todos los templates de la app proveedor.
+
+    Usa el objeto perezoso de UsuarioSesionMiddleware: si el template no
+    usa al proveedor no se consulta la base de datos.
     """
-    proveedor_id = request.session.get('proveedor_id')
-    
-    if proveedor_id:
-        try:
-            from proveedor.models import Proveedor
-            proveedor = Proveedor.objects.get(id=proveedor_id)
-            return {
-                'current_logged_in_proveedor': proveedor,
-                'proveedor': proveedor,  # Por compatibilidad
-            }
-        except Proveedor.DoesNotExist:
-            # Limpiar sesión si el proveedor ya no existe
-            if 'proveedor_id' in request.session:
-                del request.session['proveedor_id']
-            return {
-                'current_logged_in_proveedor': None,
-                'proveedor': None,
-            }
-    
+    proveedor = getattr(request, 'proveedor', None)
     return {
-        'current_logged_in_proveedor': None,
-        'proveedor': None,
+        'current_logged_in_proveedor': proveedor,
+        'proveedor': proveedor,  # Por compatibilidad
     }
\ No newline at end of file
@@ -3,29 +3,30 @@
 from django.shortcuts import redirect
 from django.contrib import messages
 from functools import wraps
-from proveedor.models import Proveedor
+from usuarios.middleware import obtener_proveedor
 
 def proveedor_login_required(view_func):
     """
     Decorador que verifica si hay un proveedor logueado usando SESIONES.
     Reemplaza la verificación de variable global.
+
+    El proveedor se carga una sola vez y queda en request.proveedor; la vista
+    (get_current_proveedor) y el context processor reutilizan esa instancia.
     """
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
-        proveedor_id = request.session.get('proveedor_id')
-        
-        if not proveedor_id:
+        if not request.session.get('proveedor_id'):
             messages.warning(request, 'Debes iniciar sesión como proveedor.')
             return redirect('proveedores:login_proveedor')
         
         # Verificar que el proveedor existe en la BD
-        try:
-            proveedor = Proveedor.objects.get(id=proveedor_id)
-        except Proveedor.DoesNotExist:
+        proveedor = obtener_proveedor(request)
+        if proveedor is None:
             request.session.flush()
             messages.error(request, 'Sesión inválida.')
             return redirect('proveedores:login_proveedor')
         
+        request.proveedor = proveedor
         return view_func(request, *args, **kwargs)
     
     return _wrapped_view
\ No newline at end of file
@@ -0,0 +1,75 @@
+# proveedor/estadisticas.py
+"""
+Resumen del panel del proveedor (dashboard_proveedor).
+
+Los contadores salen de una consulta por tabla con agregación condicional
+(COUNT(...) FILTER / CASE WHEN en MySQL): total y activos de productos,
+promociones vigentes y solicitudes pendientes. Junto con las listas de
+productos recientes y promociones por vencer se guardan en la caché por
+proveedor y por día (la vigencia de las promociones depende de la fecha),
+por ESTADISTICAS_CACHE_SEGUNDOS como máximo. Con la entrada en caché el
+dashboard hace tres consultas (sesión, proveedor y serie diaria); sin ella
+se suman las cinco de calcular_estadisticas.
+
+Las señales de proveedor/signals.py invalidan la entrada al guardar o
+borrar productos, promociones y solicitudes de contacto. La invalidación
+solo llega a los demás procesos si CACHES usa una caché compartida
+(Memcached, Redis); con la LocMemCache por defecto cada proceso tiene su
+copia y un cambio hecho en otro se ve recién cuando vence la entrada, por
+eso ESTADISTICAS_CACHE_SEGUNDOS es corto.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import ProductoServicio, Promocion, SolicitudContacto
+
+ESTADISTICAS_CACHE_SEGUNDOS = 60
+LARGO_LISTAS = 5
+
+
+def _clave(proveedor_id, fecha):
+    return f'proveedor:{proveedor_id}:panel:{fecha.isoformat()}'
+
+
+def calcular_estadisticas(proveedor_id, hoy=None):
+    """Contadores y listas del panel, sin caché (cinco consultas)."""
+    hoy = hoy or timezone.localdate()
+    productos = ProductoServicio.objects.filter(proveedor_id=proveedor_id)
+    promociones = Promocion.objects.filter(proveedor_id=proveedor_id)
+
+    conteo_productos = productos.aggregate(
+        total=Count('id'),
+        activos=Count('id', filter=Q(activo=True)),
+    )
+    conteo_promociones = promociones.aggregate(
+        activas=Count('id', filter=Q(activo=True, fecha_inicio__lte=hoy, fecha_fin__gte=hoy)),
+    )
+    conteo_solicitudes = SolicitudContacto.objects.filter(proveedor_id=proveedor_id).aggregate(
+        pendientes=Count('id', filter=Q(estado='pendiente')),
+    )
+
+    return {
+        'total_productos': conteo_productos['total'],
+        'productos_activos': conteo_productos['activos'],
+        'promociones_activas': conteo_promociones['activas'],
+        'solicitudes_pendientes': conteo_solicitudes['pendientes'],
+        'productos_recientes': list(productos.order_by('-fecha_creacion')[:LARGO_LISTAS]),
+        'promociones_proximas': list(
+            promociones.filter(activo=True, fecha_fin__gte=hoy).order_by('fecha_fin')[:LARGO_LISTAS]
+        ),
+    }
+
+
+def estadisticas_panel(proveedor_id):
+    """Resumen del panel desde la caché; lo calcula si no está."""
+    hoy = timezone.localdate()
+    return cache.get_or_set(
+        _clave(proveedor_id, hoy),
+        lambda: calcular_estadisticas(proveedor_id, hoy),
+        ESTADISTICAS_CACHE_SEGUNDOS,
+    )
+
+
+def invalidar_estadisticas(proveedor_id):
+    cache.delete(_clave(proveedor_id, timezone.localdate()))
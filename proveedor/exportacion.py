@@ -0,0 +1,160 @@
+# proveedor/exportacion.py
+"""
+Exportaciones completas en CSV y JSON Lines, generadas fila a fila.
+
+Cada exportación es una lista de columnas (campo del ORM, encabezado) sobre
+un queryset. Las filas se leen con values_list en páginas de
+LOTE_EXPORTACION ordenadas por id (WHERE id > último), cada una con
+.iterator(chunk_size=...): con MySQL el driver carga el resultado completo
+de cada consulta en memoria, así que paginar por id es lo que mantiene la
+memoria constante sin importar el tamaño de la tabla. Las vistas responden
+con StreamingHttpResponse, y el comando `exportar_datos` (administrador)
+escribe el mismo contenido a un archivo.
+
+La exportación de productos usa los mismos encabezados que la importación
+(proveedor.importacion), así el archivo exportado se puede volver a importar:
+las filas se reconocen por su id, tengan o no SKU.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import ProductoServicio, Promocion, Proveedor
+
+LOTE_EXPORTACION = 2000
+
+# Primer carácter con que una planilla interpreta una celda como fórmula
+INICIOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+COLUMNAS_PRODUCTOS = [
+    ('id', 'id'),
+    ('sku', 'sku'),
+    ('nombre', 'nombre'),
+    ('descripcion', 'descripcion'),
+    ('precio_referencia', 'precio_referencia'),
+    ('categoria', 'categoria'),
+    ('activo', 'activo'),
+    ('destacado', 'destacado'),
+    ('fecha_creacion', 'fecha_creacion'),
+]
+
+COLUMNAS_PROMOCIONES = [
+    ('id', 'id'),
+    ('titulo', 'titulo'),
+    ('descripcion', 'descripcion'),
+    ('fecha_inicio', 'fecha_inicio'),
+    ('fecha_fin', 'fecha_fin'),
+    ('activo', 'activo'),
+    ('fecha_creacion', 'fecha_creacion'),
+]
+
+COLUMNAS_DIRECTORIO = [
+    ('id', 'id'),
+    ('nombre_empresa', 'nombre_empresa'),
+    ('nombre_contacto', 'nombre_contacto'),
+    ('email', 'email'),
+    ('telefono', 'telefono'),
+    ('whatsapp', 'whatsapp'),
+    ('sitio_web', 'sitio_web'),
+    ('pais', 'pais'),
+    ('region', 'region'),
+    ('comuna', 'comuna'),
+    ('cobertura', 'cobertura'),
+    ('verificado', 'verificado'),
+    ('destacado', 'destacado'),
+    ('ranking_score', 'ranking_score'),
+    ('fecha_registro', 'fecha_registro'),
+]
+
+
+# ==================== LECTURA ====================
+
+def filas(queryset, campos, lote=LOTE_EXPORTACION):
+    """Tuplas de `campos` (el primero debe ser 'id'), por páginas de `lote` filas."""
+    queryset = queryset.order_by('id').values_list(*campos)
+    ultimo_id = 0
+    while True:
+        leidas = 0
+        for fila in queryset.filter(id__gt=ultimo_id)[:lote].iterator(chunk_size=lote):
+            leidas += 1
+            ultimo_id = fila[0]
+            yield fila
+        if leidas < lote:
+            return
+
+
+# ==================== FORMATOS ====================
+
+class _Eco:
+    """Pseudo archivo para csv.writer: devuelve lo escrito en vez de guardarlo."""
+
+    def write(self, valor):
+        return valor
+
+
+def celda_csv(valor):
+    """
+    Texto que empieza con =, +, - o @ (o tabulación/retorno) lleva un ' delante
+    para que Excel o LibreOffice no lo evalúen como fórmula.
+    """
+    if isinstance(valor, str) and valor.startswith(INICIOS_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def lineas_csv(columnas, queryset, lote=LOTE_EXPORTACION):
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel reconozca el UTF-8 (tildes y eñes)
+    yield '\ufeff' + escritor.writerow([encabezado for _, encabezado in columnas])
+    for fila in filas(queryset, [campo for campo, _ in columnas], lote):
+        yield escritor.writerow([celda_csv(valor) for valor in fila])
+
+
+def lineas_jsonl(columnas, queryset, lote=LOTE_EXPORTACION):
+    claves = [encabezado for _, encabezado in columnas]
+    for fila in filas(queryset, [campo for campo, _ in columnas], lote):
+        yield json.dumps(dict(zip(claves, fila)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def lineas(formato, columnas, queryset, lote=LOTE_EXPORTACION):
+    generar = lineas_jsonl if formato == 'jsonl' else lineas_csv
+    return generar(columnas, queryset, lote)
+
+
+def respuesta_exportacion(nombre, formato, columnas, queryset):
+    """StreamingHttpResponse con el archivo `nombre`-AAAAMMDD.csv/.jsonl como descarga."""
+    if formato not in FORMATOS:
+        formato = 'csv'
+    response = StreamingHttpResponse(lineas(formato, columnas, queryset), content_type=FORMATOS[formato])
+    fecha = timezone.localdate().strftime('%Y%m%d')
+    response['Content-Disposition'] = f'attachment; filename="{nombre}-{fecha}.{formato}"'
+    return response
+
+
+# ==================== EXPORTACIONES ====================
+
+def productos_de(proveedor_id):
+    return COLUMNAS_PRODUCTOS, ProductoServicio.objects.filter(proveedor_id=proveedor_id)
+
+
+def promociones_de(proveedor_id):
+    return COLUMNAS_PROMOCIONES, Promocion.objects.filter(proveedor_id=proveedor_id)
+
+
+def directorio():
+    return COLUMNAS_DIRECTORIO, Proveedor.objects.filter(activo=True)
+
+
+# Exportaciones del catálogo de un proveedor (panel y comando)
+EXPORTACIONES_CATALOGO = {
+    'productos': productos_de,
+    'promociones': promociones_de,
+}
@@ -11,9 +11,8 @@ from .models import (
     PAISES_CHOICES,
     REGIONES_CHOICES,
     COMUNAS_CHOICES,
-    REGIONES_POR_PAIS,
-    COMUNAS_POR_REGION,
 )
+from .geo import regiones_de_pais, comunas_de_region
 
 
 # ==================== FORMULARIOS DE AUTENTICACIÓN ====================
@@ -140,16 +139,14 @@ class RegistroProveedorForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         # Si hay un país seleccionado en POST, cargar sus regiones
-        if 'pais' in self.data:
-            pais_code = self.data.get('pais')
-            if pais_code and pais_code in REGIONES_POR_PAIS:
-                self.fields['region'].choices = [('', 'Selecciona una región')] + REGIONES_POR_PAIS[pais_code]
+        regiones = regiones_de_pais(self.data.get('pais'))
+        if regiones:
+            self.fields['region'].choices = [('', 'Selecciona una región')] + list(regiones)
         
         # Si hay una región seleccionada en POST, cargar sus comunas
-        if 'region' in self.data:
-            region_code = self.data.get('region')
-            if region_code and region_code in COMUNAS_POR_REGION:
-                self.fields['comuna'].choices = [('', 'Selecciona una comuna')] + COMUNAS_POR_REGION[region_code]
+        comunas = comunas_de_region(self.data.get('region'))
+        if comunas:
+            self.fields['comuna'].choices = [('', 'Selecciona una comuna')] + list(comunas)
     
     def clean_email(self):
         email = self.cleaned_data.get('email')
@@ -291,4 +288,34 @@ class SolicitudContactoForm(forms.ModelForm):
         }
 
 
-# ==================== FORMULARIOS AUXILIARES ====================
\ No newline at end of file
+# ==================== FORMULARIOS AUXILIARES ====================
+
+class ProductoImportacionForm(ProductoServicioForm):
+    """
+    Valida una fila de la importación masiva con las mismas reglas de
+    ProductoServicioForm, más el SKU y sin imagen.
+    """
+    class Meta(ProductoServicioForm.Meta):
+        fields = ['sku', 'nombre', 'descripcion', 'precio_referencia', 'destacado', 'activo', 'categoria']
+
+    def clean_sku(self):
+        return (self.cleaned_data.get('sku') or '').strip() or None
+
+
+class ImportarProductosForm(forms.Form):
+    """Archivo CSV o XLSX con el catálogo a importar"""
+    EXTENSIONES = ('.csv', '.xlsx')
+    TAMANO_MAXIMO_MB = 20
+
+    archivo = forms.FileField(
+        label='Archivo CSV o XLSX',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'}),
+    )
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        if not archivo.name.lower().endswith(self.EXTENSIONES):
+            raise ValidationError('El archivo debe ser .csv o .xlsx.')
+        if archivo.size > self.TAMANO_MAXIMO_MB * 1024 * 1024:
+            raise ValidationError(f'El archivo no puede superar los {self.TAMANO_MAXIMO_MB} MB.')
+        return archivo
@@ -0,0 +1,327 @@
+# proveedor/importacion.py
+"""
+Importación masiva del catálogo de un proveedor desde CSV o XLSX.
+
+El archivo se lee fila a fila (csv sobre el archivo subido, openpyxl en modo
+read_only para XLSX), así que la memoria no depende del tamaño del archivo.
+Las filas se validan con ProductoImportacionForm (las reglas de
+ProductoServicioForm más el SKU) y se escriben por lotes de LOTE_IMPORTACION:
+un bulk_create con update_conflicts (upsert sobre el índice único
+proveedor + SKU) que crea los nuevos y actualiza los existentes en la misma
+sentencia, más una consulta que cuenta cuántos ya existían para el reporte.
+Los existentes solo se actualizan en las columnas presentes en el archivo.
+
+Las filas con `id` (como las de proveedor.exportacion) actualizan ese
+producto del proveedor, también su SKU: así un catálogo exportado con
+productos sin SKU se puede volver a importar sin duplicarlos. Las filas sin
+id ni SKU siempre crean un producto.
+
+Las filas con errores se saltan y se informan, pero si el archivo resulta
+ilegible a mitad de camino (p. ej. un byte que no es UTF-8 después del
+primer lote) no queda nada escrito: todos los lotes van en una transacción.
+
+bulk_create/bulk_update no envían señales, así que al final se actualiza una
+sola vez lo que derivan las señales de proveedor/signals.py (índice de
+búsqueda, autocompletado, ranking, facetas y estadísticas del panel).
+
+XLSX requiere openpyxl; sin él solo se aceptan archivos CSV.
+"""
+import codecs
+import csv
+import itertools
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import autocompletar, indice_texto
+from .busqueda import invalidar_facetas
+from .estadisticas import invalidar_estadisticas
+from .exportacion import INICIOS_FORMULA
+from .forms import ProductoImportacionForm
+from .indice_texto import normalizar
+from .models import ProductoServicio
+from .ranking import recalcular_puntajes
+
+LOTE_IMPORTACION = 1000
+MAXIMO_ERRORES_REPORTE = 500
+
+# Nombre de columna normalizado -> campo
+COLUMNAS = {
+    'id': 'id',
+    'sku': 'sku',
+    'codigo': 'sku',
+    'nombre': 'nombre',
+    'descripcion': 'descripcion',
+    'precio': 'precio_referencia',
+    'precio referencia': 'precio_referencia',
+    'precio_referencia': 'precio_referencia',
+    'categoria': 'categoria',
+    'activo': 'activo',
+    'destacado': 'destacado',
+}
+COLUMNAS_OBLIGATORIAS = ('nombre', 'descripcion')
+CAMPOS_ACTUALIZABLES = ['nombre', 'descripcion', 'precio_referencia', 'categoria', 'activo', 'destacado']
+
+VALORES_VERDADEROS = {'1', 'si', 'true', 'verdadero', 'x', 'yes'}
+VALORES_FALSOS = {'0', 'no', 'false', 'falso'}
+
+# Se acepta el código o el nombre de la categoría
+CATEGORIAS = {
+    normalizar(valor): codigo
+    for codigo, nombre in ProductoServicio.CATEGORIA_CHOICES
+    for valor in (codigo, nombre)
+}
+
+
+class ErrorImportacion(Exception):
+    """El archivo completo no se puede importar (formato, columnas...)."""
+
+
+# ==================== LECTURA ====================
+
+def _filas_csv(archivo):
+    """Filas (listas de str) de un CSV en UTF-8, separado por coma o punto y coma."""
+    lineas = codecs.iterdecode(archivo, 'utf-8-sig')
+    try:
+        primera = next(lineas, '')
+        separador = ';' if primera.count(';') > primera.count(',') else ','
+        yield from csv.reader(itertools.chain([primera], lineas), delimiter=separador)
+    except UnicodeDecodeError:
+        raise ErrorImportacion('El archivo CSV debe estar en UTF-8.')
+
+
+def _celda(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _filas_xlsx(archivo):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ErrorImportacion('La importación de XLSX no está disponible; sube el catálogo como CSV.')
+    try:
+        libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    except Exception:
+        raise ErrorImportacion('No se pudo leer el archivo XLSX.')
+    try:
+        for fila in libro.active.iter_rows(values_only=True):
+            yield [_celda(valor) for valor in fila]
+    finally:
+        libro.close()
+
+
+def _sin_escape(valor):
+    """Quita el ' que proveedor.exportacion antepone a los textos que parecen fórmulas."""
+    return valor[1:] if valor.startswith("'") and valor[1:].startswith(INICIOS_FORMULA) else valor
+
+
+def leer_filas(archivo, nombre):
+    """
+    Lee los encabezados (primera fila) y retorna (campos presentes, filas),
+    donde filas genera (número de fila, {campo: texto}) por cada fila con
+    datos. Las columnas desconocidas se ignoran.
+    """
+    filas = _filas_xlsx(archivo) if nombre.lower().endswith('.xlsx') else _filas_csv(archivo)
+    encabezados = next(filas, None)
+    if not encabezados:
+        raise ErrorImportacion('El archivo está vacío.')
+    campos = [COLUMNAS.get(normalizar(encabezado).strip()) for encabezado in encabezados]
+    faltantes = [columna for columna in COLUMNAS_OBLIGATORIAS if columna not in campos]
+    if faltantes:
+        raise ErrorImportacion(f'Faltan columnas obligatorias: {", ".join(faltantes)}.')
+
+    def datos_por_fila():
+        for numero, fila in enumerate(filas, start=2):
+            datos = {campo: _sin_escape(valor.strip()) for campo, valor in zip(campos, fila) if campo}
+            if any(datos.values()):
+                yield numero, datos
+
+    return {campo for campo in campos if campo}, datos_por_fila()
+
+
+# ==================== VALIDACIÓN ====================
+
+def _booleano(valor, por_defecto):
+    valor = normalizar(valor or '').strip()
+    if valor in VALORES_VERDADEROS:
+        return True
+    if valor in VALORES_FALSOS:
+        return False
+    return por_defecto if not valor else None
+
+
+def validar_fila(datos):
+    """(producto sin guardar, None) o (None, [mensajes de error])."""
+    datos = dict(datos)
+    errores = []
+    for campo, por_defecto in (('activo', True), ('destacado', False)):
+        valor = _booleano(datos.get(campo), por_defecto)
+        if valor is None:
+            errores.append(f'{campo}: usa "sí" o "no".')
+        datos[campo] = 'true' if valor else 'false'
+    categoria = datos.get('categoria')
+    datos['categoria'] = CATEGORIAS.get(normalizar(categoria), categoria) if categoria else 'OTRO'
+    if datos.get('precio_referencia'):
+        datos['precio_referencia'] = datos['precio_referencia'].replace('$', '').replace(' ', '')
+
+    form = ProductoImportacionForm(data=datos)
+    if not form.is_valid():
+        errores.extend(
+            f'{campo}: {mensaje}' for campo, mensajes in form.errors.items() for mensaje in mensajes
+        )
+    if errores:
+        return None, errores
+    return form.instance, None
+
+
+# ==================== ESCRITURA ====================
+
+def _guardar_lote(proveedor, lote, campos):
+    """
+    Crea o actualiza (por SKU) los productos del lote con un solo INSERT ...
+    ON CONFLICT / ON DUPLICATE KEY UPDATE por tanda. Los productos existentes
+    solo cambian en `campos` (las columnas del archivo): los valores por
+    defecto de las columnas ausentes valen solo para los nuevos.
+    Retorna (creados, actualizados).
+    """
+    skus = [producto.sku for producto in lote if producto.sku]
+    existentes = ProductoServicio.objects.filter(proveedor=proveedor, sku__in=skus).count() if skus else 0
+    for producto in lote:
+        producto.proveedor = proveedor
+
+    # MySQL resuelve el conflicto con cualquier índice único; los demás motores
+    # necesitan saber cuál
+    conflicto = ['proveedor', 'sku'] if connection.features.supports_update_conflicts_with_target else None
+    with transaction.atomic():
+        ProductoServicio.objects.bulk_create(
+            lote,
+            update_conflicts=True,
+            unique_fields=conflicto,
+            update_fields=campos + ['fecha_actualizacion'],
+        )
+    return len(lote) - existentes, existentes
+
+
+def _actualizar_por_id(proveedor, filas, campos):
+    """
+    Actualiza en `campos` los productos del proveedor de `filas`
+    ({id: (número de fila, producto sin guardar)}) con un bulk_update.
+    Retorna (actualizados, [(número de fila, sku, mensajes)]) con las filas
+    que no se pudieron aplicar.
+    """
+    existentes = ProductoServicio.objects.filter(proveedor=proveedor).in_bulk(list(filas))
+    skus = [producto.sku for _, producto in filas.values() if producto.sku]
+    ocupados = set(
+        ProductoServicio.objects.filter(proveedor=proveedor, sku__in=skus)
+        .exclude(id__in=list(filas)).values_list('sku', flat=True)
+    ) if skus and 'sku' in campos else set()
+
+    errores = []
+    actualizar = []
+    ahora = timezone.now()
+    for id_, (numero, producto) in filas.items():
+        existente = existentes.get(id_)
+        if existente is None:
+            errores.append((numero, producto.sku, ['id: no corresponde a un producto de tu catálogo.']))
+        elif producto.sku in ocupados:
+            errores.append((numero, producto.sku, ['sku: ya lo usa otro producto de tu catálogo.']))
+        else:
+            for campo in campos:
+                setattr(existente, campo, getattr(producto, campo))
+            # bulk_update no aplica auto_now
+            existente.fecha_actualizacion = ahora
+            actualizar.append(existente)
+    ProductoServicio.objects.bulk_update(actualizar, campos + ['fecha_actualizacion'])
+    return len(actualizar), errores
+
+
+def _actualizar_derivados(proveedor):
+    """Lo que las señales harían por cada producto, una sola vez para el proveedor."""
+    indice_texto.indexar_proveedores([proveedor.id])
+    recalcular_puntajes([proveedor.id])
+    autocompletar.actualizar_productos(proveedor)
+    invalidar_facetas()
+    invalidar_estadisticas(proveedor.id)
+
+
+def importar_productos(proveedor, archivo, nombre, lote=LOTE_IMPORTACION):
+    """
+    Importa el catálogo de `archivo` (CSV o XLSX según `nombre`) para el
+    proveedor. Las filas con errores se saltan y se informan; las demás se
+    guardan. Lanza ErrorImportacion si el archivo completo es inválido, sin
+    guardar ninguna fila.
+
+    Retorna {'creados', 'actualizados', 'total_errores', 'errores'}, donde
+    errores es [{'fila', 'sku', 'mensajes'}] (hasta MAXIMO_ERRORES_REPORTE).
+    """
+    resultado = {'creados': 0, 'actualizados': 0, 'total_errores': 0, 'errores': []}
+
+    def error(numero, sku, mensajes):
+        resultado['total_errores'] += 1
+        if len(resultado['errores']) < MAXIMO_ERRORES_REPORTE:
+            resultado['errores'].append({'fila': numero, 'sku': sku, 'mensajes': mensajes})
+
+    campos, filas = leer_filas(archivo, nombre)
+    actualizables = [campo for campo in CAMPOS_ACTUALIZABLES if campo in campos]
+    actualizables_por_id = actualizables + ['sku'] if 'sku' in campos else actualizables
+
+    def guardar(pendientes):
+        creados, actualizados = _guardar_lote(proveedor, pendientes, actualizables)
+        resultado['creados'] += creados
+        resultado['actualizados'] += actualizados
+
+    def guardar_por_id(pendientes):
+        actualizados, errores = _actualizar_por_id(proveedor, pendientes, actualizables_por_id)
+        resultado['actualizados'] += actualizados
+        for numero, sku, mensajes in errores:
+            error(numero, sku, mensajes)
+
+    filas_de_sku = {}  # SKU -> primera fila en que aparece
+    filas_de_id = {}   # id -> primera fila en que aparece
+    pendientes = []
+    pendientes_por_id = {}
+    try:
+        with transaction.atomic():
+            for numero, datos in filas:
+                id_ = datos.get('id', '')
+                if id_ and not id_.isdigit():
+                    error(numero, datos.get('sku', ''), ['id: debe ser un número entero.'])
+                    continue
+                producto, mensajes = validar_fila(datos)
+                if mensajes:
+                    error(numero, datos.get('sku', ''), mensajes)
+                    continue
+                if producto.sku:
+                    if producto.sku in filas_de_sku:
+                        primera = filas_de_sku[producto.sku]
+                        error(numero, producto.sku, [f'sku: repetido en el archivo (fila {primera}).'])
+                        continue
+                    filas_de_sku[producto.sku] = numero
+                if id_:
+                    id_ = int(id_)
+                    if id_ in filas_de_id:
+                        error(numero, producto.sku, [f'id: repetido en el archivo (fila {filas_de_id[id_]}).'])
+                        continue
+                    filas_de_id[id_] = numero
+                    pendientes_por_id[id_] = (numero, producto)
+                    if len(pendientes_por_id) >= lote:
+                        guardar_por_id(pendientes_por_id)
+                        pendientes_por_id = {}
+                    continue
+                pendientes.append(producto)
+                if len(pendientes) >= lote:
+                    guardar(pendientes)
+                    pendientes = []
+            if pendientes:
+                guardar(pendientes)
+            if pendientes_por_id:
+                guardar_por_id(pendientes_por_id)
+    finally:
+        # Las señales no corrieron para nada de lo escrito (o de lo deshecho)
+        if resultado['creados'] or resultado['actualizados']:
+            _actualizar_derivados(proveedor)
+    return resultado
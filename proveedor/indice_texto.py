@@ -0,0 +1,300 @@
+# proveedor/indice_texto.py
+"""
+Búsqueda de texto completo en el directorio de proveedores.
+
+Cada proveedor tiene un DocumentoBusqueda con su nombre, descripción, rubros y
+nombres de productos activos, normalizado a minúsculas y sin tildes (así
+"cafe" encuentra "Café"). Según el motor:
+
+- MySQL: el documento tiene un índice FULLTEXT y se consulta con
+  MATCH ... AGAINST en modo booleano; el puntaje de MySQL es la relevancia.
+- Otros motores (SQLite en los tests): se usa el índice invertido
+  TerminoBusqueda, una fila por (proveedor, término) con un peso según el
+  campo de origen. Cada término de la búsqueda es un LIKE 'termino%' sobre
+  una columna indexada y la relevancia es la suma de los pesos.
+
+En ambos casos todos los términos de la búsqueda deben aparecer (como
+palabra o prefijo de palabra). Una búsqueda sin términos indexables (solo
+palabras de menos de LARGO_MINIMO_TERMINO letras o palabras vacías, como
+"té" o "los") se resuelve con una expresión regular sobre el documento, sin
+índice. El índice se actualiza con las señales de
+proveedor/signals.py; `reindexar_busqueda` lo reconstruye completo.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import NotSupportedError, connection, transaction
+from django.db.models import Case, F, FloatField, Func, OuterRef, Prefetch, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import DocumentoBusqueda, ProductoServicio, Proveedor, TerminoBusqueda
+
+# Peso de un término según el campo donde aparece
+PESOS = {'nombre': 4, 'categoria': 2, 'producto': 2, 'descripcion': 1}
+PESO_MAXIMO = 100
+
+# innodb_ft_min_token_size es 3 por defecto: términos más cortos no se indexan en MySQL
+LARGO_MINIMO_TERMINO = 3
+LARGO_MAXIMO_TERMINO = 64
+MAXIMO_TERMINOS_CONSULTA = 8
+
+PALABRAS_VACIAS = frozenset({
+    'con', 'del', 'las', 'los', 'para', 'por', 'que', 'una', 'uno', 'unos', 'unas',
+})
+
+PRODUCTOS_RESALTADOS = 3
+
+_PALABRA = re.compile(r'\w+')
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes ni diéresis ('Ñuñoa Café' -> 'nunoa cafe')."""
+    descompuesto = unicodedata.normalize('NFKD', (texto or '').lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    """Términos indexables del texto, en orden y con repeticiones."""
+    return [
+        palabra[:LARGO_MAXIMO_TERMINO]
+        for palabra in _PALABRA.findall(normalizar(texto))
+        if len(palabra) >= LARGO_MINIMO_TERMINO and palabra not in PALABRAS_VACIAS
+    ]
+
+
+def terminos_consulta(busqueda):
+    """Términos distintos de una búsqueda (a lo más MAXIMO_TERMINOS_CONSULTA)."""
+    return list(dict.fromkeys(tokenizar(busqueda)))[:MAXIMO_TERMINOS_CONSULTA]
+
+
+def palabras_consulta(busqueda):
+    """Todas las palabras distintas de una búsqueda, normalizadas, incluidas las que no se indexan."""
+    return list(dict.fromkeys(_PALABRA.findall(normalizar(busqueda))))[:MAXIMO_TERMINOS_CONSULTA]
+
+
+# ============================================
+# CONSTRUCCIÓN DEL ÍNDICE
+# ============================================
+
+def terminos_ponderados(nombre, descripcion, categorias=(), productos=()):
+    """{termino: peso} sumando el peso de cada aparición según el campo."""
+    pesos = Counter()
+    campos = [('nombre', nombre), ('descripcion', descripcion)]
+    campos += [('categoria', texto) for texto in categorias]
+    campos += [('producto', texto) for texto in productos]
+    for campo, texto in campos:
+        for termino in tokenizar(texto):
+            pesos[termino] += PESOS[campo]
+    return {termino: min(peso, PESO_MAXIMO) for termino, peso in pesos.items()}
+
+
+def construir_documento(nombre, descripcion, categorias=(), productos=()):
+    return '\n'.join(normalizar(texto) for texto in [nombre, descripcion, *categorias, *productos] if texto)
+
+
+def usa_fulltext():
+    return connection.vendor == 'mysql'
+
+
+def indexar_proveedores(ids):
+    """Recalcula el documento (y en motores sin FULLTEXT, los términos) de los proveedores dados."""
+    ids = set(ids)
+    if not ids:
+        return
+    proveedores = Proveedor.objects.filter(id__in=ids).only('id', 'nombre_empresa', 'descripcion').prefetch_related(
+        'categorias',
+        Prefetch(
+            'productos_servicios',
+            queryset=ProductoServicio.objects.filter(activo=True).only('id', 'proveedor_id', 'nombre'),
+            to_attr='productos_activos',
+        ),
+    )
+
+    documentos = []
+    terminos = []
+    for proveedor in proveedores:
+        textos = (
+            proveedor.nombre_empresa,
+            proveedor.descripcion,
+            [categoria.nombre for categoria in proveedor.categorias.all()],
+            [producto.nombre for producto in proveedor.productos_activos],
+        )
+        documentos.append(DocumentoBusqueda(proveedor=proveedor, documento=construir_documento(*textos)))
+        terminos.extend(
+            TerminoBusqueda(proveedor=proveedor, termino=termino, peso=peso)
+            for termino, peso in terminos_ponderados(*textos).items()
+        )
+
+    with transaction.atomic():
+        DocumentoBusqueda.objects.filter(proveedor_id__in=ids).delete()
+        DocumentoBusqueda.objects.bulk_create(documentos)
+        if not usa_fulltext():
+            TerminoBusqueda.objects.filter(proveedor_id__in=ids).delete()
+            TerminoBusqueda.objects.bulk_create(terminos, batch_size=1000)
+
+
+def reindexar_todo(lote=500):
+    """Reconstruye el índice de todos los proveedores; retorna cuántos se indexaron."""
+    ids = list(Proveedor.objects.order_by('id').values_list('id', flat=True))
+    for i in range(0, len(ids), lote):
+        indexar_proveedores(ids[i:i + lote])
+    return len(ids)
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+class Coincidencia(Func):
+    """MATCH (columna) AGAINST (consulta IN BOOLEAN MODE): relevancia FULLTEXT de MySQL."""
+    output_field = FloatField()
+
+    def __init__(self, campo, consulta):
+        super().__init__(F(campo), Value(consulta))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError('La búsqueda FULLTEXT solo está disponible en MySQL.')
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        campo, consulta = self.get_source_expressions()
+        campo_sql, campo_params = compiler.compile(campo)
+        consulta_sql, consulta_params = compiler.compile(consulta)
+        sql = f'MATCH ({campo_sql}) AGAINST ({consulta_sql} IN BOOLEAN MODE)'
+        return sql, (*campo_params, *consulta_params)
+
+
+def _consulta_booleana(terminos):
+    # Todos obligatorios y por prefijo; los términos solo tienen caracteres \w
+    return ' '.join(f'+{termino}*' for termino in terminos)
+
+
+def _coincide_con_alguno(terminos):
+    condicion = Q()
+    for termino in terminos:
+        condicion |= Q(termino__startswith=termino)
+    return condicion
+
+
+def _inicio_de_palabra(palabra):
+    # Las palabras solo tienen caracteres \w
+    return rf'(^|\W){palabra}'
+
+
+def filtrar(proveedores, busqueda):
+    """Proveedores que contienen todos los términos de la búsqueda."""
+    terminos = terminos_consulta(busqueda)
+    if not terminos:
+        for palabra in palabras_consulta(busqueda):
+            proveedores = proveedores.filter(documento_busqueda__documento__regex=_inicio_de_palabra(palabra))
+        return proveedores
+    if usa_fulltext():
+        return proveedores.alias(
+            coincidencia=Coincidencia('documento_busqueda__documento', _consulta_booleana(terminos))
+        ).filter(coincidencia__gt=0)
+    for termino in terminos:
+        proveedores = proveedores.filter(
+            id__in=TerminoBusqueda.objects.filter(termino__startswith=termino).values('proveedor_id')
+        )
+    return proveedores
+
+
+def anotar_relevancia(proveedores, busqueda):
+    """Agrega `relevancia` (mayor es mejor) a los proveedores ya filtrados por `filtrar`."""
+    terminos = terminos_consulta(busqueda)
+    if not terminos:
+        # Sin índice: cuenta las palabras que aparecen en el nombre
+        relevancia = Value(0.0, output_field=FloatField())
+        for palabra in palabras_consulta(busqueda):
+            relevancia += Case(
+                When(nombre_empresa__iregex=_inicio_de_palabra(palabra), then=Value(float(PESOS['nombre']))),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        return proveedores.annotate(relevancia=relevancia)
+    if usa_fulltext():
+        return proveedores.annotate(
+            relevancia=Coincidencia('documento_busqueda__documento', _consulta_booleana(terminos))
+        )
+    pesos = (
+        TerminoBusqueda.objects
+        .filter(_coincide_con_alguno(terminos), proveedor_id=OuterRef('pk'))
+        .order_by()
+        .values('proveedor_id')
+        .annotate(total=Sum('peso'))
+        .values('total')
+    )
+    return proveedores.annotate(
+        relevancia=Coalesce(Subquery(pesos), 0, output_field=FloatField())
+    )
+
+
+# ============================================
+# RESALTADO
+# ============================================
+
+def _coincide(palabra, terminos):
+    return normalizar(palabra).startswith(terminos)
+
+
+def resaltar(texto, terminos):
+    """HTML de `texto` (escapado) con <mark> en las palabras que empiezan con algún término."""
+    terminos = tuple(terminos)
+    partes = []
+    ultimo = 0
+    for palabra in _PALABRA.finditer(texto or ''):
+        if terminos and _coincide(palabra.group(), terminos):
+            partes.append(escape(texto[ultimo:palabra.start()]))
+            partes.append(f'<mark>{escape(palabra.group())}</mark>')
+            ultimo = palabra.end()
+    partes.append(escape((texto or '')[ultimo:]))
+    return mark_safe(''.join(partes))
+
+
+def fragmento(texto, terminos, palabras=25):
+    """
+    Hasta `palabras` palabras de `texto` alrededor de la primera coincidencia,
+    resaltadas; con '…' donde se cortó.
+    """
+    terminos = tuple(terminos)
+    palabras_texto = (texto or '').split()
+    inicio = next(
+        (i for i, palabra in enumerate(palabras_texto)
+         if any(_coincide(p, terminos) for p in _PALABRA.findall(palabra))),
+        0,
+    )
+    inicio = max(0, min(inicio - 5, len(palabras_texto) - palabras))
+    recorte = ' '.join(palabras_texto[inicio:inicio + palabras])
+    html = resaltar(recorte, terminos)
+    if inicio > 0:
+        html = mark_safe('… ' + html)
+    if inicio + palabras < len(palabras_texto):
+        html = mark_safe(html + ' …')
+    return html
+
+
+def resaltar_resultados(proveedores, busqueda):
+    """
+    Agrega a cada proveedor (una página de resultados) `nombre_resaltado`,
+    `descripcion_resaltada` y `productos_resaltados` (productos activos que
+    coinciden). Hace una sola consulta para los productos de toda la página.
+    """
+    terminos = tuple(terminos_consulta(busqueda))
+    if not terminos or not proveedores:
+        return
+    productos = {}
+    for producto in ProductoServicio.objects.filter(
+        proveedor__in=proveedores, activo=True
+    ).only('proveedor_id', 'nombre').order_by('-destacado', 'nombre'):
+        if any(_coincide(palabra, terminos) for palabra in _PALABRA.findall(producto.nombre)):
+            productos.setdefault(producto.proveedor_id, []).append(producto.nombre)
+
+    for proveedor in proveedores:
+        proveedor.nombre_resaltado = resaltar(proveedor.nombre_empresa, terminos)
+        proveedor.descripcion_resaltada = fragmento(proveedor.descripcion, terminos)
+        proveedor.productos_resaltados = [
+            resaltar(nombre, terminos)
+            for nombre in productos.get(proveedor.id, [])[:PRODUCTOS_RESALTADOS]
+        ]
@@ -0,0 +1,44 @@
+# proveedor/management/commands/importar_productos.py
+from django.core.management.base import BaseCommand, CommandError
+
+from proveedor.importacion import LOTE_IMPORTACION, ErrorImportacion, importar_productos
+from proveedor.models import Proveedor
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa el catálogo de un proveedor desde un archivo CSV o XLSX. '
+        'Los productos con un SKU existente se actualizan y el resto se crean.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('proveedor_id', type=int, help='ID del proveedor.')
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx.')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=LOTE_IMPORTACION,
+            help='Filas por escritura en la base de datos.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            proveedor = Proveedor.objects.get(pk=options['proveedor_id'])
+        except Proveedor.DoesNotExist:
+            raise CommandError(f'No existe el proveedor {options["proveedor_id"]}.')
+
+        ruta = options['archivo']
+        try:
+            with open(ruta, 'rb') as archivo:
+                resultado = importar_productos(proveedor, archivo, ruta, lote=options['lote'])
+        except OSError as e:
+            raise CommandError(f'No se pudo abrir el archivo: {e}')
+        except ErrorImportacion as e:
+            raise CommandError(str(e))
+
+        for error in resultado['errores']:
+            self.stderr.write(f'Fila {error["fila"]}: {"; ".join(error["mensajes"])}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Importación terminada: {resultado["creados"]} creados, '
+            f'{resultado["actualizados"]} actualizados, {resultado["total_errores"]} filas con errores.'
+        ))
@@ -0,0 +1,23 @@
+# proveedor/management/commands/recalcular_ranking_proveedores.py
+from django.core.management.base import BaseCommand
+
+from proveedor.ranking import recalcular_puntajes
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula el puntaje de ranking (ranking_score) de todos los proveedores. '
+        'Pensado para cron diario: recoge las promociones que empezaron o vencieron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Proveedores por consulta.',
+        )
+
+    def handle(self, *args, **options):
+        cambiados = recalcular_puntajes(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'Ranking recalculado: {cambiados} proveedores cambiaron de puntaje.'))
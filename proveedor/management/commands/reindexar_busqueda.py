@@ -0,0 +1,25 @@
+# proveedor/management/commands/reindexar_busqueda.py
+from django.core.management.base import BaseCommand
+
+from proveedor.busqueda import invalidar_facetas
+from proveedor.indice_texto import reindexar_todo
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye el índice de búsqueda de texto del directorio de proveedores '
+        '(documentos y, en motores sin FULLTEXT, el índice invertido).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Proveedores indexados por transacción.',
+        )
+
+    def handle(self, *args, **options):
+        total = reindexar_todo(lote=options['lote'])
+        invalidar_facetas()
+        self.stdout.write(self.style.SUCCESS(f'Índice de búsqueda reconstruido: {total} proveedores.'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0004_solicitudproveedor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaDiariaProveedor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('visitas', models.PositiveIntegerField(default=0)),
+                ('contactos_enviados', models.PositiveIntegerField(default=0)),
+                ('contactos_aceptados', models.PositiveIntegerField(default=0)),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_diarias', to='proveedor.proveedor')),
+            ],
+            options={
+                'verbose_name': 'Estadística Diaria de Proveedor',
+                'verbose_name_plural': 'Estadísticas Diarias de Proveedores',
+                'db_table': 'estadistica_diaria_proveedor',
+                'ordering': ['fecha'],
+                'unique_together': {('proveedor', 'fecha')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0005_estadistica_diaria_proveedor'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='proveedor',
+            name='cobertura',
+            field=models.CharField(choices=[('local', 'Local'), ('comunal', 'Comunal'), ('regional', 'Regional'), ('nacional', 'Nacional'), ('internacional', 'Internacional')], db_index=True, default='local', max_length=20, verbose_name='Zona geográfica'),
+        ),
+        migrations.AlterField(
+            model_name='proveedor',
+            name='comuna',
+            field=models.CharField(blank=True, db_index=True, max_length=50, null=True, verbose_name='Comuna'),
+        ),
+        migrations.AlterField(
+            model_name='proveedor',
+            name='region',
+            field=models.CharField(blank=True, db_index=True, max_length=10, null=True, verbose_name='Región'),
+        ),
+    ]
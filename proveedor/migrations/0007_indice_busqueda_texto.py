@@ -0,0 +1,124 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:34
+
+import re
+import unicodedata
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia de proveedor.indice_texto al momento de esta migración: los cambios
+# posteriores al índice se aplican con el comando `reindexar_busqueda`
+PESOS = {'nombre': 4, 'categoria': 2, 'producto': 2, 'descripcion': 1}
+PESO_MAXIMO = 100
+LARGO_MINIMO_TERMINO = 3
+LARGO_MAXIMO_TERMINO = 64
+PALABRAS_VACIAS = frozenset({
+    'con', 'del', 'las', 'los', 'para', 'por', 'que', 'una', 'uno', 'unos', 'unas',
+})
+_PALABRA = re.compile(r'\w+')
+
+
+def normalizar(texto):
+    descompuesto = unicodedata.normalize('NFKD', (texto or '').lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    return [
+        palabra[:LARGO_MAXIMO_TERMINO]
+        for palabra in _PALABRA.findall(normalizar(texto))
+        if len(palabra) >= LARGO_MINIMO_TERMINO and palabra not in PALABRAS_VACIAS
+    ]
+
+
+def terminos_ponderados(nombre, descripcion, categorias=(), productos=()):
+    pesos = Counter()
+    campos = [('nombre', nombre), ('descripcion', descripcion)]
+    campos += [('categoria', texto) for texto in categorias]
+    campos += [('producto', texto) for texto in productos]
+    for campo, texto in campos:
+        for termino in tokenizar(texto):
+            pesos[termino] += PESOS[campo]
+    return {termino: min(peso, PESO_MAXIMO) for termino, peso in pesos.items()}
+
+
+def construir_documento(nombre, descripcion, categorias=(), productos=()):
+    return '\n'.join(normalizar(texto) for texto in [nombre, descripcion, *categorias, *productos] if texto)
+
+
+def crear_indice_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'ALTER TABLE busqueda_documento_proveedor '
+            'ADD FULLTEXT INDEX busqueda_documento_ft (documento)'
+        )
+
+
+def eliminar_indice_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'ALTER TABLE busqueda_documento_proveedor DROP INDEX busqueda_documento_ft'
+        )
+
+
+def indexar_proveedores(apps, schema_editor):
+    """Construye el índice de búsqueda de los proveedores existentes."""
+    Proveedor = apps.get_model('proveedor', 'Proveedor')
+    DocumentoBusqueda = apps.get_model('proveedor', 'DocumentoBusqueda')
+    TerminoBusqueda = apps.get_model('proveedor', 'TerminoBusqueda')
+    con_terminos = schema_editor.connection.vendor != 'mysql'
+
+    for proveedor in Proveedor.objects.prefetch_related('categorias', 'productos_servicios').iterator(chunk_size=500):
+        textos = (
+            proveedor.nombre_empresa,
+            proveedor.descripcion,
+            [categoria.nombre for categoria in proveedor.categorias.all()],
+            [producto.nombre for producto in proveedor.productos_servicios.all() if producto.activo],
+        )
+        DocumentoBusqueda.objects.create(proveedor=proveedor, documento=construir_documento(*textos))
+        if con_terminos:
+            TerminoBusqueda.objects.bulk_create([
+                TerminoBusqueda(proveedor=proveedor, termino=termino, peso=peso)
+                for termino, peso in terminos_ponderados(*textos).items()
+            ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0006_indices_facetas_directorio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('documento', models.TextField(blank=True, default='')),
+                ('proveedor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='documento_busqueda', to='proveedor.proveedor')),
+            ],
+            options={
+                'verbose_name': 'Documento de Búsqueda',
+                'verbose_name_plural': 'Documentos de Búsqueda',
+                'db_table': 'busqueda_documento_proveedor',
+            },
+        ),
+        migrations.CreateModel(
+            name='TerminoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(db_index=True, max_length=64)),
+                ('peso', models.PositiveSmallIntegerField(default=1)),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos_busqueda', to='proveedor.proveedor')),
+            ],
+            options={
+                'verbose_name': 'Término de Búsqueda',
+                'verbose_name_plural': 'Términos de Búsqueda',
+                'db_table': 'busqueda_termino_proveedor',
+                'unique_together': {('proveedor', 'termino')},
+            },
+        ),
+        migrations.RunPython(crear_indice_fulltext, eliminar_indice_fulltext),
+        migrations.RunPython(indexar_proveedores, migrations.RunPython.noop),
+    ]
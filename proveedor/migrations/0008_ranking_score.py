@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:39
+
+import math
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Copia de proveedor.ranking al momento de esta migración: los cambios
+# posteriores a la fórmula se aplican con `recalcular_ranking_proveedores`
+PESOS_RANKING = {
+    'destacado': 100,
+    'verificado': 20,
+    'aceptacion': 20,
+    'visitas': 15,
+    'perfil': 15,
+    'promociones': 10,
+}
+ACEPTACION_PREVIA = (1, 2)
+VISITAS_REFERENCIA = 1000
+LARGO_DESCRIPCION_COMPLETA = 80
+CAMPOS_RANKING = {
+    'destacado', 'verificado', 'visitas', 'contactos_enviados', 'contactos_aceptados',
+    'descripcion', 'foto_perfil', 'telefono', 'sitio_web', 'facebook', 'instagram', 'linkedin',
+    'direccion', 'region', 'comuna',
+}
+
+
+def completitud_perfil(datos):
+    partes = [
+        bool(datos['foto_perfil']),
+        len(datos['descripcion'] or '') >= LARGO_DESCRIPCION_COMPLETA,
+        bool(datos['telefono']),
+        bool(datos['sitio_web'] or datos['facebook'] or datos['instagram'] or datos['linkedin']),
+        bool(datos['direccion']),
+        bool(datos['region'] and datos['comuna']),
+        datos['total_categorias'] > 0,
+        datos['productos_activos'] > 0,
+    ]
+    return sum(partes) / len(partes)
+
+
+def calcular_puntaje(datos):
+    aceptados_previos, enviados_previos = ACEPTACION_PREVIA
+    aceptacion = (datos['contactos_aceptados'] + aceptados_previos) / (datos['contactos_enviados'] + enviados_previos)
+    visitas = min(math.log1p(max(datos['visitas'], 0)) / math.log1p(VISITAS_REFERENCIA), 1)
+
+    puntaje = (
+        PESOS_RANKING['destacado'] * datos['destacado']
+        + PESOS_RANKING['verificado'] * datos['verificado']
+        + PESOS_RANKING['aceptacion'] * min(aceptacion, 1)
+        + PESOS_RANKING['visitas'] * visitas
+        + PESOS_RANKING['perfil'] * completitud_perfil(datos)
+        + PESOS_RANKING['promociones'] * (datos['promociones_vigentes'] > 0)
+    )
+    return round(puntaje, 4)
+
+
+def calcular_ranking(apps, schema_editor):
+    """Puntaje inicial de los proveedores existentes."""
+    Proveedor = apps.get_model('proveedor', 'Proveedor')
+    hoy = timezone.localdate()
+    actualizar = []
+    for proveedor in Proveedor.objects.prefetch_related('categorias', 'productos_servicios', 'promociones').iterator(chunk_size=500):
+        datos = {campo: getattr(proveedor, campo) for campo in CAMPOS_RANKING}
+        datos['foto_perfil'] = proveedor.foto_perfil.name
+        datos['total_categorias'] = len(proveedor.categorias.all())
+        datos['productos_activos'] = sum(1 for producto in proveedor.productos_servicios.all() if producto.activo)
+        datos['promociones_vigentes'] = sum(
+            1 for promocion in proveedor.promociones.all()
+            if promocion.activo and promocion.fecha_inicio <= hoy <= promocion.fecha_fin
+        )
+        proveedor.ranking_score = calcular_puntaje(datos)
+        actualizar.append(proveedor)
+    Proveedor.objects.bulk_update(actualizar, ['ranking_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0007_indice_busqueda_texto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proveedor',
+            name='ranking_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Puntaje de ranking'),
+        ),
+        migrations.AddIndex(
+            model_name='proveedor',
+            index=models.Index(fields=['activo', '-ranking_score'], name='proveedor_ranking_idx'),
+        ),
+        migrations.RunPython(calcular_ranking, migrations.RunPython.noop),
+    ]
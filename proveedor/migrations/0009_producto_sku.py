@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0008_ranking_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productoservicio',
+            name='sku',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='SKU'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='productoservicio',
+            unique_together={('proveedor', 'sku')},
+        ),
+    ]
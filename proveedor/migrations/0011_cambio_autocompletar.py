@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0010_variantes_imagenes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioAutocompletar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=20)),
+                ('objeto_id', models.PositiveIntegerField()),
+                ('nombre', models.CharField(blank=True, default='', max_length=200)),
+                ('id_proveedor', models.PositiveIntegerField(blank=True, null=True)),
+                ('fecha', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Cambio de Autocompletar',
+                'verbose_name_plural': 'Cambios de Autocompletar',
+                'db_table': 'autocompletar_cambio',
+            },
+        ),
+    ]
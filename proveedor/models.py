@@ -3,822 +3,56 @@ from django.core.validators import RegexValidator
 from django.utils import timezone
 from django.templatetags.static import static
 
+from .geo import (
+    PAISES_CHOICES,
+    REGIONES_CHOICES,
+    COMUNAS_CHOICES,
+    REGIONES_POR_PAIS,
+    COMUNAS_POR_REGION,
+    nombre_pais,
+    nombre_region,
+    nombre_comuna,
+)
 
-# ==================== CHOICES GEOGRÁFICAS SIMPLIFICADAS ====================
 
-PAISES_CHOICES = [
-    ('', 'Selecciona un país'),
-    ('CL', 'Chile'),
-]
+# ==================== MODELOS ====================
 
-# usuarios/choices.py
-REGIONES_CHOICES = [
-    ('', 'Selecciona una región'),
-    ('CL-AP', 'Región de Arica y Parinacota'),
-    ('CL-TA', 'Región de Tarapacá'),
-    ('CL-AN', 'Región de Antofagasta'),
-    ('CL-AT', 'Región de Atacama'),
-    ('CL-CO', 'Región de Coquimbo'),
-    ('CL-VS', 'Región de Valparaíso'),
-    ('CL-RM', 'Región Metropolitana de Santiago'),
-    ('CL-LI', 'Región del Libertador General Bernardo O\'Higgins'),
-    ('CL-ML', 'Región del Maule'),
-    ('CL-NB', 'Región de Ñuble'),
-    ('CL-BI', 'Región del Biobío'),
-    ('CL-AR', 'Región de La Araucanía'),
-    ('CL-LR', 'Región de Los Ríos'),
-    ('CL-LL', 'Región de Los Lagos'),
-    ('CL-AI', 'Región Aysén del General Carlos Ibáñez del Campo'),
-    ('CL-MA', 'Región de Magallanes y de la Antártica Chilena'),
-]
+class ValoresCargadosMixin:
+    """
+    Recuerda los valores con que se leyó la fila, para que las señales sepan
+    qué campos cambiaron de verdad en un save() completo (un formulario de
+    perfil guarda todos los campos aunque solo cambie la descripción).
+    """
 
-COMUNAS_CHOICES = [
-    ('', 'Selecciona una comuna'),
-    
-    # Región de Arica y Parinacota
-    ('AP-Arica', 'Arica'),
-    ('AP-Camarones', 'Camarones'),
-    ('AP-Putre', 'Putre'),
-    ('AP-General-Lagos', 'General Lagos'),
-    
-    # Región de Tarapacá
-    ('TA-Iquique', 'Iquique'),
-    ('TA-Alto-Hospicio', 'Alto Hospicio'),
-    ('TA-Pozo-Almonte', 'Pozo Almonte'),
-    ('TA-Camina', 'Camiña'),
-    ('TA-Colchane', 'Colchane'),
-    ('TA-Huara', 'Huara'),
-    ('TA-Pica', 'Pica'),
-    
-    # Región de Antofagasta
-    ('AN-Antofagasta', 'Antofagasta'),
-    ('AN-Mejillones', 'Mejillones'),
-    ('AN-Sierra-Gorda', 'Sierra Gorda'),
-    ('AN-Taltal', 'Taltal'),
-    ('AN-Calama', 'Calama'),
-    ('AN-Ollague', 'Ollagüe'),
-    ('AN-San-Pedro-de-Atacama', 'San Pedro de Atacama'),
-    ('AN-Tocopilla', 'Tocopilla'),
-    ('AN-Maria-Elena', 'María Elena'),
-    
-    # Región de Atacama
-    ('AT-Copiapo', 'Copiapó'),
-    ('AT-Caldera', 'Caldera'),
-    ('AT-Tierra-Amarilla', 'Tierra Amarilla'),
-    ('AT-Chanaral', 'Chañaral'),
-    ('AT-Diego-de-Almagro', 'Diego de Almagro'),
-    ('AT-Vallenar', 'Vallenar'),
-    ('AT-Alto-del-Carmen', 'Alto del Carmen'),
-    ('AT-Freirina', 'Freirina'),
-    ('AT-Huasco', 'Huasco'),
-    
-    # Región de Coquimbo
-    ('CO-La-Serena', 'La Serena'),
-    ('CO-Coquimbo', 'Coquimbo'),
-    ('CO-Andacollo', 'Andacollo'),
-    ('CO-La-Higuera', 'La Higuera'),
-    ('CO-Paihuano', 'Paiguano'),
-    ('CO-Vicuna', 'Vicuña'),
-    ('CO-Illapel', 'Illapel'),
-    ('CO-Canela', 'Canela'),
-    ('CO-Los-Vilos', 'Los Vilos'),
-    ('CO-Salamanca', 'Salamanca'),
-    ('CO-Ovalle', 'Ovalle'),
-    ('CO-Combarbala', 'Combarbalá'),
-    ('CO-Monte-Patria', 'Monte Patria'),
-    ('CO-Punitaqui', 'Punitaqui'),
-    ('CO-Rio-Hurtado', 'Río Hurtado'),
-    
-    # Región de Valparaíso
-    ('VS-Valparaiso', 'Valparaíso'),
-    ('VS-Casablanca', 'Casablanca'),
-    ('VS-Concon', 'Concón'),
-    ('VS-Juan-Fernandez', 'Juan Fernández'),
-    ('VS-Puchuncavi', 'Puchuncaví'),
-    ('VS-Quintero', 'Quintero'),
-    ('VS-Vina-del-Mar', 'Viña del Mar'),
-    ('VS-Isla-de-Pascua', 'Isla de Pascua'),
-    ('VS-Los-Andes', 'Los Andes'),
-    ('VS-Calle-Larga', 'Calle Larga'),
-    ('VS-Rinconada', 'Rinconada'),
-    ('VS-San-Esteban', 'San Esteban'),
-    ('VS-La-Ligua', 'La Ligua'),
-    ('VS-Cabildo', 'Cabildo'),
-    ('VS-Papudo', 'Papudo'),
-    ('VS-Petorca', 'Petorca'),
-    ('VS-Zapallar', 'Zapallar'),
-    ('VS-Quillota', 'Quillota'),
-    ('VS-Calera', 'Calera'),
-    ('VS-Hijuelas', 'Hijuelas'),
-    ('VS-La-Cruz', 'La Cruz'),
-    ('VS-Nogales', 'Nogales'),
-    ('VS-San-Antonio', 'San Antonio'),
-    ('VS-Algarrobo', 'Algarrobo'),
-    ('VS-Cartagena', 'Cartagena'),
-    ('VS-El-Quisco', 'El Quisco'),
-    ('VS-El-Tabo', 'El Tabo'),
-    ('VS-Santo-Domingo', 'Santo Domingo'),
-    ('VS-San-Felipe', 'San Felipe'),
-    ('VS-Catemu', 'Catemu'),
-    ('VS-Llaillay', 'Llaillay'),
-    ('VS-Panquehue', 'Panquehue'),
-    ('VS-Putaendo', 'Putaendo'),
-    ('VS-Santa-Maria', 'Santa María'),
-    ('VS-Quilpue', 'Quilpué'),
-    ('VS-Limache', 'Limache'),
-    ('VS-Olmue', 'Olmué'),
-    ('VS-Villa-Alemana', 'Villa Alemana'),
-    
-    # Región Metropolitana de Santiago
-    ('RM-Santiago', 'Santiago'),
-    ('RM-Cerrillos', 'Cerrillos'),
-    ('RM-Cerro-Navia', 'Cerro Navia'),
-    ('RM-Conchali', 'Conchalí'),
-    ('RM-El-Bosque', 'El Bosque'),
-    ('RM-Estacion-Central', 'Estación Central'),
-    ('RM-Huechuraba', 'Huechuraba'),
-    ('RM-Independencia', 'Independencia'),
-    ('RM-La-Cisterna', 'La Cisterna'),
-    ('RM-La-Florida', 'La Florida'),
-    ('RM-La-Granja', 'La Granja'),
-    ('RM-La-Pintana', 'La Pintana'),
-    ('RM-La-Reina', 'La Reina'),
-    ('RM-Las-Condes', 'Las Condes'),
-    ('RM-Lo-Barnechea', 'Lo Barnechea'),
-    ('RM-Lo-Espejo', 'Lo Espejo'),
-    ('RM-Lo-Prado', 'Lo Prado'),
-    ('RM-Macul', 'Macul'),
-    ('RM-Maipu', 'Maipú'),
-    ('RM-Nunoa', 'Ñuñoa'),
-    ('RM-Pedro-Aguirre-Cerda', 'Pedro Aguirre Cerda'),
-    ('RM-Penalolen', 'Peñalolén'),
-    ('RM-Providencia', 'Providencia'),
-    ('RM-Pudahuel', 'Pudahuel'),
-    ('RM-Quilicura', 'Quilicura'),
-    ('RM-Quinta-Normal', 'Quinta Normal'),
-    ('RM-Recoleta', 'Recoleta'),
-    ('RM-Renca', 'Renca'),
-    ('RM-San-Joaquin', 'San Joaquín'),
-    ('RM-San-Miguel', 'San Miguel'),
-    ('RM-San-Ramon', 'San Ramón'),
-    ('RM-Vitacura', 'Vitacura'),
-    ('RM-Puente-Alto', 'Puente Alto'),
-    ('RM-Pirque', 'Pirque'),
-    ('RM-San-Jose-de-Maipo', 'San José de Maipo'),
-    ('RM-Colina', 'Colina'),
-    ('RM-Lampa', 'Lampa'),
-    ('RM-Tiltil', 'Tiltil'),
-    ('RM-San-Bernardo', 'San Bernardo'),
-    ('RM-Buin', 'Buin'),
-    ('RM-Calera-de-Tango', 'Calera de Tango'),
-    ('RM-Paine', 'Paine'),
-    ('RM-Melipilla', 'Melipilla'),
-    ('RM-Alhue', 'Alhué'),
-    ('RM-Curacavi', 'Curacaví'),
-    ('RM-Maria-Pinto', 'María Pinto'),
-    ('RM-San-Pedro', 'San Pedro'),
-    ('RM-Talagante', 'Talagante'),
-    ('RM-El-Monte', 'El Monte'),
-    ('RM-Isla-de-Maipo', 'Isla de Maipo'),
-    ('RM-Padre-Hurtado', 'Padre Hurtado'),
-    ('RM-Penaflor', 'Peñaflor'),
-    
-    # Región del Libertador General Bernardo O'Higgins
-    ('LI-Rancagua', 'Rancagua'),
-    ('LI-Codegua', 'Codegua'),
-    ('LI-Coinco', 'Coinco'),
-    ('LI-Coltauco', 'Coltauco'),
-    ('LI-Donihue', 'Doñihue'),
-    ('LI-Graneros', 'Graneros'),
-    ('LI-Las-Cabras', 'Las Cabras'),
-    ('LI-Machali', 'Machalí'),
-    ('LI-Malloa', 'Malloa'),
-    ('LI-Mostazal', 'Mostazal'),
-    ('LI-Olivar', 'Olivar'),
-    ('LI-Peumo', 'Peumo'),
-    ('LI-Pichidegua', 'Pichidegua'),
-    ('LI-Quinta-de-Tilcoco', 'Quinta de Tilcoco'),
-    ('LI-Rengo', 'Rengo'),
-    ('LI-Requinoa', 'Requínoa'),
-    ('LI-San-Vicente', 'San Vicente'),
-    ('LI-Pichilemu', 'Pichilemu'),
-    ('LI-La-Estrella', 'La Estrella'),
-    ('LI-Litueche', 'Litueche'),
-    ('LI-Marchihue', 'Marchihue'),
-    ('LI-Navidad', 'Navidad'),
-    ('LI-Paredones', 'Paredones'),
-    ('LI-San-Fernando', 'San Fernando'),
-    ('LI-Chepica', 'Chépica'),
-    ('LI-Chimbarongo', 'Chimbarongo'),
-    ('LI-Lolol', 'Lolol'),
-    ('LI-Nancagua', 'Nancagua'),
-    ('LI-Palmilla', 'Palmilla'),
-    ('LI-Peralillo', 'Peralillo'),
-    ('LI-Placilla', 'Placilla'),
-    ('LI-Pumanque', 'Pumanque'),
-    ('LI-Santa-Cruz', 'Santa Cruz'),
-    
-    # Región del Maule
-    ('ML-Talca', 'Talca'),
-    ('ML-Constitucion', 'Constitución'),
-    ('ML-Curepto', 'Curepto'),
-    ('ML-Empedrado', 'Empedrado'),
-    ('ML-Maule', 'Maule'),
-    ('ML-Pelarco', 'Pelarco'),
-    ('ML-Pencahue', 'Pencahue'),
-    ('ML-Rio-Claro', 'Río Claro'),
-    ('ML-San-Clemente', 'San Clemente'),
-    ('ML-San-Rafael', 'San Rafael'),
-    ('ML-Cauquenes', 'Cauquenes'),
-    ('ML-Chanco', 'Chanco'),
-    ('ML-Pelluhue', 'Pelluhue'),
-    ('ML-Curico', 'Curicó'),
-    ('ML-Hualane', 'Hualañé'),
-    ('ML-Licanten', 'Licantén'),
-    ('ML-Molina', 'Molina'),
-    ('ML-Rauco', 'Rauco'),
-    ('ML-Romeral', 'Romeral'),
-    ('ML-Sagrada-Familia', 'Sagrada Familia'),
-    ('ML-Teno', 'Teno'),
-    ('ML-Vichuquen', 'Vichuquén'),
-    ('ML-Linares', 'Linares'),
-    ('ML-Colbun', 'Colbún'),
-    ('ML-Longavi', 'Longaví'),
-    ('ML-Parral', 'Parral'),
-    ('ML-Retiro', 'Retiro'),
-    ('ML-San-Javier', 'San Javier'),
-    ('ML-Villa-Alegre', 'Villa Alegre'),
-    ('ML-Yerbas-Buenas', 'Yerbas Buenas'),
-    
-    # Región de Ñuble
-    ('NB-Chillan', 'Chillán'),
-    ('NB-Bulnes', 'Bulnes'),
-    ('NB-Cobquecura', 'Cobquecura'),
-    ('NB-Coelemu', 'Coelemu'),
-    ('NB-Coihueco', 'Coihueco'),
-    ('NB-Chillan-Viejo', 'Chillán Viejo'),
-    ('NB-El-Carmen', 'El Carmen'),
-    ('NB-Ninhue', 'Ninhue'),
-    ('NB-Niquen', 'Ñiquén'),
-    ('NB-Pemuco', 'Pemuco'),
-    ('NB-Pinto', 'Pinto'),
-    ('NB-Portezuelo', 'Portezuelo'),
-    ('NB-Quillon', 'Quillón'),
-    ('NB-Quirihue', 'Quirihue'),
-    ('NB-Ranquil', 'Ránquil'),
-    ('NB-San-Carlos', 'San Carlos'),
-    ('NB-San-Fabian', 'San Fabián'),
-    ('NB-San-Ignacio', 'San Ignacio'),
-    ('NB-San-Nicolas', 'San Nicolás'),
-    ('NB-Trehuaco', 'Trehuaco'),
-    ('NB-Yungay', 'Yungay'),
-    
-    # Región del Biobío
-    ('BI-Concepcion', 'Concepción'),
-    ('BI-Coronel', 'Coronel'),
-    ('BI-Chiguayante', 'Chiguayante'),
-    ('BI-Florida', 'Florida'),
-    ('BI-Hualqui', 'Hualqui'),
-    ('BI-Lota', 'Lota'),
-    ('BI-Penco', 'Penco'),
-    ('BI-San-Pedro-de-la-Paz', 'San Pedro de la Paz'),
-    ('BI-Santa-Juana', 'Santa Juana'),
-    ('BI-Talcahuano', 'Talcahuano'),
-    ('BI-Tome', 'Tomé'),
-    ('BI-Hualpen', 'Hualpén'),
-    ('BI-Lebu', 'Lebu'),
-    ('BI-Arauco', 'Arauco'),
-    ('BI-Canete', 'Cañete'),
-    ('BI-Contulmo', 'Contulmo'),
-    ('BI-Curanilahue', 'Curanilahue'),
-    ('BI-Los-Alamos', 'Los Álamos'),
-    ('BI-Tirua', 'Tirúa'),
-    ('BI-Los-Angeles', 'Los Ángeles'),
-    ('BI-Antuco', 'Antuco'),
-    ('BI-Cabrero', 'Cabrero'),
-    ('BI-Laja', 'Laja'),
-    ('BI-Mulchen', 'Mulchén'),
-    ('BI-Nacimiento', 'Nacimiento'),
-    ('BI-Negrete', 'Negrete'),
-    ('BI-Quilaco', 'Quilaco'),
-    ('BI-Quilleco', 'Quilleco'),
-    ('BI-San-Rosendo', 'San Rosendo'),
-    ('BI-Santa-Barbara', 'Santa Bárbara'),
-    ('BI-Tucapel', 'Tucapel'),
-    ('BI-Yumbel', 'Yumbel'),
-    ('BI-Alto-Biobio', 'Alto Biobío'),
-    
-    # Región de La Araucanía
-    ('AR-Temuco', 'Temuco'),
-    ('AR-Carahue', 'Carahue'),
-    ('AR-Cunco', 'Cunco'),
-    ('AR-Curarrehue', 'Curarrehue'),
-    ('AR-Freire', 'Freire'),
-    ('AR-Galvarino', 'Galvarino'),
-    ('AR-Gorbea', 'Gorbea'),
-    ('AR-Lautaro', 'Lautaro'),
-    ('AR-Loncoche', 'Loncoche'),
-    ('AR-Melipeuco', 'Melipeuco'),
-    ('AR-Nueva-Imperial', 'Nueva Imperial'),
-    ('AR-Padre-Las-Casas', 'Padre Las Casas'),
-    ('AR-Perquenco', 'Perquenco'),
-    ('AR-Pitrufquen', 'Pitrufquén'),
-    ('AR-Pucon', 'Pucón'),
-    ('AR-Saavedra', 'Saavedra'),
-    ('AR-Teodoro-Schmidt', 'Teodoro Schmidt'),
-    ('AR-Tolten', 'Toltén'),
-    ('AR-Vilcun', 'Vilcún'),
-    ('AR-Villarrica', 'Villarrica'),
-    ('AR-Cholchol', 'Cholchol'),
-    ('AR-Angol', 'Angol'),
-    ('AR-Collipulli', 'Collipulli'),
-    ('AR-Curacautin', 'Curacautín'),
-    ('AR-Ercilla', 'Ercilla'),
-    ('AR-Lonquimay', 'Lonquimay'),
-    ('AR-Los-Sauces', 'Los Sauces'),
-    ('AR-Lumaco', 'Lumaco'),
-    ('AR-Puren', 'Purén'),
-    ('AR-Renaico', 'Renaico'),
-    ('AR-Traiguen', 'Traiguén'),
-    ('AR-Victoria', 'Victoria'),
-    
-    # Región de Los Ríos
-    ('LR-Valdivia', 'Valdivia'),
-    ('LR-Corral', 'Corral'),
-    ('LR-Lanco', 'Lanco'),
-    ('LR-Los-Lagos', 'Los Lagos'),
-    ('LR-Mafil', 'Máfil'),
-    ('LR-Mariquina', 'Mariquina'),
-    ('LR-Paillaco', 'Paillaco'),
-    ('LR-Panguipulli', 'Panguipulli'),
-    ('LR-La-Union', 'La Unión'),
-    ('LR-Futrono', 'Futrono'),
-    ('LR-Lago-Ranco', 'Lago Ranco'),
-    ('LR-Rio-Bueno', 'Río Bueno'),
-    
-    # Región de Los Lagos
-    ('LL-Puerto-Montt', 'Puerto Montt'),
-    ('LL-Calbuco', 'Calbuco'),
-    ('LL-Cochamo', 'Cochamó'),
-    ('LL-Fresia', 'Fresia'),
-    ('LL-Frutillar', 'Frutillar'),
-    ('LL-Los-Muermos', 'Los Muermos'),
-    ('LL-Llanquihue', 'Llanquihue'),
-    ('LL-Maullin', 'Maullín'),
-    ('LL-Puerto-Varas', 'Puerto Varas'),
-    ('LL-Castro', 'Castro'),
-    ('LL-Ancud', 'Ancud'),
-    ('LL-Chonchi', 'Chonchi'),
-    ('LL-Curaco-de-Velez', 'Curaco de Vélez'),
-    ('LL-Dalcahue', 'Dalcahue'),
-    ('LL-Puqueldon', 'Puqueldón'),
-    ('LL-Queilen', 'Queilén'),
-    ('LL-Quellon', 'Quellón'),
-    ('LL-Quemalchi', 'Quemchi'),
-    ('LL-Quinchao', 'Quinchao'),
-    ('LL-Osorno', 'Osorno'),
-    ('LL-Puerto-Octay', 'Puerto Octay'),
-    ('LL-Purranque', 'Purranque'),
-    ('LL-Puyehue', 'Puyehue'),
-    ('LL-Rio-Negro', 'Río Negro'),
-    ('LL-San-Juan-de-la-Costa', 'San Juan de la Costa'),
-    ('LL-San-Pablo', 'San Pablo'),
-    ('LL-Chaiten', 'Chaitén'),
-    ('LL-Futaleufu', 'Futaleufú'),
-    ('LL-Hualaihue', 'Hualaihué'),
-    ('LL-Palena', 'Palena'),
-    
-    # Región Aysén del General Carlos Ibáñez del Campo
-    ('AI-Coyhaique', 'Coyhaique'),
-    ('AI-Lago-Verde', 'Lago Verde'),
-    ('AI-Aysen', 'Aysén'),
-    ('AI-Cisnes', 'Cisnes'),
-    ('AI-Guaitecas', 'Guaitecas'),
-    ('AI-Cochrane', 'Cochrane'),
-    ('AI-OHiggins', 'O\'Higgins'),
-    ('AI-Tortel', 'Tortel'),
-    ('AI-Chile-Chico', 'Chile Chico'),
-    ('AI-Rio-Ibanez', 'Río Ibáñez'),
-    
-    # Región de Magallanes y de la Antártica Chilena
-    ('MA-Punta-Arenas', 'Punta Arenas'),
-    ('MA-Laguna-Blanca', 'Laguna Blanca'),
-    ('MA-Rio-Verde', 'Río Verde'),
-    ('MA-San-Gregorio', 'San Gregorio'),
-    ('MA-Cabo-de-Hornos', 'Cabo de Hornos'),
-    ('MA-Antartica', 'Antártica'),
-    ('MA-Porvenir', 'Porvenir'),
-    ('MA-Primavera', 'Primavera'),
-    ('MA-Timaukel', 'Timaukel'),
-    ('MA-Natales', 'Natales'),
-    ('MA-Torres-del-Paine', 'Torres del Paine'),
-]
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._valores_cargados = dict(zip(field_names, values))
+        return instancia
 
-# Mapeo de regiones por país
-REGIONES_POR_PAIS = {
-    'CL': [
-        ('CL-AP', 'Región de Arica y Parinacota'),
-        ('CL-TA', 'Región de Tarapacá'),
-        ('CL-AN', 'Región de Antofagasta'),
-        ('CL-AT', 'Región de Atacama'),
-        ('CL-CO', 'Región de Coquimbo'),
-        ('CL-VS', 'Región de Valparaíso'),
-        ('CL-RM', 'Región Metropolitana de Santiago'),
-        ('CL-LI', 'Región del Libertador General Bernardo O\'Higgins'),
-        ('CL-ML', 'Región del Maule'),
-        ('CL-NB', 'Región de Ñuble'),
-        ('CL-BI', 'Región del Biobío'),
-        ('CL-AR', 'Región de La Araucanía'),
-        ('CL-LR', 'Región de Los Ríos'),
-        ('CL-LL', 'Región de Los Lagos'),
-        ('CL-AI', 'Región Aysén del General Carlos Ibáñez del Campo'),
-        ('CL-MA', 'Región de Magallanes y de la Antártica Chilena'),
-    ],
-}
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Las señales post_save ya compararon contra lo leído; ahora lo guardado es lo vigente
+        guardados = kwargs.get('update_fields')
+        valores = getattr(self, '_valores_cargados', {})
+        for campo in self._meta.concrete_fields:
+            if campo.attname in self.__dict__ and (guardados is None or campo.name in guardados):
+                valores[campo.attname] = self.__dict__[campo.attname]
+        self._valores_cargados = valores
 
-# Mapeo de comunas por región
-COMUNAS_POR_REGION = {
-    'CL-AP': [
-        ('AP-Arica', 'Arica'),
-        ('AP-Camarones', 'Camarones'),
-        ('AP-Putre', 'Putre'),
-        ('AP-General-Lagos', 'General Lagos'),
-    ],
-    'CL-TA': [
-        ('TA-Iquique', 'Iquique'),
-        ('TA-Alto-Hospicio', 'Alto Hospicio'),
-        ('TA-Pozo-Almonte', 'Pozo Almonte'),
-        ('TA-Camina', 'Camiña'),
-        ('TA-Colchane', 'Colchane'),
-        ('TA-Huara', 'Huara'),
-        ('TA-Pica', 'Pica'),
-    ],
-    'CL-AN': [
-        ('AN-Antofagasta', 'Antofagasta'),
-        ('AN-Mejillones', 'Mejillones'),
-        ('AN-Sierra-Gorda', 'Sierra Gorda'),
-        ('AN-Taltal', 'Taltal'),
-        ('AN-Calama', 'Calama'),
-        ('AN-Ollague', 'Ollagüe'),
-        ('AN-San-Pedro-de-Atacama', 'San Pedro de Atacama'),
-        ('AN-Tocopilla', 'Tocopilla'),
-        ('AN-Maria-Elena', 'María Elena'),
-    ],
-    'CL-AT': [
-        ('AT-Copiapo', 'Copiapó'),
-        ('AT-Caldera', 'Caldera'),
-        ('AT-Tierra-Amarilla', 'Tierra Amarilla'),
-        ('AT-Chanaral', 'Chañaral'),
-        ('AT-Diego-de-Almagro', 'Diego de Almagro'),
-        ('AT-Vallenar', 'Vallenar'),
-        ('AT-Alto-del-Carmen', 'Alto del Carmen'),
-        ('AT-Freirina', 'Freirina'),
-        ('AT-Huasco', 'Huasco'),
-    ],
-    'CL-CO': [
-        ('CO-La-Serena', 'La Serena'),
-        ('CO-Coquimbo', 'Coquimbo'),
-        ('CO-Andacollo', 'Andacollo'),
-        ('CO-La-Higuera', 'La Higuera'),
-        ('CO-Paihuano', 'Paiguano'),
-        ('CO-Vicuna', 'Vicuña'),
-        ('CO-Illapel', 'Illapel'),
-        ('CO-Canela', 'Canela'),
-        ('CO-Los-Vilos', 'Los Vilos'),
-        ('CO-Salamanca', 'Salamanca'),
-        ('CO-Ovalle', 'Ovalle'),
-        ('CO-Combarbala', 'Combarbalá'),
-        ('CO-Monte-Patria', 'Monte Patria'),
-        ('CO-Punitaqui', 'Punitaqui'),
-        ('CO-Rio-Hurtado', 'Río Hurtado'),
-    ],
-    'CL-VS': [
-        ('VS-Valparaiso', 'Valparaíso'),
-        ('VS-Casablanca', 'Casablanca'),
-        ('VS-Concon', 'Concón'),
-        ('VS-Juan-Fernandez', 'Juan Fernández'),
-        ('VS-Puchuncavi', 'Puchuncaví'),
-        ('VS-Quintero', 'Quintero'),
-        ('VS-Vina-del-Mar', 'Viña del Mar'),
-        ('VS-Isla-de-Pascua', 'Isla de Pascua'),
-        ('VS-Los-Andes', 'Los Andes'),
-        ('VS-Calle-Larga', 'Calle Larga'),
-        ('VS-Rinconada', 'Rinconada'),
-        ('VS-San-Esteban', 'San Esteban'),
-        ('VS-La-Ligua', 'La Ligua'),
-        ('VS-Cabildo', 'Cabildo'),
-        ('VS-Papudo', 'Papudo'),
-        ('VS-Petorca', 'Petorca'),
-        ('VS-Zapallar', 'Zapallar'),
-        ('VS-Quillota', 'Quillota'),
-        ('VS-Calera', 'Calera'),
-        ('VS-Hijuelas', 'Hijuelas'),
-        ('VS-La-Cruz', 'La Cruz'),
-        ('VS-Nogales', 'Nogales'),
-        ('VS-San-Antonio', 'San Antonio'),
-        ('VS-Algarrobo', 'Algarrobo'),
-        ('VS-Cartagena', 'Cartagena'),
-        ('VS-El-Quisco', 'El Quisco'),
-        ('VS-El-Tabo', 'El Tabo'),
-        ('VS-Santo-Domingo', 'Santo Domingo'),
-        ('VS-San-Felipe', 'San Felipe'),
-        ('VS-Catemu', 'Catemu'),
-        ('VS-Llaillay', 'Llaillay'),
-        ('VS-Panquehue', 'Panquehue'),
-        ('VS-Putaendo', 'Putaendo'),
-        ('VS-Santa-Maria', 'Santa María'),
-        ('VS-Quilpue', 'Quilpué'),
-        ('VS-Limache', 'Limache'),
-        ('VS-Olmue', 'Olmué'),
-        ('VS-Villa-Alemana', 'Villa Alemana'),
-    ],
-    'CL-RM': [
-        ('RM-Santiago', 'Santiago'),
-        ('RM-Cerrillos', 'Cerrillos'),
-        ('RM-Cerro-Navia', 'Cerro Navia'),
-        ('RM-Conchali', 'Conchalí'),
-        ('RM-El-Bosque', 'El Bosque'),
-        ('RM-Estacion-Central', 'Estación Central'),
-        ('RM-Huechuraba', 'Huechuraba'),
-        ('RM-Independencia', 'Independencia'),
-        ('RM-La-Cisterna', 'La Cisterna'),
-        ('RM-La-Florida', 'La Florida'),
-        ('RM-La-Granja', 'La Granja'),
-        ('RM-La-Pintana', 'La Pintana'),
-        ('RM-La-Reina', 'La Reina'),
-        ('RM-Las-Condes', 'Las Condes'),
-        ('RM-Lo-Barnechea', 'Lo Barnechea'),
-        ('RM-Lo-Espejo', 'Lo Espejo'),
-        ('RM-Lo-Prado', 'Lo Prado'),
-        ('RM-Macul', 'Macul'),
-        ('RM-Maipu', 'Maipú'),
-        ('RM-Nunoa', 'Ñuñoa'),
-        ('RM-Pedro-Aguirre-Cerda', 'Pedro Aguirre Cerda'),
-        ('RM-Penalolen', 'Peñalolén'),
-        ('RM-Providencia', 'Providencia'),
-        ('RM-Pudahuel', 'Pudahuel'),
-        ('RM-Quilicura', 'Quilicura'),
-        ('RM-Quinta-Normal', 'Quinta Normal'),
-        ('RM-Recoleta', 'Recoleta'),
-        ('RM-Renca', 'Renca'),
-        ('RM-San-Joaquin', 'San Joaquín'),
-        ('RM-San-Miguel', 'San Miguel'),
-        ('RM-San-Ramon', 'San Ramón'),
-        ('RM-Vitacura', 'Vitacura'),
-        ('RM-Puente-Alto', 'Puente Alto'),
-        ('RM-Pirque', 'Pirque'),
-        ('RM-San-Jose-de-Maipo', 'San José de Maipo'),
-        ('RM-Colina', 'Colina'),
-        ('RM-Lampa', 'Lampa'),
-        ('RM-Tiltil', 'Tiltil'),
-        ('RM-San-Bernardo', 'San Bernardo'),
-        ('RM-Buin', 'Buin'),
-        ('RM-Calera-de-Tango', 'Calera de Tango'),
-        ('RM-Paine', 'Paine'),
-        ('RM-Melipilla', 'Melipilla'),
-        ('RM-Alhue', 'Alhué'),
-        ('RM-Curacavi', 'Curacaví'),
-        ('RM-Maria-Pinto', 'María Pinto'),
-        ('RM-San-Pedro', 'San Pedro'),
-        ('RM-Talagante', 'Talagante'),
-        ('RM-El-Monte', 'El Monte'),
-        ('RM-Isla-de-Maipo', 'Isla de Maipo'),
-        ('RM-Padre-Hurtado', 'Padre Hurtado'),
-        ('RM-Penaflor', 'Peñaflor'),
-    ],
-    'CL-LI': [
-        ('LI-Rancagua', 'Rancagua'),
-        ('LI-Codegua', 'Codegua'),
-        ('LI-Coinco', 'Coinco'),
-        ('LI-Coltauco', 'Coltauco'),
-        ('LI-Donihue', 'Doñihue'),
-        ('LI-Graneros', 'Graneros'),
-        ('LI-Las-Cabras', 'Las Cabras'),
-        ('LI-Machali', 'Machalí'),
-        ('LI-Malloa', 'Malloa'),
-        ('LI-Mostazal', 'Mostazal'),
-        ('LI-Olivar', 'Olivar'),
-        ('LI-Peumo', 'Peumo'),
-        ('LI-Pichidegua', 'Pichidegua'),
-        ('LI-Quinta-de-Tilcoco', 'Quinta de Tilcoco'),
-        ('LI-Rengo', 'Rengo'),
-        ('LI-Requinoa', 'Requínoa'),
-        ('LI-San-Vicente', 'San Vicente'),
-        ('LI-Pichilemu', 'Pichilemu'),
-        ('LI-La-Estrella', 'La Estrella'),
-        ('LI-Litueche', 'Litueche'),
-        ('LI-Marchihue', 'Marchihue'),
-        ('LI-Navidad', 'Navidad'),
-        ('LI-Paredones', 'Paredones'),
-        ('LI-San-Fernando', 'San Fernando'),
-        ('LI-Chepica', 'Chépica'),
-        ('LI-Chimbarongo', 'Chimbarongo'),
-        ('LI-Lolol', 'Lolol'),
-        ('LI-Nancagua', 'Nancagua'),
-        ('LI-Palmilla', 'Palmilla'),
-        ('LI-Peralillo', 'Peralillo'),
-        ('LI-Placilla', 'Placilla'),
-        ('LI-Pumanque', 'Pumanque'),
-        ('LI-Santa-Cruz', 'Santa Cruz'),
-    ],
-    'CL-ML': [
-        ('ML-Talca', 'Talca'),
-        ('ML-Constitucion', 'Constitución'),
-        ('ML-Curepto', 'Curepto'),
-        ('ML-Empedrado', 'Empedrado'),
-        ('ML-Maule', 'Maule'),
-        ('ML-Pelarco', 'Pelarco'),
-        ('ML-Pencahue', 'Pencahue'),
-        ('ML-Rio-Claro', 'Río Claro'),
-        ('ML-San-Clemente', 'San Clemente'),
-        ('ML-San-Rafael', 'San Rafael'),
-        ('ML-Cauquenes', 'Cauquenes'),
-        ('ML-Chanco', 'Chanco'),
-        ('ML-Pelluhue', 'Pelluhue'),
-        ('ML-Curico', 'Curicó'),
-        ('ML-Hualane', 'Hualañé'),
-        ('ML-Licanten', 'Licantén'),
-        ('ML-Molina', 'Molina'),
-        ('ML-Rauco', 'Rauco'),
-        ('ML-Romeral', 'Romeral'),
-        ('ML-Sagrada-Familia', 'Sagrada Familia'),
-        ('ML-Teno', 'Teno'),
-        ('ML-Vichuquen', 'Vichuquén'),
-        ('ML-Linares', 'Linares'),
-        ('ML-Colbun', 'Colbún'),
-        ('ML-Longavi', 'Longaví'),
-        ('ML-Parral', 'Parral'),
-        ('ML-Retiro', 'Retiro'),
-        ('ML-San-Javier', 'San Javier'),
-        ('ML-Villa-Alegre', 'Villa Alegre'),
-        ('ML-Yerbas-Buenas', 'Yerbas Buenas'),
-    ],
-    'CL-NB': [
-        ('NB-Chillan', 'Chillán'),
-        ('NB-Bulnes', 'Bulnes'),
-        ('NB-Cobquecura', 'Cobquecura'),
-        ('NB-Coelemu', 'Coelemu'),
-        ('NB-Coihueco', 'Coihueco'),
-        ('NB-Chillan-Viejo', 'Chillán Viejo'),
-        ('NB-El-Carmen', 'El Carmen'),
-        ('NB-Ninhue', 'Ninhue'),
-        ('NB-Niquen', 'Ñiquén'),
-        ('NB-Pemuco', 'Pemuco'),
-        ('NB-Pinto', 'Pinto'),
-        ('NB-Portezuelo', 'Portezuelo'),
-        ('NB-Quillon', 'Quillón'),
-        ('NB-Quirihue', 'Quirihue'),
-        ('NB-Ranquil', 'Ránquil'),
-        ('NB-San-Carlos', 'San Carlos'),
-        ('NB-San-Fabian', 'San Fabián'),
-        ('NB-San-Ignacio', 'San Ignacio'),
-        ('NB-San-Nicolas', 'San Nicolás'),
-        ('NB-Trehuaco', 'Trehuaco'),
-        ('NB-Yungay', 'Yungay'),
-    ],
-    'CL-BI': [
-        ('BI-Concepcion', 'Concepción'),
-        ('BI-Coronel', 'Coronel'),
-        ('BI-Chiguayante', 'Chiguayante'),
-        ('BI-Florida', 'Florida'),
-        ('BI-Hualqui', 'Hualqui'),
-        ('BI-Lota', 'Lota'),
-        ('BI-Penco', 'Penco'),
-        ('BI-San-Pedro-de-la-Paz', 'San Pedro de la Paz'),
-        ('BI-Santa-Juana', 'Santa Juana'),
-        ('BI-Talcahuano', 'Talcahuano'),
-        ('BI-Tome', 'Tomé'),
-        ('BI-Hualpen', 'Hualpén'),
-        ('BI-Lebu', 'Lebu'),
-        ('BI-Arauco', 'Arauco'),
-        ('BI-Canete', 'Cañete'),
-        ('BI-Contulmo', 'Contulmo'),
-        ('BI-Curanilahue', 'Curanilahue'),
-        ('BI-Los-Alamos', 'Los Álamos'),
-        ('BI-Tirua', 'Tirúa'),
-        ('BI-Los-Angeles', 'Los Ángeles'),
-        ('BI-Antuco', 'Antuco'),
-        ('BI-Cabrero', 'Cabrero'),
-        ('BI-Laja', 'Laja'),
-        ('BI-Mulchen', 'Mulchén'),
-        ('BI-Nacimiento', 'Nacimiento'),
-        ('BI-Negrete', 'Negrete'),
-        ('BI-Quilaco', 'Quilaco'),
-        ('BI-Quilleco', 'Quilleco'),
-        ('BI-San-Rosendo', 'San Rosendo'),
-        ('BI-Santa-Barbara', 'Santa Bárbara'),
-        ('BI-Tucapel', 'Tucapel'),
-        ('BI-Yumbel', 'Yumbel'),
-        ('BI-Alto-Biobio', 'Alto Biobío'),
-    ],
-    'CL-AR': [
-        ('AR-Temuco', 'Temuco'),
-        ('AR-Carahue', 'Carahue'),
-        ('AR-Cunco', 'Cunco'),
-        ('AR-Curarrehue', 'Curarrehue'),
-        ('AR-Freire', 'Freire'),
-        ('AR-Galvarino', 'Galvarino'),
-        ('AR-Gorbea', 'Gorbea'),
-        ('AR-Lautaro', 'Lautaro'),
-        ('AR-Loncoche', 'Loncoche'),
-        ('AR-Melipeuco', 'Melipeuco'),
-        ('AR-Nueva-Imperial', 'Nueva Imperial'),
-        ('AR-Padre-Las-Casas', 'Padre Las Casas'),
-        ('AR-Perquenco', 'Perquenco'),
-        ('AR-Pitrufquen', 'Pitrufquén'),
-        ('AR-Pucon', 'Pucón'),
-        ('AR-Saavedra', 'Saavedra'),
-        ('AR-Teodoro-Schmidt', 'Teodoro Schmidt'),
-        ('AR-Tolten', 'Toltén'),
-        ('AR-Vilcun', 'Vilcún'),
-        ('AR-Villarrica', 'Villarrica'),
-        ('AR-Cholchol', 'Cholchol'),
-        ('AR-Angol', 'Angol'),
-        ('AR-Collipulli', 'Collipulli'),
-        ('AR-Curacautin', 'Curacautín'),
-        ('AR-Ercilla', 'Ercilla'),
-        ('AR-Lonquimay', 'Lonquimay'),
-        ('AR-Los-Sauces', 'Los Sauces'),
-        ('AR-Lumaco', 'Lumaco'),
-        ('AR-Puren', 'Purén'),
-        ('AR-Renaico', 'Renaico'),
-        ('AR-Traiguen', 'Traiguén'),
-        ('AR-Victoria', 'Victoria'),
-    ],
-    'CL-LR': [
-        ('LR-Valdivia', 'Valdivia'),
-        ('LR-Corral', 'Corral'),
-        ('LR-Lanco', 'Lanco'),
-        ('LR-Los-Lagos', 'Los Lagos'),
-        ('LR-Mafil', 'Máfil'),
-        ('LR-Mariquina', 'Mariquina'),
-        ('LR-Paillaco', 'Paillaco'),
-        ('LR-Panguipulli', 'Panguipulli'),
-        ('LR-La-Union', 'La Unión'),
-        ('LR-Futrono', 'Futrono'),
-        ('LR-Lago-Ranco', 'Lago Ranco'),
-        ('LR-Rio-Bueno', 'Río Bueno'),
-    ],
-    'CL-LL': [
-        ('LL-Puerto-Montt', 'Puerto Montt'),
-        ('LL-Calbuco', 'Calbuco'),
-        ('LL-Cochamo', 'Cochamó'),
-        ('LL-Fresia', 'Fresia'),
-        ('LL-Frutillar', 'Frutillar'),
-        ('LL-Los-Muermos', 'Los Muermos'),
-        ('LL-Llanquihue', 'Llanquihue'),
-        ('LL-Maullin', 'Maullín'),
-        ('LL-Puerto-Varas', 'Puerto Varas'),
-        ('LL-Castro', 'Castro'),
-        ('LL-Ancud', 'Ancud'),
-        ('LL-Chonchi', 'Chonchi'),
-        ('LL-Curaco-de-Velez', 'Curaco de Vélez'),
-        ('LL-Dalcahue', 'Dalcahue'),
-        ('LL-Puqueldon', 'Puqueldón'),
-        ('LL-Queilen', 'Queilén'),
-        ('LL-Quellon', 'Quellón'),
-        ('LL-Quemalchi', 'Quemchi'),
-        ('LL-Quinchao', 'Quinchao'),
-        ('LL-Osorno', 'Osorno'),
-        ('LL-Puerto-Octay', 'Puerto Octay'),
-        ('LL-Purranque', 'Purranque'),
-        ('LL-Puyehue', 'Puyehue'),
-        ('LL-Rio-Negro', 'Río Negro'),
-        ('LL-San-Juan-de-la-Costa', 'San Juan de la Costa'),
-        ('LL-San-Pablo', 'San Pablo'),
-        ('LL-Chaiten', 'Chaitén'),
-        ('LL-Futaleufu', 'Futaleufú'),
-        ('LL-Hualaihue', 'Hualaihué'),
-        ('LL-Palena', 'Palena'),
-    ],
-    'CL-AI': [
-        ('AI-Coyhaique', 'Coyhaique'),
-        ('AI-Lago-Verde', 'Lago Verde'),
-        ('AI-Aysen', 'Aysén'),
-        ('AI-Cisnes', 'Cisnes'),
-        ('AI-Guaitecas', 'Guaitecas'),
-        ('AI-Cochrane', 'Cochrane'),
-        ('AI-OHiggins', 'O\'Higgins'),
-        ('AI-Tortel', 'Tortel'),
-        ('AI-Chile-Chico', 'Chile Chico'),
-        ('AI-Rio-Ibanez', 'Río Ibáñez'),
-    ],
-    'CL-MA': [
-        ('MA-Punta-Arenas', 'Punta Arenas'),
-        ('MA-Laguna-Blanca', 'Laguna Blanca'),
-        ('MA-Rio-Verde', 'Río Verde'),
-        ('MA-San-Gregorio', 'San Gregorio'),
-        ('MA-Cabo-de-Hornos', 'Cabo de Hornos'),
-        ('MA-Antartica', 'Antártica'),
-        ('MA-Porvenir', 'Porvenir'),
-        ('MA-Primavera', 'Primavera'),
-        ('MA-Timaukel', 'Timaukel'),
-        ('MA-Natales', 'Natales'),
-        ('MA-Torres-del-Paine', 'Torres del Paine'),
-    ],
-}
+    def campos_cambiados(self, campos):
+        """
+        Los de `campos` cuyo valor en memoria difiere del leído de la base de
+        datos. Una instancia que no se leyó de la base de datos los tiene todos.
+        """
+        cargados = getattr(self, '_valores_cargados', None)
+        if cargados is None:
+            return set(campos)
+        return {
+            campo for campo in campos
+            if campo in self.__dict__ and cargados.get(campo, models.DEFERRED) != self.__dict__[campo]
+        }
 
-# ==================== MODELOS ====================
 
 class CategoriaProveedor(models.Model):
     nombre = models.CharField(max_length=100)
@@ -835,7 +69,7 @@ class CategoriaProveedor(models.Model):
         return self.nombre
 
 
-class Proveedor(models.Model):
+class Proveedor(ValoresCargadosMixin, models.Model):
     # ✅ AUTENTICACIÓN PROPIA
     email = models.EmailField(unique=True, verbose_name='Correo electrónico')
     password_hash = models.CharField(max_length=128, verbose_name='Contraseña')
@@ -847,17 +81,19 @@ class Proveedor(models.Model):
     
     # Foto/Logo
     foto = models.ImageField(upload_to='proveedores/', blank=True, null=True, verbose_name='Logo/Foto')
+    foto_variantes = models.JSONField(default=dict, blank=True, editable=False)
     
     # Categorías (un proveedor puede ofrecer múltiples rubros)
     categorias = models.ManyToManyField(CategoriaProveedor, related_name='proveedores', blank=True, verbose_name='Rubros que oferta')
     
     # Ubicación geográfica (ahora como CHOICES)
     pais = models.CharField(max_length=2, choices=PAISES_CHOICES, blank=True, null=True, verbose_name='País')
-    region = models.CharField(max_length=10, blank=True, null=True, verbose_name='Región')
-    comuna = models.CharField(max_length=50, blank=True, null=True, verbose_name='Comuna')
+    region = models.CharField(max_length=10, blank=True, null=True, db_index=True, verbose_name='Región')
+    comuna = models.CharField(max_length=50, blank=True, null=True, db_index=True, verbose_name='Comuna')
     direccion = models.CharField(max_length=255, blank=True, null=True, verbose_name='Dirección')
 
     foto_perfil = models.ImageField(upload_to='proveedores/fotos/', blank=True, null=True)
+    foto_perfil_variantes = models.JSONField(default=dict, blank=True, editable=False)
     modo_oscuro = models.BooleanField(default=False)
     notif_email = models.BooleanField(default=True)
     notif_mensajes = models.BooleanField(default=True)
@@ -875,7 +111,7 @@ class Proveedor(models.Model):
         ('nacional', 'Nacional'),
         ('internacional', 'Internacional'),
     ]
-    cobertura = models.CharField(max_length=20, choices=COBERTURA_CHOICES, default='local', verbose_name='Zona geográfica')
+    cobertura = models.CharField(max_length=20, choices=COBERTURA_CHOICES, default='local', db_index=True, verbose_name='Zona geográfica')
     
     # Datos de contacto
     telefono_regex = RegexValidator(
@@ -897,6 +133,9 @@ class Proveedor(models.Model):
     verificado = models.BooleanField(default=False, verbose_name='Proveedor verificado')
     destacado = models.BooleanField(default=False, verbose_name='Proveedor destacado')
     
+    # Orden del directorio: lo calcula proveedor.ranking (no se edita a mano)
+    ranking_score = models.FloatField(default=0, editable=False, verbose_name='Puntaje de ranking')
+    
     # Estadísticas
     visitas = models.IntegerField(default=0)
     contactos_enviados = models.IntegerField(default=0, verbose_name='Solicitudes de contacto enviadas')
@@ -923,28 +162,24 @@ class Proveedor(models.Model):
     
     def get_pais_display_name(self):
         """Retorna el nombre completo del país"""
-        for codigo, nombre in PAISES_CHOICES:
-            if codigo == self.pais:
-                return nombre
-        return self.pais
+        return nombre_pais(self.pais)
     
     def get_region_display_name(self):
         """Retorna el nombre completo de la región"""
-        for codigo, nombre in REGIONES_CHOICES:
-            if codigo == self.region:
-                return nombre
-        return self.region
+        return nombre_region(self.region)
     
     def get_comuna_display_name(self):
         """Retorna el nombre completo de la comuna"""
-        for codigo, nombre in COMUNAS_CHOICES:
-            if codigo == self.comuna:
-                return nombre
-        return self.comuna
+        return nombre_comuna(self.comuna)
     
     def incrementar_visitas(self):
-        self.visitas += 1
-        self.save(update_fields=['visitas'])
+        """
+        Registra una visita en el buffer de proveedor.contadores (se vuelca en
+        lote con F('visitas') + n); solo la instancia en memoria suma la visita.
+        """
+        from .contadores import registrar_visita
+        registrar_visita(self.pk)
+        self.visitas = (self.visitas or 0) + 1
     
     def tasa_aceptacion(self):
         """Calcula el porcentaje de contactos aceptados"""
@@ -952,16 +187,94 @@ class Proveedor(models.Model):
             return (self.contactos_aceptados / self.contactos_enviados) * 100
         return 0
     
-    def get_region_display_name(self):
-        """Obtiene el nombre legible de la región"""
-        for codigo, nombre in REGIONES_CHOICES:
-            if codigo == self.region:
-                return nombre
-        return self.region
-    
     class Meta:
         verbose_name = 'Proveedor'
         verbose_name_plural = 'Proveedores'
+        indexes = [
+            # Directorio: WHERE activo ORDER BY ranking_score DESC
+            models.Index(fields=['activo', '-ranking_score'], name='proveedor_ranking_idx'),
+        ]
+
+
+class EstadisticaDiariaProveedor(models.Model):
+    """
+    Resumen diario de actividad de un proveedor (una fila por proveedor y día).
+    Lo alimenta proveedor.contadores; el dashboard lee estas filas en vez de
+    recorrer eventos sueltos.
+    """
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='estadisticas_diarias')
+    fecha = models.DateField()
+    visitas = models.PositiveIntegerField(default=0)
+    contactos_enviados = models.PositiveIntegerField(default=0)
+    contactos_aceptados = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'estadistica_diaria_proveedor'
+        verbose_name = 'Estadística Diaria de Proveedor'
+        verbose_name_plural = 'Estadísticas Diarias de Proveedores'
+        unique_together = ['proveedor', 'fecha']
+        ordering = ['fecha']
+
+    def __str__(self):
+        return f"{self.proveedor_id} - {self.fecha}"
+
+
+class DocumentoBusqueda(models.Model):
+    """
+    Texto normalizado (minúsculas, sin tildes) con el nombre, descripción,
+    rubros y productos activos del proveedor. En MySQL tiene un índice
+    FULLTEXT; lo mantiene proveedor.indice_texto.
+    """
+    proveedor = models.OneToOneField(Proveedor, on_delete=models.CASCADE, related_name='documento_busqueda')
+    documento = models.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'busqueda_documento_proveedor'
+        verbose_name = 'Documento de Búsqueda'
+        verbose_name_plural = 'Documentos de Búsqueda'
+
+    def __str__(self):
+        return f"{self.proveedor_id}"
+
+
+class TerminoBusqueda(models.Model):
+    """
+    Índice invertido de respaldo (motores sin FULLTEXT): una fila por término
+    de cada proveedor, con un peso según dónde aparece.
+    """
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='terminos_busqueda')
+    termino = models.CharField(max_length=64, db_index=True)
+    peso = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        db_table = 'busqueda_termino_proveedor'
+        verbose_name = 'Término de Búsqueda'
+        verbose_name_plural = 'Términos de Búsqueda'
+        unique_together = ['proveedor', 'termino']
+
+    def __str__(self):
+        return f"{self.termino} ({self.proveedor_id})"
+
+
+class CambioAutocompletar(models.Model):
+    """
+    Registro de altas, cambios y bajas del índice de autocompletar: cada
+    proceso lee las filas nuevas y las aplica a su índice en memoria (ver
+    proveedor.autocompletar). Un nombre vacío es una baja.
+    """
+    tipo = models.CharField(max_length=20)
+    objeto_id = models.PositiveIntegerField()
+    nombre = models.CharField(max_length=200, blank=True, default='')
+    id_proveedor = models.PositiveIntegerField(blank=True, null=True)
+    fecha = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'autocompletar_cambio'
+        verbose_name = 'Cambio de Autocompletar'
+        verbose_name_plural = 'Cambios de Autocompletar'
+
+    def __str__(self):
+        return f"{self.tipo} {self.objeto_id}"
 
 
 class SolicitudContacto(models.Model):
@@ -998,6 +311,9 @@ class SolicitudContacto(models.Model):
         
         self.proveedor.contactos_aceptados += 1
         self.proveedor.save(update_fields=['contactos_aceptados'])
+        
+        from .contadores import registrar_contacto
+        registrar_contacto(self.proveedor_id, 'contactos_aceptados')
     
     def rechazar(self):
         self.estado = 'rechazada'
@@ -1018,10 +334,13 @@ class ProductoServicio(models.Model):
     )
     
     proveedor = models.ForeignKey('Proveedor', on_delete=models.CASCADE, related_name='productos_servicios')
+    # Código propio del proveedor; identifica el producto en las importaciones masivas
+    sku = models.CharField(max_length=64, blank=True, null=True, verbose_name='SKU')
     nombre = models.CharField(max_length=200)
     descripcion = models.TextField()
     precio_referencia = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     imagen = models.ImageField(upload_to='productos/', blank=True, null=True)
+    imagen_variantes = models.JSONField(default=dict, blank=True, editable=False)
     activo = models.BooleanField(default=True)
     destacado = models.BooleanField(default=False)
     categoria = models.CharField(
@@ -1038,6 +357,7 @@ class ProductoServicio(models.Model):
         db_table = 'producto_servicio'
         verbose_name = 'Producto/Servicio'
         verbose_name_plural = 'Productos/Servicios'
+        unique_together = ['proveedor', 'sku']
     
     def __str__(self):
         return f"{self.nombre} - {self.proveedor.nombre_empresa}"
@@ -1049,6 +369,7 @@ class Promocion(models.Model):
     titulo = models.CharField(max_length=200)
     descripcion = models.TextField()
     imagen = models.ImageField(upload_to='promociones/', blank=True, null=True)
+    imagen_variantes = models.JSONField(default=dict, blank=True, editable=False)
     
     fecha_inicio = models.DateField()
     fecha_fin = models.DateField()
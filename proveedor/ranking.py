@@ -0,0 +1,144 @@
+# proveedor/ranking.py
+"""
+Puntaje de ranking del directorio de proveedores (Proveedor.ranking_score).
+
+El puntaje combina lo que hace útil a un proveedor para un comerciante:
+si es destacado o verificado, su tasa de aceptación de contactos, sus
+visitas, qué tan completo está su perfil y si tiene promociones vigentes.
+Calcularlo en cada request sería caro (conteos de productos, promociones y
+rubros por proveedor), así que se guarda en una columna indexada y el
+directorio ordena con un solo ORDER BY ranking_score.
+
+Se recalcula de forma incremental cuando cambia alguno de sus datos (ver
+proveedor/signals.py y proveedor.contadores) y completo con el comando
+`recalcular_ranking_proveedores`, que además recoge el inicio y fin de las
+promociones (cambian con la fecha, sin que nada se guarde).
+"""
+import math
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ProductoServicio, Promocion, Proveedor
+
+# Puntos máximos de cada componente. Destacado pesa más que todo lo demás
+# junto para que los destacados sigan arriba.
+PESOS_RANKING = {
+    'destacado': 100,
+    'verificado': 20,
+    'aceptacion': 20,
+    'visitas': 15,
+    'perfil': 15,
+    'promociones': 10,
+}
+
+# Tasa de aceptación suavizada: un proveedor sin historial parte del 50%
+ACEPTACION_PREVIA = (1, 2)  # (aceptados, enviados) ficticios
+
+# Con esta cantidad de visitas se obtiene el puntaje completo (escala logarítmica)
+VISITAS_REFERENCIA = 1000
+
+LARGO_DESCRIPCION_COMPLETA = 80
+
+# Campos de Proveedor que entran al cálculo
+CAMPOS_RANKING = {
+    'destacado', 'verificado', 'visitas', 'contactos_enviados', 'contactos_aceptados',
+    'descripcion', 'foto_perfil', 'telefono', 'sitio_web', 'facebook', 'instagram', 'linkedin',
+    'direccion', 'region', 'comuna',
+}
+
+
+def completitud_perfil(datos):
+    """Fracción (0 a 1) de los datos del perfil que el proveedor completó."""
+    partes = [
+        bool(datos['foto_perfil']),
+        len(datos['descripcion'] or '') >= LARGO_DESCRIPCION_COMPLETA,
+        bool(datos['telefono']),
+        bool(datos['sitio_web'] or datos['facebook'] or datos['instagram'] or datos['linkedin']),
+        bool(datos['direccion']),
+        bool(datos['region'] and datos['comuna']),
+        datos['total_categorias'] > 0,
+        datos['productos_activos'] > 0,
+    ]
+    return sum(partes) / len(partes)
+
+
+def calcular_puntaje(datos):
+    """
+    Puntaje a partir de un dict con los CAMPOS_RANKING y los conteos
+    total_categorias, productos_activos y promociones_vigentes.
+    """
+    aceptados_previos, enviados_previos = ACEPTACION_PREVIA
+    aceptacion = (datos['contactos_aceptados'] + aceptados_previos) / (datos['contactos_enviados'] + enviados_previos)
+    visitas = min(math.log1p(max(datos['visitas'], 0)) / math.log1p(VISITAS_REFERENCIA), 1)
+
+    puntaje = (
+        PESOS_RANKING['destacado'] * datos['destacado']
+        + PESOS_RANKING['verificado'] * datos['verificado']
+        + PESOS_RANKING['aceptacion'] * min(aceptacion, 1)
+        + PESOS_RANKING['visitas'] * visitas
+        + PESOS_RANKING['perfil'] * completitud_perfil(datos)
+        + PESOS_RANKING['promociones'] * (datos['promociones_vigentes'] > 0)
+    )
+    return round(puntaje, 4)
+
+
+def _conteo(queryset):
+    """Subconsulta con la cantidad de filas de `queryset` por proveedor (0 si no hay)."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(proveedor=OuterRef('pk'))
+            .order_by()
+            .values('proveedor')
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def _datos_ranking(proveedores):
+    hoy = timezone.localdate()
+    return proveedores.annotate(
+        total_categorias=_conteo(Proveedor.categorias.through.objects.all()),
+        productos_activos=_conteo(ProductoServicio.objects.filter(activo=True)),
+        promociones_vigentes=_conteo(Promocion.objects.filter(
+            activo=True, fecha_inicio__lte=hoy, fecha_fin__gte=hoy,
+        )),
+    ).values('id', 'ranking_score', *CAMPOS_RANKING, 'total_categorias', 'productos_activos', 'promociones_vigentes')
+
+
+def _guardar_puntajes(filas):
+    """Calcula el puntaje de cada fila y guarda los que cambiaron (un UPDATE)."""
+    actualizar = []
+    for datos in filas:
+        puntaje = calcular_puntaje(datos)
+        if puntaje != datos['ranking_score']:
+            actualizar.append(Proveedor(id=datos['id'], ranking_score=puntaje))
+    if actualizar:
+        Proveedor.objects.bulk_update(actualizar, ['ranking_score'])
+    return len(actualizar)
+
+
+def recalcular_puntajes(ids=None, lote=500):
+    """
+    Recalcula ranking_score de los proveedores `ids` (o de todos, paginando
+    por id) y guarda solo los que cambiaron. Retorna cuántos cambiaron.
+    """
+    proveedores = Proveedor.objects.order_by('id')
+    cambiados = 0
+    if ids is not None:
+        ids = sorted(set(ids))
+        for i in range(0, len(ids), lote):
+            cambiados += _guardar_puntajes(_datos_ranking(proveedores.filter(id__in=ids[i:i + lote])))
+        return cambiados
+
+    ultimo_id = 0
+    while True:
+        pagina = list(_datos_ranking(proveedores.filter(id__gt=ultimo_id))[:lote])
+        if not pagina:
+            return cambiados
+        cambiados += _guardar_puntajes(pagina)
+        ultimo_id = pagina[-1]['id']
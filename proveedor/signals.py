@@ -0,0 +1,124 @@
+# proveedor/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import autocompletar, indice_texto
+from .estadisticas import invalidar_estadisticas
+from .ranking import CAMPOS_RANKING, recalcular_puntajes
+from .busqueda import CAMPOS_FACETADOS, invalidar_facetas
+from .models import CategoriaProveedor, ProductoServicio, Promocion, Proveedor, SolicitudContacto
+
+# Campos cuyo texto entra al índice de búsqueda
+CAMPOS_INDEXADOS_PROVEEDOR = {'nombre_empresa', 'descripcion'}
+CAMPOS_INDEXADOS_PRODUCTO = {'nombre', 'activo', 'proveedor'}
+CAMPOS_AUTOCOMPLETAR_PROVEEDOR = {'nombre_empresa', 'activo'}
+
+
+def _cambia(update_fields, campos):
+    return update_fields is None or bool(campos.intersection(update_fields))
+
+
+@receiver(post_save, sender=Proveedor)
+def proveedor_guardado(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Reindexa el texto e invalida los conteos del directorio, salvo que solo
+    cambien campos ajenos (p. ej. ultima_conexion).
+    """
+    if created or _cambia(update_fields, CAMPOS_INDEXADOS_PROVEEDOR):
+        indice_texto.indexar_proveedores([instance.id])
+    if created or _cambia(update_fields, CAMPOS_AUTOCOMPLETAR_PROVEEDOR):
+        autocompletar.actualizar_proveedor(instance)
+    if created or _cambia(update_fields, CAMPOS_RANKING):
+        recalcular_puntajes([instance.id])
+    if _cambia(update_fields, CAMPOS_FACETADOS):
+        invalidar_facetas()
+
+
+@receiver(post_delete, sender=Proveedor)
+def proveedor_eliminado(sender, instance, **kwargs):
+    autocompletar.actualizar('proveedor', instance.id)
+    invalidar_facetas()
+
+
+@receiver(pre_delete, sender=CategoriaProveedor)
+def categoria_por_eliminar(sender, instance, **kwargs):
+    # El borrado en cascada de la relación no envía m2m_changed
+    instance._proveedores_afectados = list(instance.proveedores.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=CategoriaProveedor)
+def categoria_eliminada(sender, instance, **kwargs):
+    autocompletar.actualizar('categoria', instance.id)
+    indice_texto.indexar_proveedores(getattr(instance, '_proveedores_afectados', []))
+    invalidar_facetas()
+
+
+@receiver(post_save, sender=CategoriaProveedor)
+def categoria_guardada(sender, instance, created=False, **kwargs):
+    """Un rubro renombrado cambia el texto indexado de todos sus proveedores."""
+    if not created:
+        indice_texto.indexar_proveedores(instance.proveedores.values_list('id', flat=True))
+    autocompletar.actualizar('categoria', instance.id, instance.nombre if instance.activo else None)
+    invalidar_facetas()
+
+
+@receiver(m2m_changed, sender=Proveedor.categorias.through)
+def categorias_de_proveedor_modificadas(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # En post_clear ya no se sabe qué proveedores tenía la categoría
+        instance._proveedores_afectados = list(instance.proveedores.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        ids = [instance.id]
+    elif action == 'post_clear':
+        ids = getattr(instance, '_proveedores_afectados', [])
+    else:
+        ids = pk_set or []
+    indice_texto.indexar_proveedores(ids)
+    recalcular_puntajes(ids)
+    invalidar_facetas()
+
+
+@receiver(post_save, sender=ProductoServicio)
+def producto_guardado(sender, instance, update_fields=None, **kwargs):
+    invalidar_estadisticas(instance.proveedor_id)
+    if _cambia(update_fields, CAMPOS_INDEXADOS_PRODUCTO):
+        autocompletar.actualizar_producto(instance)
+        indice_texto.indexar_proveedores([instance.proveedor_id])
+        recalcular_puntajes([instance.proveedor_id])
+        invalidar_facetas()
+
+
+@receiver(post_delete, sender=ProductoServicio)
+def producto_eliminado(sender, instance, origin=None, **kwargs):
+    autocompletar.actualizar('producto', instance.id)
+    invalidar_estadisticas(instance.proveedor_id)
+    # Si se borra el proveedor completo no hay nada que reindexar (y recrear su
+    # documento impediría borrarlo)
+    if isinstance(origin, Proveedor) or getattr(origin, 'model', None) is Proveedor:
+        return
+    indice_texto.indexar_proveedores([instance.proveedor_id])
+    recalcular_puntajes([instance.proveedor_id])
+    invalidar_facetas()
+
+
+@receiver(post_save, sender=Promocion)
+def promocion_guardada(sender, instance, **kwargs):
+    invalidar_estadisticas(instance.proveedor_id)
+    recalcular_puntajes([instance.proveedor_id])
+
+
+@receiver(post_delete, sender=Promocion)
+def promocion_eliminada(sender, instance, origin=None, **kwargs):
+    invalidar_estadisticas(instance.proveedor_id)
+    if isinstance(origin, Proveedor) or getattr(origin, 'model', None) is Proveedor:
+        return
+    recalcular_puntajes([instance.proveedor_id])
+
+
+@receiver(post_save, sender=SolicitudContacto)
+@receiver(post_delete, sender=SolicitudContacto)
+def solicitud_modificada(sender, instance, **kwargs):
+    invalidar_estadisticas(instance.proveedor_id)
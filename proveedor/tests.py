@@ -1,3 +1,1176 @@
-from django.test import TestCase
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.paginator import Paginator
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    autocompletar, busqueda, contadores, estadisticas, exportacion, geo, importacion, indice_texto, ranking,
+)
+from .models import (
+    CambioAutocompletar, CategoriaProveedor, DocumentoBusqueda, EstadisticaDiariaProveedor, Proveedor,
+    ProductoServicio, Promocion, SolicitudContacto,
+)
+
+
+class PanelProveedorQueriesTests(TestCase):
+    """
+    Presupuesto de consultas de cada vista de proveedor/urls.py con un proveedor
+    logueado. El proveedor de la sesión se carga una sola vez por request (lo
+    resuelve el decorador o el middleware y lo reutilizan la vista y el context
+    processor).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.proveedor = Proveedor.objects.create(
+            email='prov@example.com',
+            password_hash='x',
+            nombre_contacto='Pedro',
+            nombre_empresa='Distribuidora Pedro',
+            descripcion='Abarrotes al por mayor',
+            whatsapp='+56911111111',
+        )
+        self.producto = ProductoServicio.objects.create(
+            proveedor=self.proveedor, nombre='Arroz', descripcion='Saco 25 kg'
+        )
+        hoy = timezone.now().date()
+        self.promocion = Promocion.objects.create(
+            proveedor=self.proveedor,
+            titulo='Oferta',
+            descripcion='10% de descuento',
+            fecha_inicio=hoy,
+            fecha_fin=hoy + timedelta(days=7),
+        )
+        self.addCleanup(contadores.volcar_visitas)
+        session = self.client.session
+        session['proveedor_id'] = self.proveedor.id
+        session.save()
+
+    def _vistas(self):
+        """(método, nombre de la url, args, consultas esperadas)."""
+        return [
+            ('get', 'login_proveedor', [], 2),
+            ('get', 'registro_proveedor', [], 2),
+            ('get', 'directorio_proveedores', [], 10),
+            ('get', 'detalle_proveedor', [self.proveedor.id], 8),
+            ('get', 'dashboard_proveedor', [], 8),
+            ('get', 'editar_perfil_proveedor', [], 3),
+            ('get', 'lista_productos', [], 4),
+            ('get', 'crear_producto', [], 2),
+            ('get', 'importar_productos', [], 2),
+            ('get', 'editar_producto', [self.producto.id], 3),
+            ('get', 'eliminar_producto', [self.producto.id], 3),
+            ('post', 'toggle_destacado_producto', [self.producto.id], 4),
+            ('get', 'lista_promociones', [], 4),
+            ('get', 'crear_promocion', [], 2),
+            ('get', 'editar_promocion', [self.promocion.id], 3),
+            ('get', 'eliminar_promocion', [self.promocion.id], 3),
+            ('get', 'enviar_solicitud_contacto', [], 2),
+            ('get', 'mis_solicitudes', [], 3),
+            ('get', 'get_comunas_ajax', [], 0),
+            ('get', 'ajax_regiones', [], 0),
+            ('get', 'ajax_geo', [], 0),
+        ]
+
+    def test_presupuesto_de_consultas(self):
+        for metodo, nombre, args, esperadas in self._vistas():
+            with self.subTest(vista=nombre):
+                url = reverse(f'proveedores:{nombre}', args=args)
+                with self.assertNumQueries(esperadas):
+                    response = getattr(self.client, metodo)(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_proveedor_de_sesion_se_carga_una_vez(self):
+        filtro = f'WHERE "{Proveedor._meta.db_table}"."id" ='
+        for metodo, nombre, args, _ in self._vistas():
+            with self.subTest(vista=nombre):
+                url = reverse(f'proveedores:{nombre}', args=args)
+                with CaptureQueriesContext(connection) as ctx:
+                    getattr(self.client, metodo)(url)
+                cargas = [
+                    q for q in ctx.captured_queries
+                    if q['sql'].startswith('SELECT') and filtro in q['sql']
+                ]
+                self.assertLessEqual(len(cargas), 1)
+
+    def test_logout(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('proveedores:logout_proveedor'))
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+
+    def test_sesion_invalida_redirige_al_login(self):
+        session = self.client.session
+        session['proveedor_id'] = self.proveedor.id + 1000
+        session.save()
+
+        response = self.client.get(reverse('proveedores:dashboard_proveedor'))
+
+        self.assertRedirects(
+            response, reverse('proveedores:login_proveedor'), fetch_redirect_response=False
+        )
+        self.assertNotIn('proveedor_id', self.client.session)
+
+
+class EstadisticasPanelTests(TestCase):
+    """Contadores del dashboard: una consulta por tabla y en caché hasta que algo cambie."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(contadores.volcar_visitas)
+        self.proveedor = _crear_proveedor(0)
+        self.otro = _crear_proveedor(1)
+        hoy = timezone.localdate()
+        for i in range(3):
+            ProductoServicio.objects.create(proveedor=self.proveedor, nombre=f'P{i}', activo=i > 0)
+        ProductoServicio.objects.create(proveedor=self.otro, nombre='Ajeno')
+        Promocion.objects.create(
+            proveedor=self.proveedor, titulo='Vigente', descripcion='x',
+            fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=3),
+        )
+        Promocion.objects.create(
+            proveedor=self.proveedor, titulo='Futura', descripcion='x',
+            fecha_inicio=hoy + timedelta(days=5), fecha_fin=hoy + timedelta(days=9),
+        )
+        SolicitudContacto.objects.create(proveedor=self.proveedor, mensaje='Hola')
+        SolicitudContacto.objects.create(proveedor=self.proveedor, mensaje='Hola', estado='aceptada')
+        session = self.client.session
+        session['proveedor_id'] = self.proveedor.id
+        session.save()
+
+    def _contadores(self, datos):
+        return {
+            clave: datos[clave]
+            for clave in ('total_productos', 'productos_activos', 'promociones_activas', 'solicitudes_pendientes')
+        }
+
+    def test_una_consulta_por_tabla(self):
+        with self.assertNumQueries(3 + 2):
+            datos = estadisticas.calcular_estadisticas(self.proveedor.id)
+        self.assertEqual(self._contadores(datos), {
+            'total_productos': 3, 'productos_activos': 2, 'promociones_activas': 1, 'solicitudes_pendientes': 1,
+        })
+        self.assertEqual([p.titulo for p in datos['promociones_proximas']], ['Vigente', 'Futura'])
+        self.assertEqual(len(datos['productos_recientes']), 3)
+
+    def test_dashboard_en_cache_usa_tres_consultas(self):
+        url = reverse('proveedores:dashboard_proveedor')
+        # Sin caché: sesión, proveedor, serie diaria y las de calcular_estadisticas
+        with self.assertNumQueries(3 + 5):
+            self.client.get(url)
+
+        # Con caché solo las tres primeras
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.context['total_productos'], 3)
+        self.assertContains(response, 'Vigente')
+
+    def test_cambios_invalidan_la_cache(self):
+        url = reverse('proveedores:dashboard_proveedor')
+        self.client.get(url)
+
+        producto = ProductoServicio.objects.create(proveedor=self.proveedor, nombre='Nuevo')
+        self.assertEqual(self.client.get(url).context['total_productos'], 4)
+
+        producto.delete()
+        Promocion.objects.filter(titulo='Futura').get().delete()
+        response = self.client.get(url)
+        self.assertEqual(response.context['total_productos'], 3)
+        self.assertEqual(len(response.context['promociones_proximas']), 1)
+
+        self.proveedor.solicitudes_enviadas.get(estado='pendiente').rechazar()
+        self.assertEqual(self.client.get(url).context['solicitudes_pendientes'], 0)
+
+    def test_cambios_de_otro_proveedor_no_invalidan(self):
+        estadisticas.estadisticas_panel(self.proveedor.id)
+        ProductoServicio.objects.create(proveedor=self.otro, nombre='Otro')
+
+        with self.assertNumQueries(0):
+            estadisticas.estadisticas_panel(self.proveedor.id)
+
+
+class ImportacionProductosTests(TestCase):
+    """Importación masiva del catálogo por SKU, con reporte de errores por fila."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(contadores.volcar_visitas)
+        self.proveedor = _crear_proveedor(0)
+        self.existente = ProductoServicio.objects.create(
+            proveedor=self.proveedor, sku='A-1', nombre='Arroz', descripcion='Antiguo', precio_referencia=100,
+        )
+
+    def _importar(self, contenido, nombre='catalogo.csv'):
+        archivo = SimpleUploadedFile(nombre, contenido.encode('utf-8'))
+        return importacion.importar_productos(self.proveedor, archivo, nombre)
+
+    def test_crea_y_actualiza_por_sku(self):
+        resultado = self._importar(
+            'SKU;Nombre;Descripción;Precio;Categoría;Activo\n'
+            'A-1;Arroz grado 1;Saco 25 kg;$15990;Alimentos y Comida;sí\n'
+            'B-2;Pisco;Botella 1 L;8990;BEBIDAS;no\n'
+            ';Flete;Despacho en la comuna;;;\n'
+        )
+
+        self.assertEqual(resultado, {'creados': 2, 'actualizados': 1, 'total_errores': 0, 'errores': []})
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.nombre, 'Arroz grado 1')
+        self.assertEqual(self.existente.precio_referencia, 15990)
+        self.assertEqual(self.existente.categoria, 'ALIMENTOS')
+        pisco = ProductoServicio.objects.get(proveedor=self.proveedor, sku='B-2')
+        self.assertFalse(pisco.activo)
+        self.assertEqual(pisco.categoria, 'BEBIDAS')
+        flete = ProductoServicio.objects.get(proveedor=self.proveedor, nombre='Flete')
+        self.assertIsNone(flete.sku)
+        self.assertEqual(flete.categoria, 'OTRO')
+
+        # Lo que harían las señales por cada producto se actualiza una vez
+        self.assertEqual(estadisticas.estadisticas_panel(self.proveedor.id)['total_productos'], 3)
+        self.assertEqual(list(indice_texto.filtrar(Proveedor.objects.all(), 'flete')), [self.proveedor])
+        self.assertTrue(CambioAutocompletar.objects.filter(tipo='producto', nombre='Flete').exists())
+
+    def test_reporte_de_errores_por_fila(self):
+        resultado = self._importar(
+            'sku,nombre,descripcion,precio,activo\n'
+            'C-1,,Sin nombre,100,si\n'
+            'C-2,Azúcar,Bolsa 1 kg,caro,si\n'
+            'C-3,Sal,Bolsa 1 kg,500,quizás\n'
+            'C-4,Té,Caja 100 bolsitas,2500,\n'
+            'C-4,Té verde,Caja,2500,\n'
+        )
+
+        self.assertEqual(resultado['creados'], 1)
+        self.assertEqual(resultado['total_errores'], 4)
+        errores = {error['fila']: error for error in resultado['errores']}
+        self.assertEqual(sorted(errores), [2, 3, 4, 6])
+        self.assertTrue(errores[2]['mensajes'][0].startswith('nombre:'))
+        self.assertTrue(errores[3]['mensajes'][0].startswith('precio_referencia:'))
+        self.assertTrue(errores[4]['mensajes'][0].startswith('activo:'))
+        self.assertIn('fila 5', errores[6]['mensajes'][0])
+        self.assertTrue(ProductoServicio.objects.get(sku='C-4').activo)
+
+    def test_columnas_ausentes_no_se_sobrescriben(self):
+        ProductoServicio.objects.filter(pk=self.existente.pk).update(
+            categoria='ALIMENTOS', activo=False, destacado=True,
+        )
+
+        resultado = self._importar('sku,nombre,descripcion\nA-1,Arroz grado 2,Saco 5 kg\nB-9,Sal,Bolsa 1 kg\n')
+
+        self.assertEqual((resultado['creados'], resultado['actualizados']), (1, 1))
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.nombre, 'Arroz grado 2')
+        self.assertEqual(self.existente.precio_referencia, 100)
+        self.assertEqual(self.existente.categoria, 'ALIMENTOS')
+        self.assertFalse(self.existente.activo)
+        self.assertTrue(self.existente.destacado)
+        # Los nuevos sí toman los valores por defecto
+        sal = ProductoServicio.objects.get(proveedor=self.proveedor, sku='B-9')
+        self.assertEqual((sal.categoria, sal.activo, sal.destacado), ('OTRO', True, False))
+
+    def test_reimportar_exportacion_por_id(self):
+        sin_sku = ProductoServicio.objects.create(proveedor=self.proveedor, nombre='Flete', descripcion='Comuna')
+        ajeno = ProductoServicio.objects.create(proveedor=_crear_proveedor(1), nombre='Ajeno', descripcion='x')
+        exportado = ''.join(exportacion.lineas_csv(*exportacion.productos_de(self.proveedor.id)))
+        exportado = exportado.lstrip('\ufeff').replace('Flete', 'Flete express')
+
+        resultado = self._importar(exportado)
+
+        self.assertEqual((resultado['creados'], resultado['actualizados'], resultado['total_errores']), (0, 2, 0))
+        self.assertEqual(ProductoServicio.objects.filter(proveedor=self.proveedor).count(), 2)
+        sin_sku.refresh_from_db()
+        self.assertEqual(sin_sku.nombre, 'Flete express')
+
+        # Un id puede recibir SKU, pero no uno ajeno ni uno que ya usa otro producto
+        resultado = self._importar(
+            'id,sku,nombre,descripcion\n'
+            f'{sin_sku.id},F-1,Flete,Comuna\n'
+            f'{ajeno.id},X-1,Ajeno,x\n'
+            f'{self.existente.id},F-1,Arroz,x\n'
+        )
+        self.assertEqual(resultado['actualizados'], 1)
+        self.assertEqual([e['fila'] for e in resultado['errores']], [4, 3])
+        sin_sku.refresh_from_db()
+        self.assertEqual(sin_sku.sku, 'F-1')
+        ajeno.refresh_from_db()
+        self.assertEqual(ajeno.nombre, 'Ajeno')
+
+    def test_archivo_invalido(self):
+        with self.assertRaisesMessage(importacion.ErrorImportacion, 'descripcion'):
+            self._importar('sku,nombre\nA,B\n')
+        with self.assertRaises(importacion.ErrorImportacion):
+            importacion.importar_productos(
+                self.proveedor, SimpleUploadedFile('x.csv', 'nombre,descripcion\nÑandú,x\n'.encode('latin-1')), 'x.csv'
+            )
+
+    def test_archivo_ilegible_despues_del_primer_lote(self):
+        contenido = 'sku,nombre,descripcion\nA-1,Arroz grado 1,x\nB-1,Sal,x\n'.encode() + 'C-1,Ñandú,x\n'.encode('latin-1')
+        archivo = SimpleUploadedFile('c.csv', contenido)
+
+        with self.assertRaisesMessage(importacion.ErrorImportacion, 'UTF-8'):
+            importacion.importar_productos(self.proveedor, archivo, 'c.csv', lote=1)
+
+        # No queda ningún lote a medias
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.nombre, 'Arroz')
+        self.assertFalse(ProductoServicio.objects.filter(sku='B-1').exists())
+        self.assertEqual(list(indice_texto.filtrar(Proveedor.objects.all(), 'sal')), [])
+
+    def test_lotes_de_escritura(self):
+        filas = ''.join(f'S-{i},Producto {i},Descripción {i}\n' for i in range(25))
+        archivo = SimpleUploadedFile('c.csv', ('sku,nombre,descripcion\n' + filas).encode())
+
+        # Un INSERT (upsert) por lote
+        with CaptureQueriesContext(connection) as ctx:
+            importacion.importar_productos(self.proveedor, archivo, 'c.csv', lote=10)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "producto_servicio"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(ProductoServicio.objects.filter(proveedor=self.proveedor).count(), 26)
+
+    @skipUnless(__import__('importlib').util.find_spec('openpyxl'), 'Requiere openpyxl')
+    def test_xlsx(self):
+        import io
+
+        import openpyxl
+
+        libro = openpyxl.Workbook()
+        hoja = libro.active
+        hoja.append(['SKU', 'Nombre', 'Descripción', 'Precio'])
+        hoja.append([1001, 'Aceite', 'Botella 1 L', 2990.0])
+        contenido = io.BytesIO()
+        libro.save(contenido)
+
+        archivo = SimpleUploadedFile('c.xlsx', contenido.getvalue())
+        resultado = importacion.importar_productos(self.proveedor, archivo, 'c.xlsx')
+
+        self.assertEqual(resultado['creados'], 1)
+        self.assertEqual(ProductoServicio.objects.get(sku='1001').precio_referencia, 2990)
+
+    def test_vista(self):
+        session = self.client.session
+        session['proveedor_id'] = self.proveedor.id
+        session.save()
+
+        archivo = SimpleUploadedFile('c.csv', 'nombre,descripcion\nHarina,Saco\n,Sin nombre\n'.encode())
+        response = self.client.post(reverse('proveedores:importar_productos'), {'archivo': archivo})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['resultado']['creados'], 1)
+        self.assertContains(response, 'nombre: Este campo es obligatorio.')
+
+        archivo = SimpleUploadedFile('c.txt', b'x')
+        response = self.client.post(reverse('proveedores:importar_productos'), {'archivo': archivo})
+        self.assertIn('archivo', response.context['form'].errors)
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), 'Definir RUN_BENCHMARKS=1 para correr los benchmarks')
+class ImportacionProductosBenchmark(TestCase):
+    """10k filas nuevas y luego las mismas 10k como actualización."""
+
+    FILAS = 10_000
+    # Casi la mitad es instanciar un ProductoImportacionForm por fila
+    PRESUPUESTO_S = 10
+
+    def test_benchmark(self):
+        proveedor = _crear_proveedor(0)
+        contenido = 'sku,nombre,descripcion,precio,categoria\n' + ''.join(
+            f'SKU-{i},Producto {i},Descripción del producto {i},{1000 + i},ALIMENTOS\n' for i in range(self.FILAS)
+        )
+
+        for etapa in ('creación', 'actualización'):
+            archivo = SimpleUploadedFile('c.csv', contenido.encode())
+            inicio = time.perf_counter()
+            resultado = importacion.importar_productos(proveedor, archivo, 'c.csv')
+            transcurrido = time.perf_counter() - inicio
+            print(f'\n{self.FILAS} filas ({etapa}): {transcurrido:.2f} s')
+            self.assertEqual(resultado['total_errores'], 0)
+            self.assertLess(transcurrido, self.PRESUPUESTO_S)
+        self.assertEqual(resultado['actualizados'], self.FILAS)
+
+
+class ExportacionTests(TestCase):
+    """Exportaciones en streaming, leídas por páginas de id."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(contadores.volcar_visitas)
+        self.proveedor = _crear_proveedor(0)
+        self.otro = _crear_proveedor(1)
+        for i in range(5):
+            ProductoServicio.objects.create(
+                proveedor=self.proveedor, sku=f'P-{i}', nombre=f'Ñoqui {i}', descripcion='Bandeja', precio_referencia=1000 + i,
+            )
+        ProductoServicio.objects.create(proveedor=self.otro, nombre='Ajeno', descripcion='Otro proveedor')
+
+    def test_paginas_por_id(self):
+        columnas, queryset = exportacion.productos_de(self.proveedor.id)
+        campos = [campo for campo, _ in columnas]
+
+        # 5 filas en páginas de 2: tres consultas, cada una con su LIMIT
+        with CaptureQueriesContext(connection) as ctx:
+            filas = list(exportacion.filas(queryset, campos, lote=2))
+        self.assertEqual([fila[1] for fila in filas], [f'P-{i}' for i in range(5)])
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_csv_se_puede_volver_a_importar(self):
+        columnas, queryset = exportacion.productos_de(self.proveedor.id)
+        contenido = ''.join(exportacion.lineas('csv', columnas, queryset))
+
+        self.assertTrue(contenido.startswith('\ufeffid,sku,nombre'))
+        self.assertNotIn('Ajeno', contenido)
+        ProductoServicio.objects.filter(proveedor=self.proveedor).update(nombre='Cambiado')
+        resultado = importacion.importar_productos(
+            self.proveedor, SimpleUploadedFile('c.csv', contenido.encode()), 'c.csv'
+        )
+        self.assertEqual((resultado['actualizados'], resultado['total_errores']), (5, 0))
+        self.assertEqual(ProductoServicio.objects.get(sku='P-3').nombre, 'Ñoqui 3')
+
+    def test_csv_no_exporta_formulas(self):
+        ProductoServicio.objects.filter(sku='P-1').update(nombre='=HYPERLINK("http://x")', descripcion='-2+3')
+        columnas, queryset = exportacion.productos_de(self.proveedor.id)
+        contenido = ''.join(exportacion.lineas('csv', columnas, queryset))
+
+        self.assertIn('"\'=HYPERLINK(""http://x"")"', contenido)
+        self.assertIn("'-2+3,1001", contenido)
+        # Al volver a importar se recupera el texto original
+        importacion.importar_productos(self.proveedor, SimpleUploadedFile('c.csv', contenido.encode()), 'c.csv')
+        producto = ProductoServicio.objects.get(sku='P-1')
+        self.assertEqual((producto.nombre, producto.descripcion), ('=HYPERLINK("http://x")', '-2+3'))
+
+    def test_vista_jsonl(self):
+        session = self.client.session
+        session['proveedor_id'] = self.proveedor.id
+        session.save()
+
+        response = self.client.get(reverse('proveedores:exportar_catalogo', args=['productos']), {'formato': 'jsonl'})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertIn(f'productos-{self.proveedor.id}-', response['Content-Disposition'])
+        filas = [json.loads(linea) for linea in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(filas), 5)
+        self.assertEqual(filas[0]['nombre'], 'Ñoqui 0')
+        self.assertEqual(filas[0]['precio_referencia'], '1000.00')
+
+        response = self.client.get(reverse('proveedores:exportar_catalogo', args=['clientes']))
+        self.assertEqual(response.status_code, 404)
+
+
+def _crear_proveedor(i):
+    return Proveedor.objects.create(
+        email=f'prov{i}@example.com',
+        password_hash='x',
+        nombre_contacto=f'Contacto {i}',
+        nombre_empresa=f'Empresa {i}',
+        descripcion='Descripción',
+        whatsapp='+56911111111',
+    )
+
+
+class ContadorVisitasTests(TestCase):
+    """Las visitas se acumulan en memoria y se vuelcan en lote sin perder incrementos."""
+
+    def setUp(self):
+        self.addCleanup(contadores.volcar_visitas)
+        self.proveedores = [_crear_proveedor(i) for i in range(5)]
+
+    def test_visita_no_escribe_en_el_request(self):
+        proveedor = self.proveedores[0]
+
+        with self.assertNumQueries(0):
+            proveedor.incrementar_visitas()
+            proveedor.incrementar_visitas()
+
+        self.assertEqual(proveedor.visitas, 2)
+        proveedor.refresh_from_db()
+        self.assertEqual(proveedor.visitas, 0)
+
+        # Un UPDATE por cada cantidad distinta, no por proveedor
+        contadores.registrar_visita(self.proveedores[1].id, 2)
+        contadores.registrar_visita(self.proveedores[2].id, 5)
+        # SAVEPOINT/RELEASE + 2 UPDATE de totales + INSERT y 2 UPDATE del resumen diario
+        # + SELECT y UPDATE del ranking de los tres proveedores
+        with self.assertNumQueries(2 + 2 + 3 + 2):
+            self.assertEqual(contadores.volcar_visitas(), 9)
+
+        visitas = dict(Proveedor.objects.values_list('id', 'visitas'))
+        self.assertEqual(visitas[proveedor.id], 2)
+        self.assertEqual(visitas[self.proveedores[1].id], 2)
+        self.assertEqual(visitas[self.proveedores[2].id], 5)
+
+    def test_error_al_volcar_devuelve_las_visitas_al_buffer(self):
+        proveedor = self.proveedores[0]
+        contadores.registrar_visita(proveedor.id, 3)
+
+        with mock.patch.object(contadores.Proveedor.objects, 'filter', side_effect=RuntimeError), \
+                self.assertLogs('proveedor.contadores', 'ERROR'):
+            self.assertEqual(contadores.volcar_visitas(), 0)
+
+        self.assertEqual(contadores.visitas_pendientes(proveedor.id), 3)
+        self.assertEqual(contadores.volcar_visitas(), 3)
+        proveedor.refresh_from_db()
+        self.assertEqual(proveedor.visitas, 3)
+
+    def test_estres_concurrente(self):
+        """Muchos hilos registran visitas mientras se vuelca el buffer: el total es exacto."""
+        hilos, visitas_por_hilo = 16, 2000
+        ids = [p.id for p in self.proveedores]
+        listos = threading.Barrier(hilos + 1)
+
+        def visitar(n):
+            listos.wait()
+            for i in range(visitas_por_hilo):
+                contadores.registrar_visita(ids[(n + i) % len(ids)])
+
+        # El volcado ocurre en este hilo (la conexión de la transacción del test)
+        with mock.patch.object(contadores, 'VISITAS_FLUSH_MAXIMO', float('inf')):
+            workers = [threading.Thread(target=visitar, args=(n,)) for n in range(hilos)]
+            for worker in workers:
+                worker.start()
+            listos.wait()
+            volcadas = 0
+            while any(worker.is_alive() for worker in workers):
+                volcadas += contadores.volcar_visitas()
+            for worker in workers:
+                worker.join()
+            volcadas += contadores.volcar_visitas()
+
+        self.assertEqual(volcadas, hilos * visitas_por_hilo)
+        total = sum(Proveedor.objects.filter(id__in=ids).values_list('visitas', flat=True))
+        self.assertEqual(total, hilos * visitas_por_hilo)
+        for proveedor in Proveedor.objects.filter(id__in=ids):
+            self.assertEqual(proveedor.visitas, hilos * visitas_por_hilo // len(ids))
+
+
+class EstadisticaDiariaTests(TestCase):
+    """Resumen diario de visitas y contactos para el dashboard."""
+
+    def setUp(self):
+        self.addCleanup(contadores.volcar_visitas)
+        self.proveedor = _crear_proveedor(0)
+        session = self.client.session
+        session['proveedor_id'] = self.proveedor.id
+        session.save()
+
+    def test_visitas_y_contactos_se_agregan_por_dia(self):
+        hoy = timezone.localdate()
+        for _ in range(3):
+            self.client.get(reverse('proveedores:detalle_proveedor', args=[self.proveedor.id]))
+        contadores.volcar_visitas()
+        self.client.post(reverse('proveedores:enviar_solicitud_contacto'), {'mensaje': 'Hola'})
+
+        fila = EstadisticaDiariaProveedor.objects.get(proveedor=self.proveedor, fecha=hoy)
+        self.assertEqual(fila.visitas, 3)
+        self.assertEqual(fila.contactos_enviados, 1)
+
+        solicitud = self.proveedor.solicitudes_enviadas.get()
+        solicitud.aceptar()
+        fila.refresh_from_db()
+        self.assertEqual(fila.contactos_aceptados, 1)
+
+    def test_dashboard_serie_con_dias_en_cero(self):
+        hoy = timezone.localdate()
+        EstadisticaDiariaProveedor.objects.create(proveedor=self.proveedor, fecha=hoy, visitas=4)
+        EstadisticaDiariaProveedor.objects.create(
+            proveedor=self.proveedor, fecha=hoy - timedelta(days=10), visitas=2
+        )
+        EstadisticaDiariaProveedor.objects.create(
+            proveedor=self.proveedor, fecha=hoy - timedelta(days=60), visitas=9
+        )
+
+        for dias, visitas in ((7, 4), (30, 6), (90, 15)):
+            with self.subTest(dias=dias):
+                response = self.client.get(reverse('proveedores:dashboard_proveedor'), {'dias': dias})
+                serie = response.context['serie_diaria']
+                self.assertEqual(len(serie), dias)
+                self.assertEqual(serie[-1]['fecha'], hoy)
+                self.assertEqual(serie[-1]['altura'], round(4 * 100 / max(d['visitas'] for d in serie)))
+                self.assertEqual(response.context['visitas_periodo'], visitas)
+
+        response = self.client.get(reverse('proveedores:dashboard_proveedor'), {'dias': 'x'})
+        self.assertEqual(response.context['dias_estadisticas'], 30)
+
+
+class GeoTests(SimpleTestCase):
+
+    def test_nombres(self):
+        self.assertEqual(geo.nombre_pais('CL'), 'Chile')
+        self.assertEqual(geo.nombre_region('CL-RM'), 'Región Metropolitana de Santiago')
+        self.assertEqual(geo.nombre_comuna('MA-Natales'), 'Natales')
+        # Códigos desconocidos se muestran tal cual
+        self.assertEqual(geo.nombre_comuna('XX'), 'XX')
+        self.assertIsNone(geo.nombre_region(None))
+
+    def test_indices_coinciden_con_las_listas(self):
+        for region, comunas in geo.COMUNAS_POR_REGION.items():
+            self.assertEqual(geo.comunas_de_region(region), tuple(comunas))
+            for codigo, _ in comunas:
+                self.assertEqual(geo.REGION_DE_COMUNA[codigo], region)
+        self.assertEqual(geo.comunas_de_region('nada'), ())
+        self.assertEqual(len(geo.regiones_de_pais('CL')), 16)
+        self.assertEqual(geo.PAIS_DE_REGION['CL-MA'], 'CL')
+
+    def test_indices_son_de_solo_lectura(self):
+        with self.assertRaises(TypeError):
+            geo.NOMBRE_COMUNA['XX'] = 'Otra'
+
+    def test_metodos_del_modelo(self):
+        proveedor = Proveedor(pais='CL', region='CL-VS', comuna='AP-Arica')
+        self.assertEqual(proveedor.get_pais_display_name(), 'Chile')
+        self.assertEqual(proveedor.get_region_display_name(), 'Región de Valparaíso')
+        self.assertEqual(proveedor.get_comuna_display_name(), 'Arica')
+
+
+class BusquedaFacetadaTests(TestCase):
+    """Conteos por faceta del directorio, su caché y la invalidación por señales."""
+
+    def setUp(self):
+        cache.clear()
+        self.abarrotes = CategoriaProveedor.objects.create(nombre='Abarrotes')
+        self.bebidas = CategoriaProveedor.objects.create(nombre='Bebidas')
+        datos = [
+            ('CL-RM', 'RM-Santiago', 'local', [self.abarrotes]),
+            ('CL-RM', 'RM-Maipu', 'regional', [self.abarrotes, self.bebidas]),
+            ('CL-VS', 'VS-Valparaiso', 'nacional', [self.bebidas]),
+        ]
+        self.proveedores = []
+        for i, (region, comuna, cobertura, categorias) in enumerate(datos):
+            proveedor = _crear_proveedor(i)
+            proveedor.pais = 'CL'
+            proveedor.region = region
+            proveedor.comuna = comuna
+            proveedor.cobertura = cobertura
+            proveedor.save()
+            proveedor.categorias.set(categorias)
+            self.proveedores.append(proveedor)
+
+    @staticmethod
+    def _totales(opciones):
+        return {opcion['valor']: opcion['total'] for opcion in opciones if opcion['total']}
+
+    def test_conteos_excluyen_el_filtro_de_la_propia_faceta(self):
+        resultado = busqueda.buscar_proveedores({'region': 'CL-RM'})
+        facetas = resultado['facetas']
+
+        self.assertEqual(resultado['page_obj'].paginator.count, 2)
+        # La región elegida no reduce su propia faceta
+        self.assertEqual(self._totales(facetas['region']), {'CL-RM': 2, 'CL-VS': 1})
+        self.assertEqual(
+            self._totales(facetas['categoria']),
+            {str(self.abarrotes.id): 2, str(self.bebidas.id): 1},
+        )
+        self.assertEqual(self._totales(facetas['cobertura']), {'local': 1, 'regional': 1})
+        # Con región elegida se listan todas sus comunas, con o sin proveedores
+        comunas = {opcion['valor'] for opcion in facetas['comuna']}
+        self.assertIn('RM-Santiago', comunas)
+        self.assertNotIn('VS-Valparaiso', comunas)
+        self.assertTrue(next(o for o in facetas['region'] if o['valor'] == 'CL-RM')['seleccionado'])
+
+    def test_filtros_invalidos_se_descartan(self):
+        filtros = busqueda.normalizar_filtros({'categoria': 'x', 'region': ' ', 'q': ' arroz '})
+        self.assertEqual(filtros, {'q': 'arroz'})
+
+    def test_conteos_en_cache(self):
+        busqueda.buscar_proveedores({'cobertura': 'local'})
+        # Solo el COUNT, la página y el prefetch de categorías
+        with self.assertNumQueries(3):
+            resultado = busqueda.buscar_proveedores({'cobertura': 'local'})
+            list(resultado['page_obj'])
+
+    def test_cambios_invalidan_los_conteos(self):
+        busqueda.facetas({})
+        proveedor = self.proveedores[0]
+
+        # Campos que no afectan las facetas no invalidan
+        proveedor.visitas = 10
+        proveedor.save(update_fields=['visitas'])
+        with self.assertNumQueries(0):
+            busqueda.facetas({})
+
+        proveedor.region = 'CL-VS'
+        proveedor.save()
+        self.assertEqual(self._totales(busqueda.facetas({})['region']), {'CL-RM': 1, 'CL-VS': 2})
+
+        proveedor.categorias.add(self.bebidas)
+        self.assertEqual(
+            self._totales(busqueda.facetas({})['categoria']),
+            {str(self.abarrotes.id): 2, str(self.bebidas.id): 3},
+        )
+
+        self.proveedores[2].delete()
+        self.assertEqual(self._totales(busqueda.facetas({})['region']), {'CL-RM': 1, 'CL-VS': 1})
+
+
+class BusquedaTextoTests(TestCase):
+    """Índice de texto del directorio: tildes, relevancia, resaltado y mantenimiento por señales."""
+
+    def setUp(self):
+        cache.clear()
+        self.cafeteria = _crear_proveedor(1)
+        self.cafeteria.nombre_empresa = 'Café Ñuñoa'
+        self.cafeteria.descripcion = 'Tostaduría de especialidad <b>artesanal</b>'
+        self.cafeteria.save()
+        self.distribuidora = _crear_proveedor(2)
+        self.distribuidora.descripcion = 'Distribuimos azúcar, té y café en grano a todo Chile'
+        self.distribuidora.save()
+        self.rubro = CategoriaProveedor.objects.create(nombre='Panadería')
+        self.distribuidora.categorias.add(self.rubro)
+        self.producto = ProductoServicio.objects.create(
+            proveedor=self.cafeteria, nombre='Molinillo manual', descripcion='Cerámico'
+        )
+
+    def _buscar(self, texto, **params):
+        resultado = busqueda.buscar_proveedores({'q': texto, **params})
+        return list(resultado['page_obj'])
+
+    def test_sin_tildes_y_por_prefijo(self):
+        self.assertEqual(indice_texto.normalizar('Ñuñoa Café'), 'nunoa cafe')
+        self.assertEqual([p.id for p in self._buscar('NUNOA')], [self.cafeteria.id])
+        self.assertEqual([p.id for p in self._buscar('tostad')], [self.cafeteria.id])
+
+    def test_busca_en_rubros_y_productos_y_exige_todos_los_terminos(self):
+        self.assertEqual([p.id for p in self._buscar('panaderia')], [self.distribuidora.id])
+        self.assertEqual([p.id for p in self._buscar('molinillo')], [self.cafeteria.id])
+        self.assertEqual(self._buscar('molinillo azucar'), [])
+
+    def test_busqueda_sin_terminos_indexables(self):
+        # 'té' es muy corta para el índice: se busca como inicio de palabra ('artesanal' no cuenta)
+        self.assertEqual([p.id for p in self._buscar('té')], [self.distribuidora.id])
+        self.assertEqual([p.id for p in self._buscar('los te')], [])
+        self.assertEqual(self._buscar('xz'), [])
+        self.assertEqual(len(self._buscar('¿?')), 2)
+
+    def test_relevancia(self):
+        # 'café' está en el nombre de uno (peso alto) y en la descripción del otro
+        self.assertEqual(
+            [p.id for p in self._buscar('cafe')],
+            [self.cafeteria.id, self.distribuidora.id],
+        )
+        # Un orden elegido por el usuario manda sobre la relevancia
+        self.assertEqual(
+            [p.id for p in busqueda.buscar_proveedores({'q': 'cafe'}, orden='-nombre')['page_obj']],
+            [self.distribuidora.id, self.cafeteria.id],
+        )
+
+    def test_resaltado(self):
+        cafeteria, distribuidora = self._buscar('cafe molin')[0], self._buscar('cafe')[1]
+
+        self.assertEqual(cafeteria.nombre_resaltado, '<mark>Café</mark> Ñuñoa')
+        self.assertIn('&lt;b&gt;artesanal&lt;/b&gt;', cafeteria.descripcion_resaltada)
+        self.assertEqual(cafeteria.productos_resaltados, ['<mark>Molinillo</mark> manual'])
+        self.assertIn('té y <mark>café</mark> en grano', distribuidora.descripcion_resaltada)
+
+        html = self.client.get(reverse('proveedores:directorio_proveedores'), {'q': 'cafe'}).content.decode()
+        self.assertIn('<mark>Café</mark> Ñuñoa', html)
+
+    def test_fragmento_alrededor_de_la_coincidencia(self):
+        texto = ' '.join(f'palabra{i}' for i in range(60)) + ' aceite de oliva'
+        html = indice_texto.fragmento(texto, ['oliva'], palabras=10)
+        self.assertTrue(html.startswith('… '))
+        self.assertTrue(html.endswith('<mark>oliva</mark>'))
+
+    def test_indice_se_mantiene_con_las_senales(self):
+        self.producto.nombre = 'Prensa francesa'
+        self.producto.save()
+        self.assertEqual(self._buscar('molinillo'), [])
+        self.assertEqual([p.id for p in self._buscar('prensa')], [self.cafeteria.id])
+
+        self.producto.activo = False
+        self.producto.save(update_fields=['activo'])
+        self.assertEqual(self._buscar('prensa'), [])
+
+        self.rubro.nombre = 'Pastelería'
+        self.rubro.save()
+        self.assertEqual([p.id for p in self._buscar('pasteleria')], [self.distribuidora.id])
+
+        self.rubro.delete()
+        self.assertEqual(self._buscar('pasteleria'), [])
+
+    def test_eliminar_proveedor_con_productos(self):
+        self.cafeteria.delete()
+        self.assertFalse(DocumentoBusqueda.objects.filter(proveedor_id=self.cafeteria.id).exists())
+        self.assertEqual(self._buscar('nunoa'), [])
+
+
+class AutocompletarTests(TestCase):
+    """Índice en memoria de sugerencias del buscador y su mantenimiento por señales."""
+
+    def setUp(self):
+        autocompletar.descartar()
+        self.addCleanup(autocompletar.descartar)
+        self.cafeteria = _crear_proveedor(1)
+        self.cafeteria.nombre_empresa = 'Café Ñuñoa'
+        self.cafeteria.save()
+        self.cafetalera = _crear_proveedor(2)
+        self.cafetalera.nombre_empresa = 'Distribuidora Cafetalera del Sur'
+        self.cafetalera.save()
+        self.producto = ProductoServicio.objects.create(
+            proveedor=self.cafeteria, nombre='Café de grano', descripcion='1 kg'
+        )
+        self.rubro = CategoriaProveedor.objects.create(nombre='Cafetería')
+
+    def _nombres(self, prefijo):
+        return [sugerencia['nombre'] for sugerencia in autocompletar.sugerir(prefijo)]
+
+    def test_sugerencias(self):
+        # Primero las que empiezan con el prefijo (las más cortas antes), luego por otra palabra
+        self.assertEqual(
+            self._nombres('CAF'),
+            ['Cafetería', 'Café Ñuñoa', 'Café de grano', 'Distribuidora Cafetalera del Sur'],
+        )
+        self.assertEqual(self._nombres('nunoa'), ['Café Ñuñoa'])
+        self.assertEqual(self._nombres('cafe de g'), ['Café de grano'])
+        self.assertEqual(self._nombres('c'), [])
+        self.assertEqual(autocompletar.sugerir('caf', limite=1)[0]['tipo'], 'categoria')
+
+    def test_consulta_sin_base_de_datos(self):
+        autocompletar.sugerir('caf')
+        with self.assertNumQueries(0):
+            autocompletar.sugerir('dis')
+
+    def test_senales_actualizan_el_indice(self):
+        autocompletar.sugerir('caf')
+
+        self.cafetalera.nombre_empresa = 'Tostadores del Sur'
+        self.cafetalera.save(update_fields=['nombre_empresa'])
+        self.producto.nombre = 'Molinillo'
+        self.producto.save()
+        self.rubro.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self._nombres('caf'), ['Café Ñuñoa'])
+            self.assertEqual(self._nombres('tosta'), ['Tostadores del Sur'])
+
+        # Un proveedor desactivado sale del índice junto con sus productos
+        self.cafeteria.activo = False
+        self.cafeteria.save(update_fields=['activo'])
+        self.assertEqual(self._nombres('caf'), [])
+        self.assertEqual(self._nombres('molin'), [])
+
+    def test_guardar_perfil_sin_cambios_no_registra(self):
+        CambioAutocompletar.objects.all().delete()
+        proveedor = Proveedor.objects.get(pk=self.cafeteria.pk)
+        proveedor.descripcion = 'Tostamos todos los días'
+        proveedor.save()
+        self.assertFalse(CambioAutocompletar.objects.exists())
+
+        # Un cambio de nombre no vuelve a registrar los productos
+        proveedor.nombre_empresa = 'Cafetería Ñuñoa'
+        proveedor.save()
+        self.assertEqual(
+            list(CambioAutocompletar.objects.values_list('tipo', 'nombre')),
+            [('proveedor', 'Cafetería Ñuñoa')],
+        )
+
+    def test_cambios_de_otro_proceso(self):
+        autocompletar.sugerir('caf')
+        # Otro proceso cambió datos y registró el cambio
+        Proveedor.objects.filter(id=self.cafetalera.id).update(nombre_empresa='Cafés Andinos')
+        CambioAutocompletar.objects.create(
+            tipo='proveedor', objeto_id=self.cafetalera.id,
+            nombre='Cafés Andinos', id_proveedor=self.cafetalera.id,
+        )
+        CambioAutocompletar.objects.create(tipo='producto', objeto_id=self.producto.id)
+
+        # Hasta la próxima revisión se sigue usando el índice sin consultar la base
+        with self.assertNumQueries(0):
+            self.assertNotIn('Cafés Andinos', self._nombres('cafes'))
+        with mock.patch.object(autocompletar, 'INTERVALO_REVISION_SEGUNDOS', 0), \
+                mock.patch.object(autocompletar, '_proxima_revision', 0):
+            with self.assertNumQueries(1):
+                self.assertEqual(self._nombres('caf'), ['Cafetería', 'Café Ñuñoa', 'Cafés Andinos'])
+
+    def test_cambios_sin_indice_construido_se_registran(self):
+        self.producto.nombre = 'Molinillo'
+        self.producto.save()
+
+        self.assertTrue(CambioAutocompletar.objects.filter(
+            tipo='producto', objeto_id=self.producto.id, nombre='Molinillo',
+        ).exists())
+
+    def test_vista(self):
+        response = self.client.get(reverse('proveedores:ajax_autocompletar'), {'q': 'nuñ', 'limite': 'x'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.assertEqual(json.loads(response.content), {'sugerencias': [{
+            'tipo': 'proveedor', 'id': self.cafeteria.id,
+            'nombre': 'Café Ñuñoa', 'proveedor_id': self.cafeteria.id,
+        }]})
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), 'Definir RUN_BENCHMARKS=1 para correr los benchmarks')
+class AutocompletarBenchmark(SimpleTestCase):
+    """Sugerencias sobre 100.000 nombres: la peor consulta debe quedar muy por debajo de 10 ms."""
+
+    NOMBRES = 100000
+    PRESUPUESTO_MS = 10
+
+    def test_benchmark(self):
+        self.addCleanup(autocompletar.descartar)
+        palabras = ['almacén', 'distribuidora', 'café', 'arroz', 'aceite', 'panadería', 'lácteos',
+                    'ferretería', 'bebidas', 'frutas', 'verduras', 'limpieza', 'carnes', 'sur', 'norte']
+        nombres = [
+            ('producto', i, f'{palabras[i % 15].title()} {palabras[i // 15 % 15]} {i}', i // 3)
+            for i in range(self.NOMBRES)
+        ]
+        inicio = time.perf_counter()
+        autocompletar.reconstruir(nombres)
+        construccion = time.perf_counter() - inicio
+
+        prefijos = ['a', 'al', 'ca', 'caf', 'distri', 'sur 9', 'zz', 'panaderia lac', '12345']
+        peor = 0
+        # Sin base de datos: que no toque revisar cambios a mitad del benchmark
+        with mock.patch.object(autocompletar, '_proxima_revision', float('inf')):
+            for prefijo in prefijos * 20:
+                inicio = time.perf_counter()
+                autocompletar.sugerir(prefijo)
+                peor = max(peor, time.perf_counter() - inicio)
+
+        print(f'\nAutocompletar {self.NOMBRES} nombres: índice en {construccion:.2f} s, peor consulta {peor * 1000:.3f} ms')
+        self.assertLess(peor * 1000, self.PRESUPUESTO_MS)
+
+
+class RankingTests(TestCase):
+    """ranking_score: cálculo, recálculo incremental por señales y orden del directorio."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(contadores.volcar_visitas)
+        self.nuevo, self.completo, self.destacado = [_crear_proveedor(i) for i in range(3)]
+        self.destacado.destacado = True
+        self.destacado.save()
+
+    def _puntaje(self, proveedor):
+        proveedor.refresh_from_db(fields=['ranking_score'])
+        return proveedor.ranking_score
+
+    def test_calculo(self):
+        datos = {
+            'destacado': False, 'verificado': False, 'visitas': 0,
+            'contactos_enviados': 0, 'contactos_aceptados': 0,
+            'descripcion': '', 'foto_perfil': '', 'telefono': None, 'sitio_web': None,
+            'facebook': None, 'instagram': None, 'linkedin': None, 'direccion': None,
+            'region': None, 'comuna': None,
+            'total_categorias': 0, 'productos_activos': 0, 'promociones_vigentes': 0,
+        }
+        # Sin historial la tasa de aceptación parte del 50%
+        self.assertEqual(ranking.calcular_puntaje(datos), 10)
+
+        datos.update(verificado=True, visitas=ranking.VISITAS_REFERENCIA * 10, promociones_vigentes=1,
+                     contactos_enviados=8, contactos_aceptados=8)
+        self.assertEqual(ranking.calcular_puntaje(datos), 20 + 20 * 9 / 10 + 15 + 10)
+
+    def test_senales_recalculan(self):
+        antes = self._puntaje(self.completo)
+
+        self.completo.verificado = True
+        self.completo.save(update_fields=['verificado'])
+        self.assertEqual(self._puntaje(self.completo), antes + 20)
+
+        hoy = timezone.now().date()
+        promocion = Promocion.objects.create(
+            proveedor=self.completo, titulo='Oferta', descripcion='2x1',
+            fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=3),
+        )
+        self.assertEqual(self._puntaje(self.completo), antes + 30)
+
+        ProductoServicio.objects.create(proveedor=self.completo, nombre='Arroz', descripcion='5 kg')
+        self.assertGreater(self._puntaje(self.completo), antes + 30)
+
+        promocion.delete()
+        self.assertLess(self._puntaje(self.completo), antes + 30)
+
+        # Campos ajenos al ranking no recalculan
+        with self.assertNumQueries(1):
+            self.completo.save(update_fields=['ultima_conexion'])
+
+    def test_visitas_volcadas_suben_el_puntaje(self):
+        antes = self._puntaje(self.nuevo)
+        contadores.registrar_visita(self.nuevo.id, 50)
+        contadores.volcar_visitas()
+        self.assertGreater(self._puntaje(self.nuevo), antes)
+
+    def test_recalculo_completo(self):
+        Proveedor.objects.filter(id=self.completo.id).update(verificado=True)  # sin señales
+        self.assertEqual(ranking.recalcular_puntajes(lote=2), 1)
+        self.assertEqual(ranking.recalcular_puntajes(lote=2), 0)
+
+    def test_orden_del_directorio(self):
+        Proveedor.objects.filter(id=self.completo.id).update(verificado=True)
+        ranking.recalcular_puntajes()
+
+        with CaptureQueriesContext(connection) as ctx:
+            resultado = busqueda.buscar_proveedores({})
+            ids = [p.id for p in resultado['page_obj']]
+
+        self.assertEqual(ids, [self.destacado.id, self.completo.id, self.nuevo.id])
+        pagina = next(q['sql'] for q in ctx.captured_queries if 'LIMIT' in q['sql'])
+        self.assertIn('ORDER BY "proveedor_proveedor"."ranking_score" DESC', pagina)
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), 'Definir RUN_BENCHMARKS=1 para correr los benchmarks')
+class BusquedaFacetadaBenchmark(TestCase):
+    """Directorio con 50.000 proveedores: búsqueda con facetas sin caché y con caché."""
+
+    PROVEEDORES = 50000
+    PRESUPUESTO_MS = 500  # primera página + conteos de las cuatro facetas, sin caché
+
+    def test_benchmark(self):
+        categorias = CategoriaProveedor.objects.bulk_create(
+            [CategoriaProveedor(nombre=f'Rubro {i}') for i in range(20)]
+        )
+        comunas = [codigo for codigo, _ in geo.COMUNAS_CHOICES if codigo]
+        coberturas = [codigo for codigo, _ in Proveedor.COBERTURA_CHOICES]
+        proveedores = []
+        for i in range(self.PROVEEDORES):
+            comuna = comunas[i % len(comunas)]
+            proveedores.append(Proveedor(
+                email=f'bench{i}@example.com', password_hash='x',
+                nombre_contacto=f'Contacto {i}', nombre_empresa=f'Empresa {i}',
+                descripcion='Descripción', whatsapp='+56911111111',
+                pais='CL', region=geo.REGION_DE_COMUNA[comuna],
+                comuna=comuna, cobertura=coberturas[i % len(coberturas)],
+            ))
+        Proveedor.objects.bulk_create(proveedores, batch_size=2000)
+        relacion = Proveedor.categorias.through
+        relacion.objects.bulk_create([
+            relacion(proveedor_id=proveedor_id, categoriaproveedor_id=categorias[i % 20].id)
+            for i, proveedor_id in enumerate(Proveedor.objects.values_list('id', flat=True))
+        ], batch_size=5000)
+
+        params = {'region': 'CL-RM', 'cobertura': 'local'}
+        busqueda.invalidar_facetas()
+        inicio = time.perf_counter()
+        list(busqueda.buscar_proveedores(params)['page_obj'])
+        sin_cache = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        list(busqueda.buscar_proveedores(params)['page_obj'])
+        con_cache = (time.perf_counter() - inicio) * 1000
+
+        print(f'\nDirectorio {self.PROVEEDORES} proveedores: sin caché {sin_cache:.1f} ms, con caché {con_cache:.1f} ms')
+        self.assertLess(sin_cache, self.PRESUPUESTO_MS)
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), 'Definir RUN_BENCHMARKS=1 para correr los benchmarks')
+class DirectorioGeoBenchmark(TestCase):
+    """Render de una página de 12 tarjetas del directorio: búsqueda lineal vs índices de geo."""
+
+    ITERACIONES = 300
+
+    @staticmethod
+    def _lineal(choices, campo):
+        def metodo(self):
+            for codigo, nombre in choices:
+                if codigo == getattr(self, campo):
+                    return nombre
+            return getattr(self, campo)
+        return metodo
+
+    def _render(self, contexto, request):
+        inicio = time.perf_counter()
+        for _ in range(self.ITERACIONES):
+            render_to_string('proveedores/directorio.html', contexto, request=request)
+        return (time.perf_counter() - inicio) / self.ITERACIONES
+
+    def test_benchmark(self):
+        comunas = [codigo for codigo, _ in geo.COMUNAS_CHOICES if codigo]
+        regiones = [codigo for codigo, _ in geo.REGIONES_CHOICES if codigo]
+        for i in range(12):
+            proveedor = _crear_proveedor(i)
+            # Las últimas entradas son el peor caso de la búsqueda lineal
+            proveedor.pais = 'CL'
+            proveedor.region = regiones[-1 - i % 3]
+            proveedor.comuna = comunas[-1 - i]
+            proveedor.save()
+        page_obj = Paginator(list(Proveedor.objects.prefetch_related('categorias')), 12).get_page(1)
+        contexto = {
+            'page_obj': page_obj,
+            'paises': geo.PAISES_CHOICES,
+            'regiones': geo.REGIONES_CHOICES,
+            'comunas': geo.COMUNAS_CHOICES,
+            'coberturas': Proveedor.COBERTURA_CHOICES,
+        }
+        request = RequestFactory().get('/proveedores/')
+
+        # Búsqueda de nombres aislada (las tres llamadas por tarjeta)
+        def nombres():
+            inicio = time.perf_counter()
+            for _ in range(self.ITERACIONES):
+                for proveedor in page_obj:
+                    proveedor.get_pais_display_name()
+                    proveedor.get_region_display_name()
+                    proveedor.get_comuna_display_name()
+            return (time.perf_counter() - inicio) / self.ITERACIONES
+
+        lineales = {
+            'get_pais_display_name': self._lineal(geo.PAISES_CHOICES, 'pais'),
+            'get_region_display_name': self._lineal(geo.REGIONES_CHOICES, 'region'),
+            'get_comuna_display_name': self._lineal(geo.COMUNAS_CHOICES, 'comuna'),
+        }
+        with mock.patch.multiple(Proveedor, **lineales):
+            render_antes = self._render(contexto, request)
+            nombres_antes = nombres()
+        render_despues = self._render(contexto, request)
+        nombres_despues = nombres()
+
+        print(f'\nRender 12 tarjetas: lineal {render_antes * 1000:.3f} ms, índices {render_despues * 1000:.3f} ms')
+        print(f'Nombres (3 por tarjeta): lineal {nombres_antes * 1e6:.1f} µs, índices {nombres_despues * 1e6:.1f} µs')
+
+
+class GeoJsonTests(SimpleTestCase):
+    """Árbol geográfico versionado: ETag, caché de larga duración y 304."""
+
+    def test_arbol_versionado(self):
+        url = reverse('proveedores:ajax_geo')
+        response = self.client.get(url, {'v': geo.GEO_VERSION})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{geo.GEO_VERSION}"')
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+        data = json.loads(response.content)
+        self.assertEqual(len(data['regiones']['CL']), 16)
+        self.assertEqual(data['comunas']['CL-AP'][0], {'id': 'AP-Arica', 'nombre': 'Arica'})
+
+        sin_version = self.client.get(url)
+        self.assertIn('max-age=86400', sin_version['Cache-Control'])
+        self.assertNotIn('immutable', sin_version['Cache-Control'])
+
+    def test_responde_304_si_el_cliente_esta_al_dia(self):
+        for nombre, params in (
+            ('ajax_geo', {'v': geo.GEO_VERSION}),
+            ('ajax_regiones', {'pais_id': 'CL'}),
+            ('get_comunas_ajax', {'region_id': 'CL-RM'}),
+        ):
+            with self.subTest(vista=nombre):
+                response = self.client.get(
+                    reverse(f'proveedores:{nombre}'), params,
+                    HTTP_IF_NONE_MATCH=f'"{geo.GEO_VERSION}"',
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertIn('max-age', response['Cache-Control'])
+
+                response = self.client.get(
+                    reverse(f'proveedores:{nombre}'), params, HTTP_IF_NONE_MATCH='"viejo"'
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_fuerte_sin_comprimir(self):
+        # La compresión la hace el servidor web; Django entrega el ETag tal cual
+        response = self.client.get(reverse('proveedores:ajax_geo'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['ETag'], f'"{geo.GEO_VERSION}"')
+        self.assertEqual(response.content, geo.ARBOL_GEO_JSON)
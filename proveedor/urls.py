@@ -22,6 +22,7 @@ urlpatterns = [
     # ==================== PRODUCTOS ====================
     path('productos/', views.lista_productos, name='lista_productos'),
     path('productos/crear/', views.crear_producto, name='crear_producto'),
+    path('productos/importar/', views.importar_productos_view, name='importar_productos'),
     path('productos/<int:producto_id>/editar/', views.editar_producto, name='editar_producto'),
     path('productos/<int:producto_id>/eliminar/', views.eliminar_producto, name='eliminar_producto'),
     path('productos/<int:producto_id>/toggle-destacado/', views.toggle_destacado_producto, name='toggle_destacado_producto'),
@@ -36,8 +37,13 @@ urlpatterns = [
     path('solicitudes/enviar/', views.enviar_solicitud_contacto, name='enviar_solicitud_contacto'),
     path('solicitudes/', views.mis_solicitudes, name='mis_solicitudes'),
     
+    # ==================== EXPORTACIONES ====================
+    path('exportar/<str:tipo>/', views.exportar_catalogo, name='exportar_catalogo'),
+    
     # ==================== AJAX ====================
     path('ajax/comunas/', views.get_comunas_ajax, name='get_comunas_ajax'),
     path('ajax/regiones/', views.get_regiones_ajax, name='ajax_regiones'),
+    path('ajax/geo.json', views.get_geo_json, name='ajax_geo'),
+    path('ajax/autocompletar/', views.autocompletar_directorio, name='ajax_autocompletar'),
     
 ]
\ No newline at end of file
@@ -1,5 +1,7 @@
 # proveedores/views.py
-from django.http import JsonResponse
+from functools import wraps
+
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.hashers import check_password, make_password
@@ -7,20 +9,18 @@ from django.db.models import Q
 from django.core.paginator import Paginator
 from django.utils import timezone
 from django.db import IntegrityError
-from django.views.decorators.http import require_POST
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import etag, require_POST
 
 from .models import (
     Proveedor,
     SolicitudContacto,
     ProductoServicio,
     Promocion,
-    CategoriaProveedor,
     PAISES_CHOICES,
-    REGIONES_CHOICES,
-    COMUNAS_CHOICES,
-    REGIONES_POR_PAIS,
-    COMUNAS_POR_REGION,
 )
+from .geo import ARBOL_GEO_JSON, GEO_VERSION, regiones_de_pais, comunas_de_region
 from .forms import (
     LoginProveedorForm,
     RegistroProveedorForm,
@@ -28,8 +28,16 @@ from .forms import (
     ProductoServicioForm,
     PromocionForm,
     SolicitudContactoForm,
+    ImportarProductosForm,
 )
 from .decorators import proveedor_login_required
+from .busqueda import buscar_proveedores
+from .autocompletar import LIMITE_MAXIMO, LIMITE_POR_DEFECTO, sugerir
+from .contadores import VENTANAS_ESTADISTICAS, registrar_contacto, serie_diaria
+from .estadisticas import estadisticas_panel
+from .importacion import COLUMNAS_OBLIGATORIAS, ErrorImportacion, importar_productos
+from .exportacion import EXPORTACIONES_CATALOGO, respuesta_exportacion
+from usuarios.middleware import obtener_proveedor, reiniciar_usuario_sesion
 
 
 # ==================== FUNCIÓN HELPER ====================
@@ -38,14 +46,9 @@ def get_current_proveedor(request):
     """
     Obtiene el proveedor actual desde la sesión.
     Reemplaza la variable global current_logged_in_proveedor.
+    Se resuelve una sola vez por request (ver UsuarioSesionMiddleware).
     """
-    proveedor_id = request.session.get('proveedor_id')
-    if not proveedor_id:
-        return None
-    try:
-        return Proveedor.objects.get(id=proveedor_id)
-    except Proveedor.DoesNotExist:
-        return None
+    return obtener_proveedor(request)
 
 
 # ==================== AUTENTICACIÓN ====================
@@ -71,6 +74,7 @@ def login_proveedor_view(request):
                     request.session['proveedor_id'] = proveedor.id
                     request.session['proveedor_email'] = proveedor.email
                     request.session['proveedor_nombre'] = proveedor.nombre_empresa
+                    reiniciar_usuario_sesion(request)
                     
                     messages.success(request, f'¡Bienvenido {proveedor.nombre_empresa}!')
                     return redirect('proveedores:dashboard_proveedor')
@@ -109,6 +113,7 @@ def registro_proveedor_view(request):
                 request.session['proveedor_id'] = proveedor.id
                 request.session['proveedor_email'] = proveedor.email
                 request.session['proveedor_nombre'] = proveedor.nombre_empresa
+                reiniciar_usuario_sesion(request)
                 
                 messages.success(request, f'¡Registro exitoso! Bienvenido {proveedor.nombre_empresa}.')
                 return redirect('proveedores:dashboard_proveedor')
@@ -125,7 +130,7 @@ def registro_proveedor_view(request):
     else:
         form = RegistroProveedorForm()
     
-    return render(request, 'proveedores/registro.html', {'form': form})
+    return render(request, 'proveedores/registro.html', {'form': form, 'geo_url': geo_url()})
 
 
 def logout_proveedor_view(request):
@@ -135,6 +140,7 @@ def logout_proveedor_view(request):
     
     # ✅ LIMPIAR TODA LA SESIÓN
     request.session.flush()
+    reiniciar_usuario_sesion(request)
     
     messages.success(request, f'¡Hasta luego, {proveedor_nombre}! Sesión cerrada correctamente.')
     
@@ -144,63 +150,25 @@ def logout_proveedor_view(request):
 # ==================== VISTAS PÚBLICAS ====================
 
 def directorio_proveedores(request):
-    """Vista del directorio público de proveedores con filtros"""
-    proveedores = Proveedor.objects.filter(activo=True).prefetch_related('categorias')
-
-    # Filtros desde GET
-    categoria_id = request.GET.get('categoria')
-    pais = request.GET.get('pais')
-    region = request.GET.get('region')
-    comuna = request.GET.get('comuna')
-    cobertura = request.GET.get('cobertura')
-    busqueda = request.GET.get('q')
-
-    if categoria_id:
-        proveedores = proveedores.filter(categorias__id=categoria_id)
-
-    if pais:
-        proveedores = proveedores.filter(pais=pais)
-
-    if region:
-        proveedores = proveedores.filter(region=region)
-
-    if comuna:
-        proveedores = proveedores.filter(comuna=comuna)
-
-    if cobertura:
-        proveedores = proveedores.filter(cobertura=cobertura)
-
-    if busqueda:
-        proveedores = proveedores.filter(
-            Q(nombre_empresa__icontains=busqueda) |
-            Q(descripcion__icontains=busqueda)
-        )
-
-    # Ordenar: destacados primero, luego por fecha
-    proveedores = proveedores.order_by('-destacado', '-fecha_registro')
+    """Vista del directorio público de proveedores con filtros y conteos por faceta"""
+    resultado = buscar_proveedores(request.GET, pagina=request.GET.get('page'))
+    filtros = resultado['filtros']
 
-    # Paginación
-    paginator = Paginator(proveedores, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    # Datos para filtros
-    categorias = CategoriaProveedor.objects.filter(activo=True)
-    coberturas = Proveedor.COBERTURA_CHOICES
+    # Filtros actuales para los links de paginación
+    filtros_query = request.GET.copy()
+    filtros_query.pop('page', None)
 
     context = {
-        'page_obj': page_obj,
-        'categorias': categorias,
+        'page_obj': resultado['page_obj'],
+        'facetas': resultado['facetas'],
+        'filtros_query': filtros_query.urlencode(),
         'paises': PAISES_CHOICES,
-        'regiones': REGIONES_CHOICES,
-        'comunas': COMUNAS_CHOICES,
-        'coberturas': coberturas,
-        'categoria_seleccionada': categoria_id,
-        'pais_seleccionado': pais,
-        'region_seleccionada': region,
-        'comuna_seleccionada': comuna,
-        'cobertura_seleccionada': cobertura,
-        'busqueda': busqueda,
+        'categoria_seleccionada': filtros.get('categoria'),
+        'pais_seleccionado': filtros.get('pais'),
+        'region_seleccionada': filtros.get('region'),
+        'comuna_seleccionada': filtros.get('comuna'),
+        'cobertura_seleccionada': filtros.get('cobertura'),
+        'busqueda': filtros.get('q'),
     }
 
     return render(request, 'proveedores/directorio.html', context)
@@ -251,43 +219,30 @@ def dashboard_proveedor(request):
     """Dashboard del proveedor"""
     proveedor = get_current_proveedor(request)
     
-    # Estadísticas
-    total_productos = ProductoServicio.objects.filter(proveedor=proveedor).count()
-    productos_activos = ProductoServicio.objects.filter(proveedor=proveedor, activo=True).count()
-
-    hoy = timezone.now().date()
-    promociones_activas = Promocion.objects.filter(
-        proveedor=proveedor,
-        activo=True,
-        fecha_inicio__lte=hoy,
-        fecha_fin__gte=hoy
-    ).count()
+    # Contadores y listas del panel (en caché; ver proveedor.estadisticas)
+    estadisticas = estadisticas_panel(proveedor.id)
 
-    solicitudes_pendientes = SolicitudContacto.objects.filter(
-        proveedor=proveedor,
-        estado='pendiente'
-    ).count()
-
-    # Productos recientes
-    productos_recientes = ProductoServicio.objects.filter(
-        proveedor=proveedor
-    ).order_by('-fecha_creacion')[:5]
-
-    # Promociones próximas a vencer
-    promociones_proximas = Promocion.objects.filter(
-        proveedor=proveedor,
-        activo=True,
-        fecha_fin__gte=hoy
-    ).order_by('fecha_fin')[:5]
+    # Tendencia de los últimos 7/30/90 días (filas pre-agregadas por día)
+    try:
+        dias = int(request.GET.get('dias', 30))
+    except ValueError:
+        dias = 30
+    if dias not in VENTANAS_ESTADISTICAS:
+        dias = 30
+    serie = serie_diaria(proveedor, dias)
+    max_visitas = max(dia['visitas'] for dia in serie) or 1
+    for dia in serie:
+        dia['altura'] = round(dia['visitas'] * 100 / max_visitas)
 
     context = {
         'proveedor': proveedor,
-        'total_productos': total_productos,
-        'productos_activos': productos_activos,
-        'promociones_activas': promociones_activas,
-        'solicitudes_pendientes': solicitudes_pendientes,
-        'productos_recientes': productos_recientes,
-        'promociones_proximas': promociones_proximas,
+        'serie_diaria': serie,
+        'dias_estadisticas': dias,
+        'ventanas_estadisticas': VENTANAS_ESTADISTICAS,
+        'visitas_periodo': sum(dia['visitas'] for dia in serie),
+        'contactos_periodo': sum(dia['contactos_enviados'] for dia in serie),
+        'aceptados_periodo': sum(dia['contactos_aceptados'] for dia in serie),
+        **estadisticas,
     }
     return render(request, 'proveedores/dashboard.html', context)
 
@@ -311,7 +266,7 @@ def editar_perfil_proveedor(request):
     else:
         form = ProveedorForm(instance=proveedor)
 
-    context = {'form': form, 'proveedor': proveedor}
+    context = {'form': form, 'proveedor': proveedor, 'geo_url': geo_url()}
     return render(request, 'proveedores/editar_perfil.html', context)
 
 
@@ -434,6 +389,49 @@ def eliminar_producto(request, producto_id):
     return render(request, 'proveedores/productos/eliminar.html', context)
 
 
+@proveedor_login_required
+def importar_productos_view(request):
+    """Importación masiva del catálogo desde CSV o XLSX"""
+    proveedor = get_current_proveedor(request)
+    resultado = None
+
+    if request.method == 'POST':
+        form = ImportarProductosForm(request.POST, request.FILES)
+        if form.is_valid():
+            archivo = form.cleaned_data['archivo']
+            try:
+                resultado = importar_productos(proveedor, archivo, archivo.name)
+            except ErrorImportacion as e:
+                messages.error(request, str(e))
+            else:
+                if resultado['total_errores']:
+                    messages.warning(request, f"{resultado['total_errores']} filas no se importaron; revisa el detalle.")
+                else:
+                    messages.success(request, 'Catálogo importado exitosamente.')
+        else:
+            messages.error(request, "Hay errores en el formulario.")
+    else:
+        form = ImportarProductosForm()
+
+    context = {
+        'form': form,
+        'proveedor': proveedor,
+        'resultado': resultado,
+        'columnas_obligatorias': COLUMNAS_OBLIGATORIAS,
+    }
+    return render(request, 'proveedores/productos/importar.html', context)
+
+
+@proveedor_login_required
+def exportar_catalogo(request, tipo):
+    """Descarga de todos los productos o promociones del proveedor (?formato=csv|jsonl)"""
+    if tipo not in EXPORTACIONES_CATALOGO:
+        raise Http404('Exportación no disponible')
+    proveedor = get_current_proveedor(request)
+    columnas, queryset = EXPORTACIONES_CATALOGO[tipo](proveedor.id)
+    return respuesta_exportacion(f'{tipo}-{proveedor.id}', request.GET.get('formato', 'csv'), columnas, queryset)
+
+
 # ==================== GESTIÓN DE PROMOCIONES ====================
 
 @proveedor_login_required
@@ -562,6 +560,7 @@ def enviar_solicitud_contacto(request, comercio_id=None):
                 
                 proveedor.contactos_enviados += 1
                 proveedor.save(update_fields=['contactos_enviados'])
+                registrar_contacto(proveedor.id, 'contactos_enviados')
                 
                 messages.success(request, 'Solicitud enviada exitosamente.')
                 return redirect('proveedores:mis_solicitudes')
@@ -653,32 +652,75 @@ def toggle_destacado_producto(request, producto_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
+# Caché del navegador para los datos geográficos: un año si la URL trae la
+# versión vigente (?v=GEO_VERSION), si no un día y luego revalidar con el ETag
+GEO_CACHE_VERSIONADO = 60 * 60 * 24 * 365
+GEO_CACHE_SIN_VERSION = 60 * 60 * 24
+
+
+def geo_url():
+    """URL versionada del árbol geográfico completo (para los templates)."""
+    return f"{reverse('proveedores:ajax_geo')}?v={GEO_VERSION}"
+
+
+def cache_geo(view_func):
+    """ETag = versión de los datos (responde 304) y Cache-Control de larga duración."""
+    vista_condicional = etag(lambda request, *args, **kwargs: GEO_VERSION)(view_func)
+
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        response = vista_condicional(request, *args, **kwargs)
+        if request.GET.get('v') == GEO_VERSION:
+            patch_cache_control(response, public=True, max_age=GEO_CACHE_VERSIONADO, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=GEO_CACHE_SIN_VERSION)
+        return response
+    return _wrapped_view
+
+
+# Sin gzip_page: comprimir aquí cambia el ETag fuerte por uno débil (W/"...").
+# La compresión queda en el servidor web, delante de Django.
+@cache_geo
+def get_geo_json(request):
+    """Árbol completo país → regiones → comunas en un solo documento JSON"""
+    return HttpResponse(ARBOL_GEO_JSON, content_type='application/json')
+
+
+@cache_geo
 def get_regiones_ajax(request):
     """Vista AJAX para obtener regiones de un país"""
     pais_code = request.GET.get('pais_id')
-    
-    if pais_code and pais_code in REGIONES_POR_PAIS:
-        regiones = [
-            {'id': codigo, 'nombre': nombre}
-            for codigo, nombre in REGIONES_POR_PAIS[pais_code]
-        ]
-        return JsonResponse({'regiones': regiones})
-    
-    return JsonResponse({'regiones': []})
+    regiones = [
+        {'id': codigo, 'nombre': nombre}
+        for codigo, nombre in regiones_de_pais(pais_code)
+    ]
+    return JsonResponse({'regiones': regiones})
 
 
+@cache_geo
 def get_comunas_ajax(request):
     """Vista AJAX para obtener comunas de una región"""
     region_code = request.GET.get('region_id')
-    
-    if region_code and region_code in COMUNAS_POR_REGION:
-        comunas = [
-            {'id': codigo, 'nombre': nombre}
-            for codigo, nombre in COMUNAS_POR_REGION[region_code]
-        ]
-        return JsonResponse({'comunas': comunas})
-    
-    return JsonResponse({'comunas': []})
+    comunas = [
+        {'id': codigo, 'nombre': nombre}
+        for codigo, nombre in comunas_de_region(region_code)
+    ]
+    return JsonResponse({'comunas': comunas})
+
+
+# Las sugerencias cambian poco: el navegador puede reutilizarlas un minuto
+AUTOCOMPLETAR_CACHE_SEGUNDOS = 60
+
+
+def autocompletar_directorio(request):
+    """Vista AJAX con sugerencias para el buscador del directorio"""
+    try:
+        limite = min(int(request.GET.get('limite', LIMITE_POR_DEFECTO)), LIMITE_MAXIMO)
+    except ValueError:
+        limite = LIMITE_POR_DEFECTO
+    response = JsonResponse({'sugerencias': sugerir(request.GET.get('q', ''), max(limite, 1))})
+    patch_cache_control(response, public=True, max_age=AUTOCOMPLETAR_CACHE_SEGUNDOS)
+    return response
 
 
 @proveedor_login_required
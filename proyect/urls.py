@@ -1,9 +1,12 @@
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings 
 from django.conf.urls.static import static
 
+from usuarios.almacenamiento import CARPETA_CONTENIDO
+from usuarios.views import media_inmutable
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('allauth.urls')),  
@@ -14,5 +17,8 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
+    urlpatterns += [
+        re_path(rf'^{settings.MEDIA_URL.lstrip("/")}{CARPETA_CONTENIDO}/(?P<path>.*)$', media_inmutable),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
@@ -23,7 +23,7 @@ class ComercianteAdmin(admin.ModelAdmin):
     )
     list_filter = (
         'rol',
-        'comuna',
+        'region',
         'es_proveedor',
         'relacion_negocio',
         'tipo_negocio',
@@ -34,7 +34,7 @@ class ComercianteAdmin(admin.ModelAdmin):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('titulo', 'comerciante', 'categoria', 'fecha_publicacion')
+    list_display = ('titulo', 'comerciante', 'categoria', 'fecha_publicacion', 'comentarios_count')
     list_filter = ('categoria', 'fecha_publicacion')
     search_fields = ('titulo', 'contenido', 'comerciante__nombre_apellido')
 
@@ -0,0 +1,251 @@
+# usuarios/almacenamiento.py
+"""
+Almacenamiento de media direccionado por contenido.
+
+Cada archivo se guarda una sola vez, con el SHA-256 de su contenido como
+nombre, en CARPETA_CONTENIDO/<2 primeros caracteres>/<hash>.<ext>. El
+nombre que queda en el modelo conserva el prefijo de `upload_to` como
+espacio lógico (p. ej. 'productos/<hash>.jpg'), así que la misma foto
+subida como producto y como perfil ocupa un solo archivo en disco. Cada
+archivo físico tiene una fila ArchivoMedia con cuántos nombres lo usan:
+save() suma una referencia y delete() la resta; el archivo se borra
+cuando llega a cero. La fila hace de candado: save() la bloquea (o la crea)
+antes de ver si el archivo existe, y el borrado del archivo huérfano
+bloquea la misma fila y revisa ahí que siga sin referencias, así una
+subida y un borrado del mismo contenido no se cruzan.
+
+Como el contenido de una URL nunca cambia, se puede servir con
+Cache-Control immutable (vista media_inmutable en desarrollo; en
+producción el servidor web debe hacer lo mismo con MEDIA_URL + CARPETA_CONTENIDO).
+
+Los nombres anteriores a este almacenamiento siguen funcionando como en
+FileSystemStorage. El comando `migrar_media_por_contenido` los convierte
+y recalcula las referencias.
+"""
+import hashlib
+import os
+import re
+from collections import Counter
+from datetime import timedelta
+from urllib.parse import unquote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+CARPETA_CONTENIDO = 'contenido'
+
+# Lo subido hace menos que esto no se considera huérfano al recontar
+MARGEN_SUBIDAS_SEGUNDOS = 3600
+
+# Campos que guardan la URL pública de un archivo subido en vez de su nombre
+CAMPOS_URL_MEDIA = [('usuarios.Post', 'imagen_url')]
+
+_NOMBRE_POR_CONTENIDO = re.compile(r'^(?P<hash>[0-9a-f]{64})(?P<ext>\.[a-z0-9]{1,10})?$')
+
+
+def extension(nombre):
+    ext = os.path.splitext(nombre)[1].lower()
+    return ext if re.fullmatch(r'\.[a-z0-9]{1,10}', ext) else ''
+
+
+def ruta_de_contenido(nombre):
+    """Ruta física del archivo si `nombre` es direccionado por contenido, o None."""
+    coincidencia = _NOMBRE_POR_CONTENIDO.match(os.path.basename(nombre or ''))
+    if not coincidencia:
+        return None
+    digest = coincidencia['hash']
+    return f'{CARPETA_CONTENIDO}/{digest[:2]}/{digest}{coincidencia["ext"] or ""}'
+
+
+def _archivos():
+    return apps.get_model('usuarios', 'ArchivoMedia').objects
+
+
+class AlmacenamientoPorContenido(FileSystemStorage):
+
+    def path(self, name):
+        return super().path(ruta_de_contenido(name) or name)
+
+    def url(self, name):
+        return super().url(ruta_de_contenido(name) or name)
+
+    def _save(self, name, content):
+        sha = hashlib.sha256()
+        for bloque in content.chunks():
+            sha.update(bloque)
+        digest = sha.hexdigest()
+        ext = extension(name)
+        ruta = f'{CARPETA_CONTENIDO}/{digest[:2]}/{digest}{ext}'
+
+        with transaction.atomic():
+            self.referenciar(ruta, content.size)
+            if not os.path.exists(self.path(ruta)):
+                content.seek(0)
+                guardado = super()._save(ruta, content)
+                if guardado != ruta:
+                    # Quedó un archivo a medio escribir con ese nombre
+                    super().delete(guardado)
+        return f'{os.path.dirname(name)}/{digest}{ext}'.lstrip('/')
+
+    def referenciar(self, nombre, tamano=0):
+        """
+        Suma una referencia al archivo de `nombre`, creando su fila si no
+        existe. La fila queda bloqueada hasta el fin de la transacción.
+        """
+        ruta = ruta_de_contenido(nombre)
+        archivo, creado = _archivos().select_for_update().get_or_create(
+            ruta=ruta, defaults={'tamano': tamano, 'referencias': 1},
+        )
+        if not creado:
+            _archivos().filter(pk=archivo.pk).update(referencias=F('referencias') + 1)
+
+    def delete(self, name):
+        ruta = ruta_de_contenido(name)
+        if ruta is None:
+            return super().delete(name)
+        with transaction.atomic():
+            archivo = _archivos().select_for_update().filter(ruta=ruta).first()
+            if archivo is None or archivo.referencias == 0:
+                return
+            _archivos().filter(pk=archivo.pk).update(referencias=F('referencias') - 1)
+        if archivo.referencias == 1:
+            # Tras confirmar, y solo si nadie lo volvió a subir mientras tanto
+            transaction.on_commit(lambda: self._borrar_si_huerfano(ruta))
+
+    def _borrar_si_huerfano(self, ruta):
+        with transaction.atomic():
+            archivo = _archivos().select_for_update().filter(ruta=ruta).first()
+            if archivo is not None and archivo.referencias == 0:
+                archivo.delete()
+                super().delete(ruta)
+
+
+# ==================== REFERENCIAS ====================
+
+def campos_de_archivo():
+    """(modelo, campo) de cada FileField que usa el almacenamiento por defecto."""
+    for modelo in apps.get_models():
+        for campo in modelo._meta.concrete_fields:
+            if isinstance(campo, models.FileField) and campo.storage is default_storage:
+                yield modelo, campo
+
+
+def nombre_de_url(url):
+    """Nombre en el almacenamiento de una URL bajo MEDIA_URL, o None."""
+    if url and url.startswith(settings.MEDIA_URL):
+        return unquote(url[len(settings.MEDIA_URL):])
+    return None
+
+
+def referencias_en_uso():
+    """Counter de rutas físicas usadas por los modelos (archivos, URLs y variantes de imágenes)."""
+    from .imagenes import IMAGENES, campo_variantes
+
+    en_uso = Counter()
+    for modelo, campo in campos_de_archivo():
+        for nombre in modelo.objects.exclude(**{campo.attname: ''}).values_list(campo.attname, flat=True).iterator():
+            en_uso[ruta_de_contenido(nombre)] += 1
+    for etiqueta, campo in CAMPOS_URL_MEDIA:
+        for url in apps.get_model(etiqueta).objects.values_list(campo, flat=True).iterator():
+            en_uso[ruta_de_contenido(nombre_de_url(url))] += 1
+    for etiqueta, campo in IMAGENES:
+        variantes = apps.get_model(etiqueta).objects.exclude(**{campo_variantes(campo): {}})
+        for datos in variantes.values_list(campo_variantes(campo), flat=True).iterator():
+            for formato in ('webp', 'respaldo'):
+                for nombre in (datos or {}).get(formato, {}).values():
+                    en_uso[ruta_de_contenido(nombre)] += 1
+    en_uso.pop(None, None)
+    return en_uso
+
+
+def recontar_referencias(storage=None, lote=500):
+    """
+    Recalcula ArchivoMedia.referencias desde los modelos y borra los archivos
+    que nadie usa (p. ej. fotos reemplazadas en un formulario: Django no borra
+    el archivo anterior). No toca lo subido hace menos de MARGEN_SUBIDAS_SEGUNDOS,
+    que puede pertenecer a una fila aún sin confirmar.
+    Retorna (filas actualizadas, archivos borrados).
+    """
+    storage = storage or default_storage
+    limite = timezone.now() - timedelta(seconds=MARGEN_SUBIDAS_SEGUNDOS)
+    en_uso = referencias_en_uso()
+    registrados = dict(_archivos().values_list('ruta', 'referencias'))
+
+    actualizados = 0
+    for ruta, referencias in en_uso.items():
+        if ruta not in registrados:
+            if storage.exists(ruta):
+                _archivos().create(ruta=ruta, tamano=storage.size(ruta), referencias=referencias)
+                actualizados += 1
+        elif registrados[ruta] != referencias:
+            _archivos().filter(ruta=ruta).update(referencias=referencias)
+            actualizados += 1
+    sobrantes = [ruta for ruta in registrados if ruta not in en_uso]
+    for i in range(0, len(sobrantes), lote):
+        _archivos().filter(ruta__in=sobrantes[i:i + lote], creado__lt=limite).delete()
+
+    borrados = 0
+    for carpeta, _, archivos in os.walk(storage.path(CARPETA_CONTENIDO)):
+        for archivo in archivos:
+            ruta_completa = os.path.join(carpeta, archivo)
+            ruta = os.path.relpath(ruta_completa, storage.location).replace(os.sep, '/')
+            if ruta not in en_uso and os.path.getmtime(ruta_completa) < limite.timestamp():
+                os.remove(ruta_completa)
+                borrados += 1
+    return actualizados, borrados
+
+
+# ==================== MIGRACIÓN ====================
+
+def migrar_nombres_anteriores(conservar=False, storage=None):
+    """
+    Pasa los archivos guardados con nombres anteriores (FileField y
+    CAMPOS_URL_MEDIA) al almacenamiento por contenido y actualiza las filas.
+    Los archivos anteriores se borran salvo `conservar`. Las referencias
+    quedan por recalcular (recontar_referencias). Retorna
+    {'migrados', 'faltantes', 'filas'}.
+    """
+    storage = storage or default_storage
+    resultado = {'migrados': 0, 'faltantes': 0, 'filas': 0}
+    nuevos = {}  # nombre anterior -> nombre por contenido
+
+    def migrar(nombre):
+        if nombre not in nuevos:
+            if not storage.exists(nombre):
+                resultado['faltantes'] += 1
+                nuevos[nombre] = None
+            else:
+                with storage.open(nombre, 'rb') as archivo:
+                    nuevos[nombre] = storage.save(nombre, archivo)
+                resultado['migrados'] += 1
+        return nuevos[nombre]
+
+    def pendiente(nombre, campo=None):
+        return nombre and ruta_de_contenido(nombre) is None and (campo is None or nombre != campo.default)
+
+    for modelo, campo in campos_de_archivo():
+        filas = modelo.objects.exclude(**{campo.attname: ''}).values_list('pk', campo.attname)
+        for pk, nombre in list(filas.iterator()):
+            if pendiente(nombre, campo) and migrar(nombre):
+                resultado['filas'] += modelo.objects.filter(
+                    pk=pk, **{campo.attname: nombre}
+                ).update(**{campo.attname: nuevos[nombre]})
+
+    for etiqueta, campo in CAMPOS_URL_MEDIA:
+        modelo = apps.get_model(etiqueta)
+        for pk, url in list(modelo.objects.values_list('pk', campo).iterator()):
+            nombre = nombre_de_url(url)
+            if pendiente(nombre) and migrar(nombre):
+                resultado['filas'] += modelo.objects.filter(
+                    pk=pk, **{campo: url}
+                ).update(**{campo: storage.url(nuevos[nombre])})
+
+    if not conservar:
+        for nombre, nuevo in nuevos.items():
+            if nuevo:
+                storage.delete(nombre)
+    return resultado
@@ -3,28 +3,13 @@
 def comerciante_context(request):
     """
     Context processor que hace disponible el comerciante logueado
-    en todos los templates de la app usuarios
+    en todos los templates de la app usuarios.
+
+    Usa el objeto perezoso de UsuarioSesionMiddleware: si el template no
+    usa al comerciante no se consulta la base de datos.
     """
-    comerciante_id = request.session.get('comerciante_id')
-    
-    if comerciante_id:
-        try:
-            from usuarios.models import Comerciante
-            comerciante = Comerciante.objects.get(id=comerciante_id)
-            return {
-                'current_logged_in_comerciante': comerciante,
-                'comerciante': comerciante,  # Por compatibilidad
-            }
-        except Comerciante.DoesNotExist:
-            # Limpiar sesión si el comerciante ya no existe
-            if 'comerciante_id' in request.session:
-                del request.session['comerciante_id']
-            return {
-                'current_logged_in_comerciante': None,
-                'comerciante': None,
-            }
-    
+    comerciante = getattr(request, 'comerciante', None)
     return {
-        'current_logged_in_comerciante': None,
-        'comerciante': None,
+        'current_logged_in_comerciante': comerciante,
+        'comerciante': comerciante,  # Por compatibilidad
     }
\ No newline at end of file
@@ -7,16 +7,10 @@ from .models import (
     RELACION_NEGOCIO_CHOICES, TIPO_NEGOCIO_CHOICES, 
     CATEGORIA_POST_CHOICES, INTERESTS_CHOICES
 ) 
-# Opciones de comuna
-COMUNA_CHOICES = [
-    ('', 'Selecciona tu comuna'),
-    ('ARICA', 'Arica'),
-    ('SANTIAGO', 'Santiago'),
-    ('PROVIDENCIA', 'Providencia'),
-    ('LA_SERENA', 'La Serena'),
-    ('VALPARAISO', 'Valparaíso'),
-    ('OTRO_COMUNA', '...'),
-]
+from proveedor.geo import COMUNAS_AGRUPADAS_CHOICES
+
+# Opciones de comuna: los códigos canónicos de proveedor.geo, agrupados por región
+COMUNA_CHOICES = [('', 'Selecciona tu comuna'), *COMUNAS_AGRUPADAS_CHOICES]
 
 class RegistroComercianteForm(forms.ModelForm):
     password = forms.CharField(
@@ -232,6 +226,12 @@ class ProfilePhotoForm(forms.ModelForm):
         
 class BusinessDataForm(forms.ModelForm):
     """Formulario para actualizar los datos del negocio (Relación, Tipo, Comuna, Nombre)."""
+    comuna = forms.ChoiceField(
+        choices=COMUNA_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-primary focus:border-primary dark:bg-gray-700 dark:text-white'}),
+    )
+
     class Meta:
         model = Comerciante
         fields = ['relacion_negocio', 'tipo_negocio', 'comuna', 'nombre_negocio']
@@ -239,7 +239,6 @@ class BusinessDataForm(forms.ModelForm):
         widgets = {
             'relacion_negocio': forms.Select(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-primary focus:border-primary dark:bg-gray-700 dark:text-white'}),
             'tipo_negocio': forms.Select(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-primary focus:border-primary dark:bg-gray-700 dark:text-white'}),
-            'comuna': forms.TextInput(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-primary focus:border-primary dark:bg-gray-700 dark:text-white', 'placeholder': 'Ej: Estación Central'}),
             'nombre_negocio': forms.TextInput(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-primary focus:border-primary dark:bg-gray-700 dark:text-white', 'placeholder': 'Ej: Minimarket El Sol'}),
         }
 
@@ -0,0 +1,253 @@
+# usuarios/imagenes.py
+"""
+Variantes reducidas de las imágenes subidas (avatares, logos, productos,
+promociones, beneficios e imágenes del foro).
+
+Al guardar un modelo con una imagen nueva, su procesamiento se encola al
+confirmar la transacción y un hilo en segundo plano genera, por cada ancho
+de IMAGENES, una versión WebP y una de respaldo (JPEG, o PNG si la imagen
+tiene transparencia) bajo CARPETA_VARIANTES. El resultado se guarda en el
+campo JSON `<campo>_variantes` del mismo modelo:
+
+    {'original': 'productos/arroz.png',
+     'webp': {'160': 'variantes/productos/arroz-160.webp', ...},
+     'respaldo': {'160': 'variantes/productos/arroz-160.jpg', ...}}
+
+Los nombres del ejemplo son los pedidos al storage; el almacenamiento por
+contenido (usuarios/almacenamiento.py) los guarda con el hash del archivo.
+Como las variantes viajan con la fila, las plantillas arman el srcset sin
+consultas adicionales (templatetags/imagenes.py). Si las variantes aún no
+existen o corresponden a una imagen anterior, se usa la original.
+
+El comando `generar_variantes_imagenes` procesa las imágenes ya subidas.
+"""
+import io
+import logging
+import os
+import queue
+import threading
+from urllib.parse import unquote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, models, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+CARPETA_VARIANTES = 'variantes'
+
+ANCHOS_AVATAR = (64, 128, 256)
+ANCHOS_TARJETA = (160, 320, 640)
+ANCHOS_CONTENIDO = (320, 640, 1024, 1600)
+
+# (modelo, campo de la imagen) -> anchos. Las variantes van en `<campo>_variantes`.
+IMAGENES = {
+    ('usuarios.Comerciante', 'foto_perfil'): ANCHOS_AVATAR,
+    ('usuarios.Beneficio', 'foto'): ANCHOS_TARJETA,
+    ('usuarios.Post', 'imagen_url'): ANCHOS_CONTENIDO,
+    ('proveedor.Proveedor', 'foto'): ANCHOS_AVATAR,
+    ('proveedor.Proveedor', 'foto_perfil'): ANCHOS_AVATAR,
+    ('proveedor.ProductoServicio', 'imagen'): ANCHOS_TARJETA,
+    ('proveedor.Promocion', 'imagen'): ANCHOS_TARJETA,
+}
+
+CALIDAD_WEBP = 80
+CALIDAD_JPEG = 85
+
+
+def campo_variantes(campo):
+    return f'{campo}_variantes'
+
+
+# ==================== ORIGINAL ====================
+
+def nombre_en_storage(modelo, campo, valor):
+    """
+    Nombre del archivo original en el storage, o None si no hay imagen
+    procesable. Post.imagen_url guarda la URL pública del archivo subido;
+    solo se procesan las que apuntan a MEDIA_URL.
+    """
+    if not valor:
+        return None
+    field = modelo._meta.get_field(campo)
+    if isinstance(field, models.FileField):
+        nombre = getattr(valor, 'name', valor)
+        # La imagen por defecto (p. ej. el avatar de Comerciante) se sirve tal cual
+        return nombre if nombre and nombre != field.default else None
+    if valor.startswith(settings.MEDIA_URL):
+        return unquote(valor[len(settings.MEDIA_URL):])
+    return None
+
+
+def url_original(objeto, campo):
+    valor = getattr(objeto, campo)
+    if not valor:
+        return ''
+    return valor if isinstance(valor, str) else valor.url
+
+
+def variantes_de(objeto, campo):
+    """Variantes vigentes de la imagen de `objeto`, o {} si no hay."""
+    variantes = getattr(objeto, campo_variantes(campo), None) or {}
+    nombre = nombre_en_storage(type(objeto), campo, getattr(objeto, campo))
+    if not nombre or variantes.get('original') != nombre:
+        return {}
+    return variantes
+
+
+# ==================== GENERACIÓN ====================
+
+def _tiene_transparencia(imagen):
+    return imagen.mode in ('RGBA', 'LA', 'PA') or (imagen.mode == 'P' and 'transparency' in imagen.info)
+
+
+def _guardar(storage, nombre, contenido):
+    # Mismo nombre que una versión anterior: se reemplaza en vez de sufijar
+    if storage.exists(nombre):
+        storage.delete(nombre)
+    return storage.save(nombre, ContentFile(contenido))
+
+
+def generar_variantes(nombre, anchos, storage=None):
+    """
+    Genera las variantes de la imagen `nombre` (sin agrandarla) y retorna el
+    dict que se guarda en `<campo>_variantes`.
+    """
+    storage = storage or default_storage
+    with storage.open(nombre, 'rb') as archivo:
+        imagen = Image.open(archivo)
+        # En JPEG decodifica directo a una escala menor: mucho más rápido con fotos grandes
+        imagen.draft('RGB', (max(anchos), max(anchos)))
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen.load()
+
+    transparente = _tiene_transparencia(imagen)
+    imagen = imagen.convert('RGBA' if transparente else 'RGB')
+    formato, extension = ('PNG', 'png') if transparente else ('JPEG', 'jpg')
+    base = f'{CARPETA_VARIANTES}/{os.path.splitext(nombre)[0]}'
+
+    resultado = {'original': nombre, 'webp': {}, 'respaldo': {}}
+    for ancho in sorted({min(ancho, imagen.width) for ancho in anchos}):
+        alto = max(round(imagen.height * ancho / imagen.width), 1)
+        reducida = imagen if ancho == imagen.width else imagen.resize((ancho, alto), Image.LANCZOS)
+
+        webp = io.BytesIO()
+        reducida.save(webp, 'WEBP', quality=CALIDAD_WEBP, method=4)
+        respaldo = io.BytesIO()
+        if formato == 'JPEG':
+            reducida.save(respaldo, 'JPEG', quality=CALIDAD_JPEG, optimize=True, progressive=True)
+        else:
+            reducida.save(respaldo, 'PNG', optimize=True)
+
+        resultado['webp'][str(ancho)] = _guardar(storage, f'{base}-{ancho}.webp', webp.getvalue())
+        resultado['respaldo'][str(ancho)] = _guardar(storage, f'{base}-{ancho}.{extension}', respaldo.getvalue())
+    return resultado
+
+
+def procesar(etiqueta, pk, campo):
+    """
+    Genera y guarda las variantes de la imagen `campo` de la fila `pk`.
+    Retorna True si se generaron. Si la imagen cambió mientras se procesaba,
+    el resultado se descarta (la nueva ya quedó encolada).
+    """
+    modelo = apps.get_model(etiqueta)
+    destino = campo_variantes(campo)
+    fila = modelo.objects.filter(pk=pk).values(campo, destino).first()
+    if fila is None:
+        return False
+    nombre = nombre_en_storage(modelo, campo, fila[campo])
+    if not nombre or (fila[destino] or {}).get('original') == nombre:
+        return False
+
+    try:
+        variantes = generar_variantes(nombre, IMAGENES[(etiqueta, campo)])
+    except (OSError, Image.DecompressionBombError):
+        logger.warning('No se pudieron generar las variantes de %s', nombre, exc_info=True)
+        return False
+    if not modelo.objects.filter(pk=pk, **{campo: fila[campo]}).update(**{destino: variantes}):
+        return False
+
+    # Las variantes de la imagen anterior ya no se usan
+    nuevas = {ruta for formato in ('webp', 'respaldo') for ruta in variantes[formato].values()}
+    for formato in ('webp', 'respaldo'):
+        for ruta in (fila[destino] or {}).get(formato, {}).values():
+            if ruta not in nuevas:
+                default_storage.delete(ruta)
+    return True
+
+
+def pendientes(etiqueta, campo, lote=500):
+    """pk de las filas cuya imagen no tiene variantes vigentes, paginando por id."""
+    modelo = apps.get_model(etiqueta)
+    destino = campo_variantes(campo)
+    filas = modelo.objects.exclude(**{f'{campo}__isnull': True}).exclude(**{campo: ''}).order_by('pk')
+    ultimo_pk = 0
+    while True:
+        pagina = list(filas.filter(pk__gt=ultimo_pk).values_list('pk', campo, destino)[:lote])
+        if not pagina:
+            return
+        for pk, valor, variantes in pagina:
+            nombre = nombre_en_storage(modelo, campo, valor)
+            if nombre and (variantes or {}).get('original') != nombre:
+                yield pk
+        ultimo_pk = pagina[-1][0]
+
+
+def procesar_pendientes(lote=500):
+    """Genera en este hilo las variantes que falten en todos los modelos de IMAGENES."""
+    generadas = 0
+    for etiqueta, campo in IMAGENES:
+        for pk in pendientes(etiqueta, campo, lote):
+            generadas += procesar(etiqueta, pk, campo)
+    return generadas
+
+
+# ==================== SEGUNDO PLANO ====================
+
+_cola = queue.Queue()
+_trabajador = None
+_trabajador_lock = threading.Lock()
+
+
+def _trabajar():
+    while True:
+        tarea = _cola.get()
+        try:
+            procesar(*tarea)
+        except Exception:
+            logger.exception('Error al procesar la imagen %s', tarea)
+        finally:
+            close_old_connections()
+            _cola.task_done()
+
+
+def en_segundo_plano(etiqueta, pk, campo):
+    """Pone la imagen en la cola del hilo de procesamiento (lo inicia si hace falta)."""
+    global _trabajador
+    _cola.put((etiqueta, pk, campo))
+    with _trabajador_lock:
+        if _trabajador is None or not _trabajador.is_alive():
+            _trabajador = threading.Thread(target=_trabajar, name='variantes-imagenes', daemon=True)
+            _trabajador.start()
+
+
+def encolar(etiqueta, pk, campo):
+    """Procesa la imagen cuando se confirme la transacción actual, fuera del request."""
+    transaction.on_commit(lambda: en_segundo_plano(etiqueta, pk, campo))
+
+
+def imagen_guardada(sender, instance, update_fields=None, **kwargs):
+    """post_save de los modelos de IMAGENES: encola las imágenes nuevas o reemplazadas."""
+    etiqueta = sender._meta.label
+    for (modelo, campo), _ in IMAGENES.items():
+        if modelo != etiqueta or (update_fields is not None and campo not in update_fields):
+            continue
+        nombre = nombre_en_storage(sender, campo, getattr(instance, campo))
+        variantes = getattr(instance, campo_variantes(campo)) or {}
+        if nombre and variantes.get('original') != nombre:
+            encolar(etiqueta, instance.pk, campo)
+        elif not nombre and variantes:
+            sender.objects.filter(pk=instance.pk).update(**{campo_variantes(campo): {}})
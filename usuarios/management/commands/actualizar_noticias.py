@@ -0,0 +1,45 @@
+# usuarios/management/commands/actualizar_noticias.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from usuarios.noticias import ALMACENES, actualizar_almacen, almacenes_vencidos
+
+
+class Command(BaseCommand):
+    help = (
+        'Descarga los feeds RSS vencidos y actualiza el almacén compartido de noticias. '
+        'Pensado para cron; con --loop queda corriendo y revisa periódicamente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Actualizar todos los almacenes aunque sigan vigentes.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Repetir la revisión indefinidamente.',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=300,
+            help='Segundos entre revisiones cuando se usa --loop.',
+        )
+
+    def handle(self, *args, **options):
+        forzar = options['forzar']
+        while True:
+            claves = list(ALMACENES) if forzar else almacenes_vencidos()
+            for clave in claves:
+                noticias = actualizar_almacen(clave)
+                self.stdout.write(self.style.SUCCESS(
+                    f'Almacén "{clave}" actualizado: {len(noticias)} noticias.'
+                ))
+            if not options['loop']:
+                break
+            forzar = False
+            time.sleep(options['intervalo'])
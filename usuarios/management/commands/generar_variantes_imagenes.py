@@ -0,0 +1,23 @@
+# usuarios/management/commands/generar_variantes_imagenes.py
+from django.core.management.base import BaseCommand
+
+from usuarios.imagenes import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera las miniaturas y variantes WebP de las imágenes que aún no las '
+        'tienen (p. ej. las subidas antes de existir el procesamiento en segundo plano).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Filas leídas por consulta.',
+        )
+
+    def handle(self, *args, **options):
+        total = procesar_pendientes(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'Variantes generadas para {total} imágenes.'))
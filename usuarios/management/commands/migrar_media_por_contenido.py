@@ -0,0 +1,43 @@
+# usuarios/management/commands/migrar_media_por_contenido.py
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from usuarios.almacenamiento import AlmacenamientoPorContenido, migrar_nombres_anteriores, recontar_referencias
+
+
+class Command(BaseCommand):
+    help = (
+        'Pasa los archivos subidos antes del almacenamiento por contenido a su '
+        'nombre por hash (deduplicándolos) y recalcula las referencias de cada '
+        'archivo, borrando los que ya nadie usa. Con --solo-recontar sirve como '
+        'limpieza periódica.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--conservar',
+            action='store_true',
+            help='No borrar los archivos con el nombre anterior.',
+        )
+        parser.add_argument(
+            '--solo-recontar',
+            action='store_true',
+            help='Solo recalcular referencias y borrar archivos huérfanos.',
+        )
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, AlmacenamientoPorContenido):
+            raise CommandError('STORAGES["default"] no es usuarios.almacenamiento.AlmacenamientoPorContenido.')
+
+        if not options['solo_recontar']:
+            resultado = migrar_nombres_anteriores(conservar=options['conservar'])
+            self.stdout.write(
+                f'{resultado["migrados"]} archivos migrados ({resultado["filas"]} filas actualizadas, '
+                f'{resultado["faltantes"]} archivos no encontrados).'
+            )
+            self.stdout.write('Ejecuta generar_variantes_imagenes para regenerar las variantes de las imágenes migradas.')
+
+        actualizados, borrados = recontar_referencias()
+        self.stdout.write(self.style.SUCCESS(
+            f'Referencias recalculadas: {actualizados} archivos actualizados, {borrados} archivos huérfanos borrados.'
+        ))
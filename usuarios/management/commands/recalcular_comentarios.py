@@ -0,0 +1,33 @@
+# usuarios/management/commands/recalcular_comentarios.py
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from usuarios.models import Post, Comentario
+
+
+class Command(BaseCommand):
+    help = 'Recalcula Post.comentarios_count desde la tabla de comentarios y corrige desvíos.'
+
+    def handle(self, *args, **options):
+        conteo_real = (
+            Comentario.objects
+            .filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        conteo_real = Coalesce(Subquery(conteo_real), Value(0))
+
+        desviados = (
+            Post.objects
+            .annotate(conteo_real=conteo_real)
+            .exclude(comentarios_count=conteo_real)
+            .count()
+        )
+        Post.objects.update(comentarios_count=conteo_real)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Contadores recalculados. Posts corregidos: {desviados}.'
+        ))
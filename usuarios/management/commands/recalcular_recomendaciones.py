@@ -0,0 +1,26 @@
+# usuarios/management/commands/recalcular_recomendaciones.py
+from django.core.management.base import BaseCommand
+
+from usuarios.recomendaciones import recalcular_recomendaciones
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula los proveedores recomendados de todos los comerciantes. '
+        'Pensado para cron (p. ej. diario): recoge los cambios de popularidad '
+        'y de rubros que no se actualizan al momento.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Comerciantes por lote.',
+        )
+
+    def handle(self, *args, **options):
+        total = recalcular_recomendaciones(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomendaciones recalculadas para {total} comerciantes.'
+        ))
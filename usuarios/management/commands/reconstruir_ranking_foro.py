@@ -0,0 +1,14 @@
+# usuarios/management/commands/reconstruir_ranking_foro.py
+from django.core.management.base import BaseCommand
+
+from usuarios.ranking import reconstruir_ranking
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los contadores del ranking de publicadores del foro desde la tabla de posts.'
+
+    def handle(self, *args, **options):
+        total = reconstruir_ranking()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ranking reconstruido para {total} comerciantes.'
+        ))
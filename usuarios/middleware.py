@@ -0,0 +1,73 @@
+# usuarios/middleware.py
+"""
+Resolución del usuario logueado una sola vez por request.
+
+El login de comerciantes y proveedores vive en la sesión ('comerciante_id' /
+'proveedor_id'). Este middleware agrega `request.comerciante` y
+`request.proveedor` como objetos perezosos: la consulta se hace recién cuando
+algo los usa y el resultado se reutiliza durante todo el request. Las vistas
+que inician o cierran sesión llaman a reiniciar_usuario_sesion para que lo
+que venga después en el mismo request vea el cambio.
+"""
+from django.utils.functional import SimpleLazyObject
+
+from proveedor.models import Proveedor
+from .models import Comerciante
+
+
+def _resolver(request, session_key, model):
+    """
+    Retorna la instancia de `model` cuyo id está en request.session[session_key],
+    o None. El resultado queda memorizado en el request según el id de la
+    sesión: si el id cambia (login o logout) se vuelve a consultar.
+    """
+    session = getattr(request, 'session', None)
+    if session is None:
+        return None
+
+    usuario_id = session.get(session_key)
+    memo_attr = f'_{session_key}_memo'
+    memo = getattr(request, memo_attr, None)
+    if memo is not None and memo[0] == usuario_id:
+        return memo[1]
+
+    usuario = None
+    if usuario_id:
+        try:
+            usuario = model.objects.get(id=usuario_id)
+        except model.DoesNotExist:
+            # Limpiar sesión si el usuario ya no existe
+            session.pop(session_key, None)
+            usuario_id = None
+
+    setattr(request, memo_attr, (usuario_id, usuario))
+    return usuario
+
+
+def obtener_comerciante(request):
+    return _resolver(request, 'comerciante_id', Comerciante)
+
+
+def obtener_proveedor(request):
+    return _resolver(request, 'proveedor_id', Proveedor)
+
+
+def reiniciar_usuario_sesion(request):
+    """
+    (Re)asigna request.comerciante y request.proveedor. Un SimpleLazyObject
+    guarda el primer valor que resolvió, así que hay que llamarla después de
+    cambiar el usuario de la sesión.
+    """
+    request.comerciante = SimpleLazyObject(lambda: obtener_comerciante(request))
+    request.proveedor = SimpleLazyObject(lambda: obtener_proveedor(request))
+
+
+class UsuarioSesionMiddleware:
+    """Agrega request.comerciante y request.proveedor (perezosos y memorizados)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reiniciar_usuario_sesion(request)
+        return self.get_response(request)
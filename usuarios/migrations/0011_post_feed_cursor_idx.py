@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0010_comerciante_password_hash_alter_comerciante_email'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-fecha_publicacion', '-id'], name='post_feed_cursor_idx'),
+        ),
+    ]
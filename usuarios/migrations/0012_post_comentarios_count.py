@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def poblar_comentarios_count(apps, schema_editor):
+    Post = apps.get_model('usuarios', 'Post')
+    Comentario = apps.get_model('usuarios', 'Comentario')
+    conteo = (
+        Comentario.objects
+        .filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Post.objects.update(comentarios_count=Coalesce(Subquery(conteo), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0011_post_feed_cursor_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comentarios_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Cantidad de Comentarios'),
+        ),
+        migrations.RunPython(poblar_comentarios_count, migrations.RunPython.noop),
+    ]
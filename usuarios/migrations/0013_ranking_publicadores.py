@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Copia de usuarios.ranking.reconstruir_ranking al momento de esta migración;
+# después de migrar los contadores se rehacen con `reconstruir_ranking_foro`
+def poblar_ranking(apps, schema_editor):
+    Post = apps.get_model('usuarios', 'Post')
+    EstadisticaPublicador = apps.get_model('usuarios', 'EstadisticaPublicador')
+    PublicacionesDiarias = apps.get_model('usuarios', 'PublicacionesDiarias')
+
+    totales = {}
+    diarias = {}
+    for comerciante_id, fecha in Post.objects.values_list('comerciante_id', 'fecha_publicacion').iterator():
+        totales[comerciante_id] = totales.get(comerciante_id, 0) + 1
+        clave = (comerciante_id, timezone.localtime(fecha).date())
+        diarias[clave] = diarias.get(clave, 0) + 1
+
+    EstadisticaPublicador.objects.bulk_create([
+        EstadisticaPublicador(comerciante_id=comerciante_id, total_posts=total)
+        for comerciante_id, total in totales.items()
+    ], batch_size=1000)
+    PublicacionesDiarias.objects.bulk_create([
+        PublicacionesDiarias(comerciante_id=comerciante_id, fecha=fecha, total=total)
+        for (comerciante_id, fecha), total in diarias.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0012_post_comentarios_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaPublicador',
+            fields=[
+                ('comerciante', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estadistica_foro', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Comerciante')),
+                ('total_posts', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Total de Publicaciones')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Publicador',
+                'verbose_name_plural': 'Estadísticas de Publicadores',
+            },
+        ),
+        migrations.CreateModel(
+            name='PublicacionesDiarias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(db_index=True, verbose_name='Fecha')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Publicaciones')),
+                ('comerciante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='publicaciones_diarias', to=settings.AUTH_USER_MODEL, verbose_name='Comerciante')),
+            ],
+            options={
+                'verbose_name': 'Publicaciones Diarias',
+                'verbose_name_plural': 'Publicaciones Diarias',
+                'unique_together': {('comerciante', 'fecha')},
+            },
+        ),
+        migrations.RunPython(poblar_ranking, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0013_ranking_publicadores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlmacenNoticias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=50, unique=True, verbose_name='Clave')),
+                ('noticias', models.JSONField(default=list, verbose_name='Noticias')),
+                ('actualizado', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Última actualización')),
+            ],
+            options={
+                'verbose_name': 'Almacén de Noticias',
+                'verbose_name_plural': 'Almacén de Noticias',
+            },
+        ),
+    ]
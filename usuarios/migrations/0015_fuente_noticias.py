@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0014_almacen_noticias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FuenteNoticias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True, verbose_name='URL del Feed')),
+                ('etag', models.CharField(blank=True, default='', max_length=255, verbose_name='ETag')),
+                ('last_modified', models.CharField(blank=True, default='', max_length=64, verbose_name='Last-Modified')),
+                ('entradas', models.JSONField(default=list, verbose_name='Entradas')),
+                ('actualizado', models.DateTimeField(blank=True, null=True, verbose_name='Última descarga')),
+            ],
+            options={
+                'verbose_name': 'Fuente de Noticias',
+                'verbose_name_plural': 'Fuentes de Noticias',
+            },
+        ),
+    ]
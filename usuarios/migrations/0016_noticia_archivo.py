@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def archivar_almacen(apps, schema_editor):
+    """Pasa al archivo las noticias que ya estaban en el almacén compartido."""
+    import hashlib
+
+    AlmacenNoticias = apps.get_model('usuarios', 'AlmacenNoticias')
+    NoticiaArticulo = apps.get_model('usuarios', 'NoticiaArticulo')
+    NoticiaTema = apps.get_model('usuarios', 'NoticiaTema')
+
+    almacen = AlmacenNoticias.objects.filter(clave='noticias').first()
+    if almacen is None:
+        return
+
+    articulos = {}
+    for noticia in almacen.noticias:
+        link_hash = hashlib.sha256(noticia['link'].strip().encode('utf-8')).hexdigest()
+        articulos.setdefault(link_hash, noticia)
+
+    NoticiaArticulo.objects.bulk_create([
+        NoticiaArticulo(
+            link_hash=link_hash,
+            link=noticia['link'],
+            titulo=noticia['titulo'][:500],
+            resumen=noticia.get('resumen', ''),
+            imagen_url=noticia.get('image_url'),
+            fuente=noticia['source_title'],
+            publicado=almacen.actualizado,
+            fecha_ingreso=almacen.actualizado,
+        )
+        for link_hash, noticia in articulos.items()
+    ], ignore_conflicts=True)
+
+    ids = dict(NoticiaArticulo.objects.values_list('link_hash', 'id'))
+    NoticiaTema.objects.bulk_create([
+        NoticiaTema(articulo_id=ids[link_hash], tema=tema)
+        for link_hash, noticia in articulos.items()
+        for tema in noticia.get('temas', [])
+    ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0015_fuente_noticias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoticiaArticulo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('link_hash', models.CharField(max_length=64, unique=True, verbose_name='Hash del Link')),
+                ('link', models.URLField(max_length=1000, verbose_name='Link')),
+                ('titulo', models.CharField(max_length=500, verbose_name='Título')),
+                ('resumen', models.TextField(blank=True, verbose_name='Resumen')),
+                ('imagen_url', models.URLField(blank=True, max_length=1000, null=True, verbose_name='URL de Imagen')),
+                ('fuente', models.CharField(db_index=True, max_length=100, verbose_name='Fuente')),
+                ('publicado', models.DateTimeField(db_index=True, verbose_name='Fecha de Publicación')),
+                ('fecha_ingreso', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Ingreso')),
+            ],
+            options={
+                'verbose_name': 'Noticia',
+                'verbose_name_plural': 'Noticias',
+                'ordering': ['-publicado', '-id'],
+                'indexes': [models.Index(fields=['fuente', '-publicado'], name='noticia_fuente_pub_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='NoticiaTema',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tema', models.CharField(db_index=True, max_length=30, verbose_name='Temática')),
+                ('articulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='temas', to='usuarios.noticiaarticulo', verbose_name='Noticia')),
+            ],
+            options={
+                'verbose_name': 'Temática de Noticia',
+                'verbose_name_plural': 'Temáticas de Noticias',
+                'unique_together': {('articulo', 'tema')},
+            },
+        ),
+        migrations.RunPython(archivar_almacen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0008_ranking_score'),
+        ('usuarios', '0016_noticia_archivo'),
+    ]
+
+    # Las filas las calcula el comando `recalcular_recomendaciones`
+    operations = [
+        migrations.CreateModel(
+            name='RecomendacionProveedor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('puntaje', models.FloatField()),
+                ('posicion', models.PositiveSmallIntegerField()),
+                ('comerciante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recomendaciones_proveedor', to=settings.AUTH_USER_MODEL)),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recomendado_a', to='proveedor.proveedor')),
+            ],
+            options={
+                'verbose_name': 'Recomendación de Proveedor',
+                'verbose_name_plural': 'Recomendaciones de Proveedores',
+                'ordering': ['comerciante', 'posicion'],
+                'indexes': [models.Index(fields=['comerciante', 'posicion'], name='recomendacion_posicion_idx')],
+                'unique_together': {('comerciante', 'proveedor')},
+            },
+        ),
+    ]
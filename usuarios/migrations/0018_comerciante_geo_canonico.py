@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+from proveedor.geo import REGION_DE_COMUNA, comuna_por_nombre
+
+
+def canonizar_comunas(apps, schema_editor):
+    """
+    Pasa las comunas de texto libre o de los códigos antiguos del formulario
+    ('SANTIAGO', 'LA_SERENA') a los códigos de proveedor.geo y completa la
+    región. Un UPDATE por valor distinto; lo que no se reconoce queda vacío.
+    """
+    Comerciante = apps.get_model('usuarios', 'Comerciante')
+    valores = Comerciante.objects.order_by().values_list('comuna', flat=True).distinct()
+    for valor in list(valores):
+        comuna = comuna_por_nombre(valor) or ''
+        Comerciante.objects.filter(comuna=valor).update(
+            comuna=comuna, region=REGION_DE_COMUNA.get(comuna, ''),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0017_recomendacion_proveedor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comerciante',
+            name='region',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=10),
+        ),
+        migrations.RunPython(canonizar_comunas, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='comerciante',
+            name='comuna',
+            field=models.CharField(blank=True, db_index=True, max_length=50),
+        ),
+    ]
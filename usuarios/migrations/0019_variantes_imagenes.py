@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0018_comerciante_geo_canonico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='beneficio',
+            name='foto_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comerciante',
+            name='foto_perfil_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='imagen_url_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
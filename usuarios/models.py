@@ -1,9 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import RegexValidator
 from django.utils import timezone
 from django.conf import settings
 from django.templatetags.static import static
-from proveedor.models import Proveedor
+from proveedor.models import Proveedor, ValoresCargadosMixin
+from proveedor.geo import REGION_DE_COMUNA, nombre_comuna, nombre_region
 from django.contrib.auth.models import AbstractUser, BaseUserManager 
 
 # --- Opciones de Selección Múltiple ---
@@ -113,7 +114,7 @@ class ComercianteManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
-class Comerciante(AbstractUser): 
+class Comerciante(ValoresCargadosMixin, AbstractUser):
     ROLES_CHOICES = [
         ('COMERCIANTE', 'Comerciante'),
         ('ADMIN', 'Administrador'),
@@ -152,7 +153,10 @@ class Comerciante(AbstractUser):
   
     relacion_negocio = models.CharField(max_length=10, choices=RELACION_NEGOCIO_CHOICES, blank=True)
     tipo_negocio = models.CharField(max_length=20, choices=TIPO_NEGOCIO_CHOICES, blank=True)
-    comuna = models.CharField(max_length=50, blank=True)
+    # Códigos de proveedor.geo (los mismos de Proveedor.region/comuna); la
+    # región se deriva de la comuna al guardar
+    region = models.CharField(max_length=10, blank=True, db_index=True, editable=False)
+    comuna = models.CharField(max_length=50, blank=True, db_index=True)
     nombre_negocio = models.CharField(max_length=100, default='Mi Negocio Local', blank=True)
 
     
@@ -165,6 +169,7 @@ class Comerciante(AbstractUser):
         blank=True,
         null=True
     )
+    foto_perfil_variantes = models.JSONField(default=dict, blank=True, editable=False)
     intereses = models.CharField(
         max_length=512,
         default='',
@@ -181,6 +186,21 @@ class Comerciante(AbstractUser):
     def __str__(self):
         return f"{self.nombre_apellido} ({self.email})"
 
+    def save(self, *args, **kwargs):
+        self.region = REGION_DE_COMUNA.get(self.comuna, '')
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'comuna' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'region'}
+        super().save(*args, **kwargs)
+
+    def get_region_display_name(self):
+        """Retorna el nombre completo de la región"""
+        return nombre_region(self.region)
+
+    def get_comuna_display_name(self):
+        """Retorna el nombre completo de la comuna"""
+        return nombre_comuna(self.comuna)
+
     def get_profile_picture_url(self):
         DEFAULT_IMAGE_PATH = 'usuarios/img/default_profile.png'
         if self.foto_perfil and self.foto_perfil.name and self.foto_perfil.name != DEFAULT_IMAGE_PATH:
@@ -209,6 +229,7 @@ class Post(models.Model):
         null=True,
         verbose_name='URL de Imagen/Link de Archivo Subido'
     )
+    imagen_url_variantes = models.JSONField(default=dict, blank=True, editable=False)
     etiquetas = models.CharField(
         max_length=255,
         blank=True,
@@ -218,15 +239,35 @@ class Post(models.Model):
         default=timezone.now,
         verbose_name='Fecha de Publicación'
     )
+    # Contador desnormalizado, mantenido por las señales de Comentario
+    comentarios_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Cantidad de Comentarios'
+    )
 
     class Meta:
         verbose_name = 'Publicación de Foro'
         verbose_name_plural = 'Publicaciones de Foro'
         ordering = ['-fecha_publicacion']
+        indexes = [
+            # Índice para la paginación por cursor del feed
+            models.Index(fields=['-fecha_publicacion', '-id'], name='post_feed_cursor_idx'),
+        ]
 
     def __str__(self):
         return f"[{self.get_categoria_display()}] {self.titulo} por {self.comerciante.nombre_apellido}"
 
+    def save(self, *args, **kwargs):
+        # Evita sobrescribir comentarios_count con un valor leído antes de
+        # que otro request agregara o eliminara comentarios.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comentarios_count'
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comentario(models.Model):
     post = models.ForeignKey(
@@ -252,10 +293,146 @@ class Comentario(models.Model):
     def __str__(self):
         return f"Comentario de {self.comerciante.nombre_apellido} en {self.post.titulo[:20]}"
 
+    def save(self, *args, **kwargs):
+        # El contador del post se actualiza en post_save (usuarios/signals.py)
+        # dentro de la misma transacción que el INSERT.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 # ELIMINADO: Modelo Like
 
 
+class EstadisticaPublicador(models.Model):
+    """Total histórico de publicaciones por comerciante (ranking del foro)."""
+    comerciante = models.OneToOneField(
+        Comerciante,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='estadistica_foro',
+        verbose_name='Comerciante'
+    )
+    total_posts = models.PositiveIntegerField(default=0, db_index=True, verbose_name='Total de Publicaciones')
+
+    class Meta:
+        verbose_name = 'Estadística de Publicador'
+        verbose_name_plural = 'Estadísticas de Publicadores'
+
+    def __str__(self):
+        return f"{self.comerciante.nombre_apellido}: {self.total_posts} posts"
+
+
+class PublicacionesDiarias(models.Model):
+    """Publicaciones por comerciante y día, para los rankings de 7/30 días."""
+    comerciante = models.ForeignKey(
+        Comerciante,
+        on_delete=models.CASCADE,
+        related_name='publicaciones_diarias',
+        verbose_name='Comerciante'
+    )
+    fecha = models.DateField(db_index=True, verbose_name='Fecha')
+    total = models.PositiveIntegerField(default=0, verbose_name='Publicaciones')
+
+    class Meta:
+        verbose_name = 'Publicaciones Diarias'
+        verbose_name_plural = 'Publicaciones Diarias'
+        unique_together = ['comerciante', 'fecha']
+
+    def __str__(self):
+        return f"{self.comerciante.nombre_apellido} - {self.fecha}: {self.total}"
+
+
+
+class AlmacenNoticias(models.Model):
+    """Noticias RSS ya procesadas, compartidas por todos los usuarios."""
+    clave = models.CharField(max_length=50, unique=True, verbose_name='Clave')
+    noticias = models.JSONField(default=list, verbose_name='Noticias')
+    actualizado = models.DateTimeField(default=timezone.now, verbose_name='Última actualización')
+
+    class Meta:
+        verbose_name = 'Almacén de Noticias'
+        verbose_name_plural = 'Almacén de Noticias'
+
+    def __str__(self):
+        return f"{self.clave} ({self.actualizado:%d/%m/%Y %H:%M})"
+
+
+class FuenteNoticias(models.Model):
+    """Estado de descarga de un feed RSS (validadores HTTP y últimas entradas)."""
+    url = models.URLField(max_length=500, unique=True, verbose_name='URL del Feed')
+    etag = models.CharField(max_length=255, blank=True, default='', verbose_name='ETag')
+    last_modified = models.CharField(max_length=64, blank=True, default='', verbose_name='Last-Modified')
+    entradas = models.JSONField(default=list, verbose_name='Entradas')
+    actualizado = models.DateTimeField(null=True, blank=True, verbose_name='Última descarga')
+
+    class Meta:
+        verbose_name = 'Fuente de Noticias'
+        verbose_name_plural = 'Fuentes de Noticias'
+
+    def __str__(self):
+        return self.url
+
+
+class NoticiaArticulo(models.Model):
+    """Archivo histórico de noticias RSS, deduplicado por hash del link."""
+    link_hash = models.CharField(max_length=64, unique=True, verbose_name='Hash del Link')
+    link = models.URLField(max_length=1000, verbose_name='Link')
+    titulo = models.CharField(max_length=500, verbose_name='Título')
+    resumen = models.TextField(blank=True, verbose_name='Resumen')
+    imagen_url = models.URLField(max_length=1000, blank=True, null=True, verbose_name='URL de Imagen')
+    fuente = models.CharField(max_length=100, db_index=True, verbose_name='Fuente')
+    publicado = models.DateTimeField(db_index=True, verbose_name='Fecha de Publicación')
+    fecha_ingreso = models.DateTimeField(default=timezone.now, verbose_name='Fecha de Ingreso')
+
+    class Meta:
+        verbose_name = 'Noticia'
+        verbose_name_plural = 'Noticias'
+        ordering = ['-publicado', '-id']
+        indexes = [
+            models.Index(fields=['fuente', '-publicado'], name='noticia_fuente_pub_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.fuente}] {self.titulo[:60]}"
+
+
+class NoticiaTema(models.Model):
+    """Temática detectada en una noticia (una fila por temática)."""
+    articulo = models.ForeignKey(
+        NoticiaArticulo,
+        on_delete=models.CASCADE,
+        related_name='temas',
+        verbose_name='Noticia'
+    )
+    tema = models.CharField(max_length=30, db_index=True, verbose_name='Temática')
+
+    class Meta:
+        verbose_name = 'Temática de Noticia'
+        verbose_name_plural = 'Temáticas de Noticias'
+        unique_together = ['articulo', 'tema']
+
+    def __str__(self):
+        return f"{self.tema}: {self.articulo_id}"
+
+
+class ArchivoMedia(models.Model):
+    """
+    Archivo físico del almacenamiento por contenido (usuarios.almacenamiento):
+    uno por contenido distinto, con la cantidad de nombres que lo usan.
+    """
+    ruta = models.CharField(max_length=100, unique=True, verbose_name='Ruta del archivo')
+    tamano = models.PositiveBigIntegerField(default=0, verbose_name='Tamaño (bytes)')
+    referencias = models.PositiveIntegerField(default=0, verbose_name='Referencias')
+    creado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Archivo de Media'
+        verbose_name_plural = 'Archivos de Media'
+
+    def __str__(self):
+        return f"{self.ruta} ({self.referencias})"
+
+
 class Beneficio(models.Model):
     titulo = models.CharField(max_length=200, verbose_name="Título del Beneficio")
     descripcion = models.TextField(verbose_name="Descripción")
@@ -265,6 +442,7 @@ class Beneficio(models.Model):
         blank=True,
         verbose_name="Imagen"
     )
+    foto_variantes = models.JSONField(default=dict, blank=True, editable=False)
     vence = models.DateField(null=True, blank=True, verbose_name="Fecha de Vencimiento")
     categoria = models.CharField(
         max_length=50,
@@ -316,4 +494,35 @@ class Propuesta(models.Model):
         verbose_name_plural = "Propuestas de Proveedores"
 
     def __str__(self):
-        return f"{self.titulo} - {self.proveedor.nombre}"
\ No newline at end of file
+        return f"{self.titulo} - {self.proveedor.nombre}"
+
+
+class RecomendacionProveedor(models.Model):
+    """
+    Proveedor recomendado a un comerciante (top N precalculado por
+    usuarios.recomendaciones; la plataforma solo lee estas filas).
+    """
+    comerciante = models.ForeignKey(
+        Comerciante,
+        on_delete=models.CASCADE,
+        related_name='recomendaciones_proveedor'
+    )
+    proveedor = models.ForeignKey(
+        Proveedor,
+        on_delete=models.CASCADE,
+        related_name='recomendado_a'
+    )
+    puntaje = models.FloatField()
+    posicion = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = 'Recomendación de Proveedor'
+        verbose_name_plural = 'Recomendaciones de Proveedores'
+        unique_together = ['comerciante', 'proveedor']
+        ordering = ['comerciante', 'posicion']
+        indexes = [
+            models.Index(fields=['comerciante', 'posicion'], name='recomendacion_posicion_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.comerciante_id} → {self.proveedor_id} ({self.puntaje:.3f})"
@@ -0,0 +1,414 @@
+# usuarios/noticias.py
+"""
+Noticias del sector a partir de feeds RSS.
+
+Las noticias se descargan fuera del ciclo del request (comando
+`actualizar_noticias` o un hilo en segundo plano) y se guardan en un
+almacén compartido (modelo AlmacenNoticias, una fila por clave: noticias
+completas y preview del foro). Las vistas solo leen de ahí.
+"""
+import logging
+import re
+import threading
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone as dt_timezone
+
+import feedparser
+import requests
+from django.core.cache import cache
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import AlmacenNoticias, FuenteNoticias, NoticiaArticulo, NoticiaTema
+from .relevancia import temas_relevantes
+
+logger = logging.getLogger(__name__)
+
+UPDATE_INTERVAL_SECONDS = 86400  # 24 horas
+PREVIEW_TTL_SECONDS = 1800  # 30 minutos
+LOCAL_CACHE_SECONDS = 60  # evita leer la BD en cada request
+
+# Descarga de feeds
+FEED_CONNECT_TIMEOUT = 3.05
+FEED_READ_TIMEOUT = 10
+FEED_USER_AGENT = 'ClubAlmacen/1.0 (+noticias)'
+MAX_ENTRADAS_POR_FUENTE = 15
+
+NOTICIAS_CLAVE = 'noticias'
+PREVIEW_CLAVE = 'preview'
+
+RSS_FEEDS = {
+    'Google News: PYME y Leyes': {
+        'url': 'https://news.google.com/rss/search?q=%22pymes%22+OR+%22emprendedores%22+OR+%22leyes+pyme%22+site%3Adf.cl+OR+site%3Aemol.com+OR+site%3Alatercera.com&hl=es&gl=CL&ceid=CL:es',
+        'key': 'google_pyme',
+    },
+    'Diario Financiero - Empresas (Filtrado)': {
+        'url': 'https://www.diariofinanciero.cl/feed/empresas',
+        'key': 'df_empresas',
+    },
+    'Emol - Economía (Filtrado)': {
+        'url': 'http://rss.emol.com/economia.asp', 
+        'key': 'emol_econ',
+    },
+    'La Tercera - Pulso (Negocios) (Filtrado)': {
+        'url': 'https://www.latercera.com/canal/pulso/feed/',
+        'key': 'pulso',
+    },
+    'El Dínamo - Actualidad': { 
+        'url': 'https://www.eldinamo.com/feed/', 
+        'key': 'dinamo',
+    },
+    'CIPER Chile - Investigación': {
+        'url': 'https://ciperchile.cl/feed/',
+        'key': 'ciper',
+    },
+}
+
+
+# =========================================================================
+# DESCARGA Y FILTRADO DE FEEDS
+# =========================================================================
+
+def extract_image_url(entry):
+    """Intenta extraer la URL de la imagen de una entrada de feedparser."""
+    
+    for attr in ['media_thumbnail', 'media_content', 'enclosures']:
+        if hasattr(entry, attr) and getattr(entry, attr):
+            data = getattr(entry, attr)
+            if isinstance(data, list):
+                 for media in data:
+                    if media.get('url') and 'image' in media.get('type', ''):
+                        return media['url']
+            elif isinstance(data, dict) and data.get('url'):
+                 if 'image' in data.get('type', ''):
+                     return data['url']
+    
+    if hasattr(entry, 'media_thumbnail') and isinstance(entry.media_thumbnail, list) and entry.media_thumbnail:
+        if entry.media_thumbnail[0].get('url'):
+            return entry.media_thumbnail[0]['url']
+        
+    description_html = getattr(entry, 'summary', getattr(entry, 'description', ''))
+    
+    if isinstance(description_html, str):
+        match = re.search(r'<img[^>]+src="([^">]+)"', description_html)
+        if match:
+            if not match.group(1).lower().endswith(('.gif', '.ico')) and 'thumb' not in match.group(1).lower():
+                return match.group(1)
+
+    return None
+
+def _fecha_publicacion(entry):
+    """Fecha de publicación de la entrada en ISO 8601 (UTC), o None."""
+    parsed = getattr(entry, 'published_parsed', None) or getattr(entry, 'updated_parsed', None)
+    if not parsed:
+        return None
+    return datetime(*parsed[:6], tzinfo=dt_timezone.utc).isoformat()
+
+
+def normalizar_entrada(entry):
+    """Convierte una entrada de feedparser en un dict serializable."""
+    description = getattr(entry, 'summary', getattr(entry, 'content', [{'value': ''}])[0]['value'])
+    return {
+        'titulo': strip_tags(entry.title),
+        'resumen': strip_tags(description),
+        'link': entry.link,
+        'image_url': extract_image_url(entry),
+        'publicado': _fecha_publicacion(entry),
+    }
+
+
+def descargar_feed(url, etag='', last_modified=''):
+    """
+    Descarga un feed con GET condicional y timeouts de conexión/lectura.
+    Retorna (entradas, etag, last_modified), o entradas=None si el servidor
+    respondió 304 (sin cambios) y no hace falta parsear.
+    """
+    headers = {'User-Agent': FEED_USER_AGENT}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    response = requests.get(url, headers=headers, timeout=(FEED_CONNECT_TIMEOUT, FEED_READ_TIMEOUT))
+    if response.status_code == 304:
+        return None, etag, last_modified
+    response.raise_for_status()
+
+    feed = feedparser.parse(response.content)
+    entradas = [
+        normalizar_entrada(entry)
+        for entry in getattr(feed, 'entries', [])[:MAX_ENTRADAS_POR_FUENTE]
+    ]
+    return (
+        entradas,
+        response.headers.get('ETag', ''),
+        response.headers.get('Last-Modified', ''),
+    )
+
+
+def descargar_fuentes(source_titles):
+    """
+    Descarga en paralelo las fuentes indicadas y retorna {source_title: entradas}.
+    Si una fuente falla, responde 304 o excede el timeout, se usan las
+    entradas guardadas de la última descarga exitosa.
+    """
+    urls = {title: RSS_FEEDS[title]['url'] for title in source_titles if title in RSS_FEEDS}
+    estados = {fuente.url: fuente for fuente in FuenteNoticias.objects.filter(url__in=urls.values())}
+    for url in urls.values():
+        estados.setdefault(url, FuenteNoticias(url=url))
+
+    resultados = {}
+    with ThreadPoolExecutor(max_workers=max(len(urls), 1)) as executor:
+        futuros = {
+            executor.submit(descargar_feed, url, estados[url].etag, estados[url].last_modified): title
+            for title, url in urls.items()
+        }
+        for futuro in as_completed(futuros):
+            title = futuros[futuro]
+            fuente = estados[urls[title]]
+            try:
+                entradas, etag, last_modified = futuro.result()
+            except Exception as e:
+                logger.warning('Error al obtener feed de %s: %s', title, e)
+                resultados[title] = fuente.entradas
+                continue
+
+            if entradas is not None:
+                fuente.entradas = entradas
+                fuente.etag = etag
+                fuente.last_modified = last_modified
+            fuente.actualizado = timezone.now()
+            resultados[title] = fuente.entradas
+            try:
+                # El preview y la descarga completa pueden crear la misma fuente a la vez
+                FuenteNoticias.objects.update_or_create(url=fuente.url, defaults={
+                    'entradas': fuente.entradas,
+                    'etag': fuente.etag,
+                    'last_modified': fuente.last_modified,
+                    'actualizado': fuente.actualizado,
+                })
+            except DatabaseError as e:
+                logger.warning('No se pudo guardar el estado del feed %s: %s', title, e)
+
+    return resultados
+
+
+def fetch_news(max_entries_per_source=15, include_image=False):
+    """Obtiene y filtra noticias de todos los feeds configurados."""
+    all_news = []
+
+    entradas_por_fuente = descargar_fuentes(RSS_FEEDS.keys())
+
+    for source_title in RSS_FEEDS:
+        for entrada in entradas_por_fuente.get(source_title, [])[:max_entries_per_source]:
+            temas = temas_relevantes(entrada['titulo'], entrada['resumen'])
+
+            if not temas and not source_title.startswith('Google News'):
+                continue
+
+            news_item = {
+                'titulo': entrada['titulo'],
+                'resumen': entrada['resumen'],
+                'link': entrada['link'],
+                'source_title': source_title,
+                'temas': temas,
+                'publicado': entrada.get('publicado'),
+            }
+
+            if include_image:
+                news_item['image_url'] = entrada['image_url']
+
+            all_news.append(news_item)
+
+    return all_news
+
+
+def fetch_news_preview():
+    """Descarga el preview de noticias para la barra lateral (ver obtener_preview_noticias)."""
+    sources_to_preview = [
+        'Google News: PYME y Leyes', 
+        'Diario Financiero - Empresas (Filtrado)', 
+        'La Tercera - Pulso (Negocios) (Filtrado)',
+    ] 
+    
+    preview_news = []
+
+    entradas_por_fuente = descargar_fuentes(sources_to_preview)
+
+    for source_title in sources_to_preview:
+        for entrada in entradas_por_fuente.get(source_title, [])[:2]:
+            temas = temas_relevantes(entrada['titulo'], entrada['resumen'])
+
+            if not temas and not source_title.startswith('Google News'):
+                continue
+
+            preview_news.append({
+                'title': entrada['titulo'],
+                'link': entrada['link'],
+                'source_title': source_title,
+                'image_url': entrada['image_url'],
+                'temas': temas,
+            })
+
+    return preview_news
+
+
+# =========================================================================
+# ALMACÉN COMPARTIDO
+# =========================================================================
+
+def _fetch_noticias_completas():
+    return fetch_news(max_entries_per_source=15, include_image=True)
+
+
+# clave -> (función que descarga, segundos de vigencia)
+ALMACENES = {
+    NOTICIAS_CLAVE: (_fetch_noticias_completas, UPDATE_INTERVAL_SECONDS),
+    PREVIEW_CLAVE: (fetch_news_preview, PREVIEW_TTL_SECONDS),
+}
+
+_refresco_locks = {clave: threading.Lock() for clave in ALMACENES}
+
+
+def _cache_key(clave):
+    return f"noticias:almacen:{clave}"
+
+
+def actualizar_almacen(clave):
+    """Descarga los feeds de `clave` y reemplaza su contenido en el almacén."""
+    fetch, _ = ALMACENES[clave]
+    noticias = fetch()
+    if clave == NOTICIAS_CLAVE:
+        archivar_noticias(noticias)
+    almacen, _ = AlmacenNoticias.objects.update_or_create(
+        clave=clave,
+        defaults={'noticias': noticias, 'actualizado': timezone.now()},
+    )
+    cache.set(_cache_key(clave), (almacen.noticias, almacen.actualizado), LOCAL_CACHE_SECONDS)
+    return noticias
+
+
+def hash_link(link):
+    return hashlib.sha256(link.strip().encode('utf-8')).hexdigest()
+
+
+def archivar_noticias(noticias):
+    """
+    Guarda las noticias en el archivo histórico. Los links ya archivados se
+    ignoran (deduplicación por link_hash). Retorna cuántas eran nuevas.
+    """
+    ahora = timezone.now()
+    por_hash = {}
+    for noticia in noticias:
+        por_hash.setdefault(hash_link(noticia['link']), noticia)
+
+    existentes = set(
+        NoticiaArticulo.objects.filter(link_hash__in=por_hash).values_list('link_hash', flat=True)
+    )
+    nuevas = {h: n for h, n in por_hash.items() if h not in existentes}
+
+    NoticiaArticulo.objects.bulk_create([
+        NoticiaArticulo(
+            link_hash=h,
+            link=n['link'],
+            titulo=n['titulo'][:500],
+            resumen=n['resumen'],
+            imagen_url=n.get('image_url'),
+            fuente=n['source_title'],
+            publicado=datetime.fromisoformat(n['publicado']) if n.get('publicado') else ahora,
+            fecha_ingreso=ahora,
+        )
+        for h, n in nuevas.items()
+    ], ignore_conflicts=True)
+
+    ids = dict(NoticiaArticulo.objects.filter(link_hash__in=nuevas).values_list('link_hash', 'id'))
+    NoticiaTema.objects.bulk_create([
+        NoticiaTema(articulo_id=ids[h], tema=tema)
+        for h, n in nuevas.items() if h in ids
+        for tema in n.get('temas', [])
+    ], ignore_conflicts=True)
+
+    return len(nuevas)
+
+
+def almacenes_vencidos():
+    """Claves cuyo contenido no existe o ya superó su vigencia."""
+    actualizados = dict(AlmacenNoticias.objects.values_list('clave', 'actualizado'))
+    ahora = timezone.now()
+    return [
+        clave for clave, (_, vigencia) in ALMACENES.items()
+        if clave not in actualizados or (ahora - actualizados[clave]).total_seconds() > vigencia
+    ]
+
+
+def _refrescar(clave):
+    try:
+        actualizar_almacen(clave)
+    except Exception:
+        logger.exception('Error al actualizar el almacén de noticias %s', clave)
+    finally:
+        close_old_connections()
+        _refresco_locks[clave].release()
+
+
+def refrescar_en_segundo_plano(clave=NOTICIAS_CLAVE):
+    """Lanza una actualización en un hilo, salvo que ya haya una en curso."""
+    if not _refresco_locks[clave].acquire(blocking=False):
+        return False
+    threading.Thread(target=_refrescar, args=(clave,), name=f'refresco-{clave}', daemon=True).start()
+    return True
+
+
+def _vencido(clave, actualizado):
+    _, vigencia = ALMACENES[clave]
+    return actualizado is None or (timezone.now() - actualizado).total_seconds() > vigencia
+
+
+def revisar_vigencia(clave):
+    """
+    Pide un refresco en segundo plano si el almacén `clave` está vencido.
+    Solo lee la fecha de actualización, no el JSON con las noticias.
+    """
+    guardado = cache.get(_cache_key(clave))
+    if guardado is not None:
+        actualizado = guardado[1]
+    else:
+        actualizado = AlmacenNoticias.objects.filter(clave=clave).values_list('actualizado', flat=True).first()
+    if _vencido(clave, actualizado):
+        refrescar_en_segundo_plano(clave)
+
+
+def _leer_almacen(clave):
+    """
+    Lectura con stale-while-revalidate: siempre responde con lo guardado (o
+    una lista vacía) y, si está vencido, pide un refresco en segundo plano.
+    Nunca hace I/O de red en el hilo del request.
+    """
+    guardado = cache.get(_cache_key(clave))
+    if guardado is None:
+        almacen = AlmacenNoticias.objects.filter(clave=clave).first()
+        guardado = (almacen.noticias, almacen.actualizado) if almacen else ([], None)
+        cache.set(_cache_key(clave), guardado, LOCAL_CACHE_SECONDS)
+
+    noticias, actualizado = guardado
+    if _vencido(clave, actualizado):
+        refrescar_en_segundo_plano(clave)
+
+    return noticias
+
+
+def buscar_noticias(fuente=None, tema=None):
+    """Queryset del archivo de noticias, filtrado en la base de datos."""
+    articulos = NoticiaArticulo.objects.all()
+    if fuente:
+        articulos = articulos.filter(fuente=fuente)
+    if tema:
+        articulos = articulos.filter(temas__tema=tema)
+    return articulos
+
+
+def obtener_preview_noticias():
+    """Preview de noticias para la barra lateral del foro."""
+    return _leer_almacen(PREVIEW_CLAVE)
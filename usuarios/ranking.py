@@ -0,0 +1,149 @@
+# usuarios/ranking.py
+"""
+Ranking de comerciantes más activos del foro.
+
+Los contadores se actualizan de forma incremental al crear o eliminar un Post
+(ver usuarios/signals.py) y el top N de cada ventana se guarda en caché, de
+modo que la barra lateral del foro no recorre la tabla de posts.
+
+Cada post invalida el top en la caché de este proceso. Para que los demás
+workers lo vean al instante CACHES debe ser compartida (Memcached, Redis);
+con la LocMemCache por defecto cada uno mantiene su top hasta
+RANKING_CACHE_TIMEOUT, que por eso es de un minuto.
+
+Si los contadores se desajustan (p. ej. posts cargados con SQL directo), el
+comando `reconstruir_ranking_foro` los vuelve a calcular desde la tabla de
+posts.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Comerciante, EstadisticaPublicador, PublicacionesDiarias
+
+# Ventanas soportadas: None = histórico, o cantidad de días
+VENTANAS_RANKING = (None, 7, 30)
+RANKING_SIZE = 10
+RANKING_CACHE_TIMEOUT = 60  # 1 minuto
+
+
+def _cache_key(dias):
+    return f"foro:top_publicadores:{dias or 'total'}"
+
+
+def _sumar(model, campo, delta, **lookup):
+    """Suma `delta` al contador `campo` de la fila `lookup`, creándola si no existe."""
+    actualizados = model.objects.filter(**lookup).update(**{campo: F(campo) + delta})
+    if actualizados or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **{campo: delta})
+    except IntegrityError:
+        # Otro request creó la fila entre el UPDATE y el INSERT
+        model.objects.filter(**lookup).update(**{campo: F(campo) + delta})
+
+
+def registrar_publicacion(post, delta):
+    """Aplica +1/-1 a los contadores del autor del post e invalida el ranking."""
+    fecha = timezone.localtime(post.fecha_publicacion).date()
+
+    if delta < 0:
+        EstadisticaPublicador.objects.filter(
+            comerciante_id=post.comerciante_id, total_posts__gt=0
+        ).update(total_posts=F('total_posts') + delta)
+        PublicacionesDiarias.objects.filter(
+            comerciante_id=post.comerciante_id, fecha=fecha, total__gt=0
+        ).update(total=F('total') + delta)
+    else:
+        _sumar(EstadisticaPublicador, 'total_posts', delta, comerciante_id=post.comerciante_id)
+        _sumar(PublicacionesDiarias, 'total', delta, comerciante_id=post.comerciante_id, fecha=fecha)
+
+    invalidar_ranking()
+
+
+def invalidar_ranking():
+    cache.delete_many([_cache_key(dias) for dias in VENTANAS_RANKING])
+
+
+def _calcular_ranking(dias):
+    if dias is None:
+        filas = (
+            EstadisticaPublicador.objects
+            .filter(total_posts__gt=0)
+            .exclude(comerciante__rol='ADMIN')
+            .order_by('-total_posts')
+            .values_list('comerciante_id', 'total_posts')[:RANKING_SIZE]
+        )
+    else:
+        desde = timezone.localdate() - timedelta(days=dias - 1)
+        filas = (
+            PublicacionesDiarias.objects
+            .filter(fecha__gte=desde)
+            .exclude(comerciante__rol='ADMIN')
+            .values('comerciante_id')
+            .annotate(post_count=Sum('total'))
+            .filter(post_count__gt=0)
+            .order_by('-post_count')
+            .values_list('comerciante_id', 'post_count')[:RANKING_SIZE]
+        )
+    filas = list(filas)
+
+    comerciantes = Comerciante.objects.in_bulk([comerciante_id for comerciante_id, _ in filas])
+    ranking = []
+    for comerciante_id, post_count in filas:
+        comerciante = comerciantes.get(comerciante_id)
+        if comerciante is not None:
+            comerciante.post_count = post_count
+            ranking.append(comerciante)
+    return ranking
+
+
+def top_publicadores(limite=5, dias=None):
+    """
+    Retorna los `limite` comerciantes con más publicaciones (histórico o en
+    los últimos `dias` días), con el atributo `post_count`.
+    """
+    if dias not in VENTANAS_RANKING:
+        dias = None
+
+    key = _cache_key(dias)
+    ranking = cache.get(key)
+    if ranking is None:
+        ranking = _calcular_ranking(dias)
+        cache.set(key, ranking, RANKING_CACHE_TIMEOUT)
+    return ranking[:limite]
+
+
+def reconstruir_ranking():
+    """
+    Recalcula todos los contadores desde la tabla de posts. La migración
+    0013 tiene una copia congelada de este cálculo para el llenado inicial.
+    """
+    from .models import Post
+
+    with transaction.atomic():
+        EstadisticaPublicador.objects.all().delete()
+        PublicacionesDiarias.objects.all().delete()
+
+        totales = {}
+        diarias = {}
+        for comerciante_id, fecha in Post.objects.values_list('comerciante_id', 'fecha_publicacion').iterator():
+            totales[comerciante_id] = totales.get(comerciante_id, 0) + 1
+            clave = (comerciante_id, timezone.localtime(fecha).date())
+            diarias[clave] = diarias.get(clave, 0) + 1
+
+        EstadisticaPublicador.objects.bulk_create([
+            EstadisticaPublicador(comerciante_id=comerciante_id, total_posts=total)
+            for comerciante_id, total in totales.items()
+        ], batch_size=1000)
+        PublicacionesDiarias.objects.bulk_create([
+            PublicacionesDiarias(comerciante_id=comerciante_id, fecha=fecha, total=total)
+            for (comerciante_id, fecha), total in diarias.items()
+        ], batch_size=1000)
+
+    invalidar_ranking()
+    return len(totales)
@@ -0,0 +1,383 @@
+# usuarios/recomendaciones.py
+"""
+Recomendaciones de proveedores para comerciantes.
+
+Cada par comerciante-proveedor recibe un puntaje con tres partes:
+
+- área: si el proveedor llega a la comuna del comerciante según su
+  cobertura (misma comuna, misma región con cobertura regional, nacional...).
+  Los proveedores que no llegan no se consideran.
+- afinidad: cuántos de los grupos de rubros que interesan al comerciante
+  (según su tipo de negocio e intereses) cubren las categorías del proveedor.
+- popularidad: el ranking_score del proveedor, normalizado.
+
+Los grupos de rubros se representan como bits de un entero, así la afinidad
+de un par es un AND y un conteo de bits. Los comerciantes con el mismo perfil
+(comuna, tipo de negocio e intereses) comparten el cálculo. Además, fuera
+de la comuna el puntaje de área de un proveedor no depende del comerciante,
+así que el top de los nacionales (y el de cada región) se calcula una vez
+por máscara de intereses y se reutiliza; para cada perfil solo se puntúan
+uno a uno los proveedores de su comuna.
+
+El top N de cada comerciante queda en RecomendacionProveedor; la plataforma
+solo lee esas filas. Se recalcula al cambiar el perfil de un comerciante o
+de un proveedor (ver usuarios/signals.py) y completo con el comando
+`recalcular_recomendaciones` (la popularidad cambia con las visitas), que
+también llena la tabla por primera vez después de migrar.
+
+Un cambio de proveedor puede tocar el top de miles de comerciantes, así que
+se encola al confirmar la transacción y lo calcula un hilo en segundo plano
+(igual que las variantes de imágenes en usuarios/imagenes.py); el de un
+comerciante es una sola fila y se calcula en el momento.
+"""
+import heapq
+import logging
+import queue
+import threading
+from collections import defaultdict
+
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Max, Min
+
+from proveedor.indice_texto import tokenizar
+from proveedor.models import Proveedor
+
+from .models import Comerciante, RecomendacionProveedor
+
+logger = logging.getLogger(__name__)
+
+RECOMENDACIONES_POR_COMERCIANTE = 6
+
+PESOS_RECOMENDACION = {'area': 0.5, 'afinidad': 0.35, 'popularidad': 0.15}
+
+# Afinidad de un comerciante sin tipo de negocio ni intereses relacionados
+AFINIDAD_NEUTRA = 0.5
+
+# Puntaje de área según dónde está el proveedor y su cobertura
+AREA_MISMA_COMUNA = 1.0
+AREA_REGIONAL = 0.7       # cobertura regional, misma región
+AREA_NACIONAL = 0.5
+AREA_INTERNACIONAL = 0.4
+AREA_MISMA_REGION = 0.2   # proveedor local o comunal de otra comuna de la región
+
+# Grupo de rubros -> raíces que lo identifican en el nombre de una categoría
+GRUPOS_RUBROS = {
+    'abarrotes': ('abarrote', 'almacen', 'grano', 'arroz', 'conserva', 'aceite', 'azucar'),
+    'bebidas': ('bebida', 'jugo', 'agua', 'gaseosa'),
+    'licores': ('licor', 'vino', 'cerveza', 'destilado', 'pisco'),
+    'lacteos': ('lacteo', 'leche', 'queso', 'yogur'),
+    'panaderia': ('pan', 'harina', 'reposteria', 'pasteleria', 'levadura'),
+    'carnes': ('carne', 'cecina', 'embutido', 'pollo', 'fiambre'),
+    'frutas': ('fruta', 'verdura', 'hortaliza'),
+    'snacks': ('snack', 'confite', 'golosina', 'dulce', 'galleta'),
+    'limpieza': ('limpieza', 'aseo', 'detergente', 'higiene'),
+    'envases': ('envase', 'desechable', 'bolsa', 'packaging', 'embalaje'),
+    'comida': ('comida', 'congelado', 'salsa', 'gas'),
+    'tecnologia': ('tecnologia', 'software', 'computacion', 'pos', 'balanza'),
+    'marketing': ('marketing', 'publicidad', 'imprenta', 'grafica', 'letrero'),
+    'seguridad': ('seguridad', 'alarma', 'camara'),
+    'logistica': ('transporte', 'logistica', 'reparto', 'flete'),
+    'finanzas': ('contabilidad', 'finanza', 'credito', 'seguro', 'tributari'),
+    'mobiliario': ('mobiliario', 'decoracion', 'exhibidor', 'refrigeracion', 'vitrina'),
+    'reciclaje': ('reciclaje', 'sostenible', 'ecologic', 'compostable'),
+}
+
+GRUPOS_TIPO_NEGOCIO = {
+    'ALMACEN': ('abarrotes', 'bebidas', 'lacteos', 'snacks', 'limpieza', 'frutas'),
+    'MINIMARKET': ('abarrotes', 'bebidas', 'lacteos', 'snacks', 'limpieza', 'licores', 'carnes'),
+    'BOTILLERIA': ('licores', 'bebidas', 'snacks'),
+    'PANADERIA': ('panaderia', 'lacteos', 'envases'),
+    'FERIA': ('frutas', 'envases'),
+    'KIOSCO': ('snacks', 'bebidas'),
+    'FOODTRUCK': ('comida', 'carnes', 'bebidas', 'envases'),
+}
+
+GRUPOS_INTERESES = {
+    'TECNOLOGIA': ('tecnologia',),
+    'INNOVACION': ('tecnologia',),
+    'MARKETING': ('marketing',),
+    'REDES_SOCIALES': ('marketing',),
+    'DECORACION': ('mobiliario',),
+    'SEGURIDAD': ('seguridad',),
+    'LOGISTICA': ('logistica',),
+    'FINANZAS': ('finanzas',),
+    'IMPUESTOS': ('finanzas',),
+    'CREDITOS': ('finanzas',),
+    'SEGUROS': ('finanzas',),
+    'SOSTENIBILIDAD': ('reciclaje', 'envases'),
+}
+
+BIT_GRUPO = {grupo: 1 << i for i, grupo in enumerate(GRUPOS_RUBROS)}
+
+
+# ============================================
+# VECTORES DE PERFIL
+# ============================================
+
+def mascara_categorias(nombres):
+    """Bits de los grupos de rubros que cubren las categorías (por nombre)."""
+    mascara = 0
+    for termino in {t for nombre in nombres for t in tokenizar(nombre)}:
+        for grupo, raices in GRUPOS_RUBROS.items():
+            if termino.startswith(raices):
+                mascara |= BIT_GRUPO[grupo]
+    return mascara
+
+
+def mascara_intereses(tipo_negocio, intereses):
+    """Bits de los grupos de rubros que le interesan a un comerciante."""
+    grupos = list(GRUPOS_TIPO_NEGOCIO.get(tipo_negocio, ()))
+    for interes in (intereses or '').split(','):
+        grupos.extend(GRUPOS_INTERESES.get(interes.strip(), ()))
+    mascara = 0
+    for grupo in grupos:
+        mascara |= BIT_GRUPO[grupo]
+    return mascara
+
+
+def perfil_comerciante(comuna, region, tipo_negocio, intereses):
+    """(comuna, región, máscara): lo único que usa el cálculo; clave para agrupar comerciantes."""
+    return comuna, region, mascara_intereses(tipo_negocio, intereses)
+
+
+class CatalogoProveedores:
+    """
+    Proveedores activos agrupados por área, con su máscara de rubros y
+    popularidad (0 a 1). Se arma con dos consultas.
+    """
+
+    def __init__(self, proveedores=None, categorias=None, maximo=None):
+        if proveedores is None:
+            proveedores = Proveedor.objects.filter(activo=True).values_list(
+                'id', 'region', 'comuna', 'cobertura', 'ranking_score'
+            )
+        if categorias is None:
+            categorias = Proveedor.categorias.through.objects.filter(
+                proveedor__activo=True, categoriaproveedor__activo=True
+            ).values_list('proveedor_id', 'categoriaproveedor__nombre')
+
+        nombres = defaultdict(list)
+        for proveedor_id, nombre in categorias:
+            nombres[proveedor_id].append(nombre)
+
+        filas = list(proveedores)
+        if maximo is None:
+            maximo = max((fila[4] for fila in filas), default=0)
+        maximo = maximo or 1
+        self.mascaras = {}
+        self.popularidad = {}
+        self.por_comuna = defaultdict(list)
+        self.por_region = defaultdict(list)   # regionales, locales y comunales
+        self.nacionales = []                  # (id, puntaje de área)
+        self._tops = {}                       # (grupo, máscara) -> (top, completo)
+        for proveedor_id, region, comuna, cobertura, ranking_score in filas:
+            self.mascaras[proveedor_id] = mascara_categorias(nombres.get(proveedor_id, ()))
+            self.popularidad[proveedor_id] = max(ranking_score, 0) / maximo
+            if comuna:
+                self.por_comuna[comuna].append(proveedor_id)
+            if cobertura == 'nacional':
+                self.nacionales.append((proveedor_id, AREA_NACIONAL))
+            elif cobertura == 'internacional':
+                self.nacionales.append((proveedor_id, AREA_INTERNACIONAL))
+            elif region:
+                area = AREA_REGIONAL if cobertura == 'regional' else AREA_MISMA_REGION
+                self.por_region[region].append((proveedor_id, area))
+
+    def areas(self, comuna, region):
+        """{proveedor_id: puntaje de área} de los proveedores que llegan a la comuna."""
+        areas = dict(self.nacionales)
+        for proveedor_id, area in self.por_region.get(region, ()):
+            if area > areas.get(proveedor_id, 0):
+                areas[proveedor_id] = area
+        for proveedor_id in self.por_comuna.get(comuna, ()):
+            areas[proveedor_id] = AREA_MISMA_COMUNA
+        return areas
+
+    def puntaje(self, proveedor_id, area, mascara):
+        if mascara:
+            afinidad = (self.mascaras[proveedor_id] & mascara).bit_count() / mascara.bit_count()
+        else:
+            afinidad = AFINIDAD_NEUTRA
+        return round(
+            PESOS_RECOMENDACION['area'] * area
+            + PESOS_RECOMENDACION['afinidad'] * afinidad
+            + PESOS_RECOMENDACION['popularidad'] * self.popularidad[proveedor_id],
+            6,
+        )
+
+    def _top(self, clave, grupo, mascara, k):
+        """Los k mejores (puntaje, -id) de un grupo de área para una máscara (con caché)."""
+        top, completo = self._tops.get((clave, mascara), ((), False))
+        if len(top) < k and not completo:
+            k = max(k, 2 * len(top))
+            top = heapq.nlargest(k, (
+                (self.puntaje(proveedor_id, area, mascara), -proveedor_id) for proveedor_id, area in grupo
+            ))
+            self._tops[(clave, mascara)] = (top, len(top) < k)
+        return top[:k]
+
+    def mejores(self, perfil, n=RECOMENDACIONES_POR_COMERCIANTE):
+        """Top n [(puntaje, proveedor_id)] para un perfil (desempate por id)."""
+        comuna, region, mascara = perfil
+        locales = self.por_comuna.get(comuna, ())
+        puntajes = [
+            (self.puntaje(proveedor_id, AREA_MISMA_COMUNA, mascara), -proveedor_id) for proveedor_id in locales
+        ]
+        # Los de la comuna ya están con el puntaje máximo de área: se piden
+        # tantos extra como para poder descartarlos
+        k = n + len(locales)
+        en_comuna = set(locales)
+        for clave, grupo in ((('nacional',), self.nacionales), (('region', region), self.por_region.get(region, ()))):
+            puntajes.extend(p for p in self._top(clave, grupo, mascara, k) if -p[1] not in en_comuna)
+        return [(puntaje, -menos_id) for puntaje, menos_id in heapq.nlargest(n, puntajes)]
+
+
+# ============================================
+# CÁLCULO Y ALMACENAMIENTO
+# ============================================
+
+def _guardar(recomendaciones):
+    """Reemplaza las filas de los comerciantes dados: {comerciante_id: [(puntaje, proveedor_id)]}."""
+    with transaction.atomic():
+        RecomendacionProveedor.objects.filter(comerciante_id__in=list(recomendaciones)).delete()
+        RecomendacionProveedor.objects.bulk_create([
+            RecomendacionProveedor(
+                comerciante_id=comerciante_id, proveedor_id=proveedor_id,
+                puntaje=puntaje, posicion=posicion,
+            )
+            for comerciante_id, mejores in recomendaciones.items()
+            for posicion, (puntaje, proveedor_id) in enumerate(mejores, start=1)
+        ], batch_size=1000)
+
+
+def recalcular_recomendaciones(comerciante_ids=None, lote=1000, catalogo=None):
+    """
+    Recalcula el top N de los comerciantes dados (o de todos, por lotes).
+    Retorna cuántos comerciantes se procesaron.
+    """
+    comerciantes = Comerciante.objects.order_by('id')
+    if comerciante_ids is not None:
+        comerciante_ids = sorted(set(comerciante_ids))
+        if not comerciante_ids:
+            return 0
+        comerciantes = comerciantes.filter(id__in=comerciante_ids)
+    catalogo = catalogo or CatalogoProveedores()
+
+    total = 0
+    ultimo_id = 0
+    while True:
+        filas = list(
+            comerciantes.filter(id__gt=ultimo_id)
+            .values_list('id', 'comuna', 'region', 'tipo_negocio', 'intereses')[:lote]
+        )
+        if not filas:
+            return total
+        por_perfil = {}
+        recomendaciones = {}
+        for comerciante_id, comuna, region, tipo_negocio, intereses in filas:
+            perfil = perfil_comerciante(comuna, region, tipo_negocio, intereses)
+            if perfil not in por_perfil:
+                por_perfil[perfil] = catalogo.mejores(perfil)
+            recomendaciones[comerciante_id] = por_perfil[perfil]
+        _guardar(recomendaciones)
+        total += len(filas)
+        ultimo_id = filas[-1][0]
+
+
+def comerciantes_afectados(proveedor_id):
+    """
+    Comerciantes cuyo top N puede cambiar por un cambio del proveedor: los que
+    ya lo tienen recomendado y aquellos en que su nuevo puntaje entra al top.
+    """
+    afectados = set(
+        RecomendacionProveedor.objects.filter(proveedor_id=proveedor_id)
+        .values_list('comerciante_id', flat=True)
+    )
+    # Catálogo con solo este proveedor, normalizando la popularidad contra todos
+    catalogo = CatalogoProveedores(
+        proveedores=Proveedor.objects.filter(id=proveedor_id, activo=True)
+        .values_list('id', 'region', 'comuna', 'cobertura', 'ranking_score'),
+        categorias=Proveedor.categorias.through.objects.filter(
+            proveedor_id=proveedor_id, categoriaproveedor__activo=True
+        ).values_list('proveedor_id', 'categoriaproveedor__nombre'),
+        maximo=Proveedor.objects.filter(activo=True).aggregate(maximo=Max('ranking_score'))['maximo'],
+    )
+    if proveedor_id not in catalogo.mascaras:
+        return afectados  # inactivo o eliminado: solo salen de donde estaba
+
+    umbral = {
+        fila['comerciante']: (fila['total'], fila['minimo'])
+        for fila in RecomendacionProveedor.objects.order_by().values('comerciante')
+        .annotate(total=Count('id'), minimo=Min('puntaje'))
+    }
+    puntajes = {}
+    for comerciante_id, comuna, region, tipo_negocio, intereses in (
+        Comerciante.objects.values_list('id', 'comuna', 'region', 'tipo_negocio', 'intereses').iterator()
+    ):
+        perfil = perfil_comerciante(comuna, region, tipo_negocio, intereses)
+        if perfil not in puntajes:
+            area = catalogo.areas(perfil[0], perfil[1]).get(proveedor_id)
+            puntajes[perfil] = catalogo.puntaje(proveedor_id, area, perfil[2]) if area else None
+        puntaje = puntajes[perfil]
+        if puntaje is None:
+            continue
+        total, minimo = umbral.get(comerciante_id, (0, None))
+        if total < RECOMENDACIONES_POR_COMERCIANTE or puntaje > minimo:
+            afectados.add(comerciante_id)
+    return afectados
+
+
+# ============================================
+# SEGUNDO PLANO
+# ============================================
+
+_cola = queue.Queue()
+_trabajador = None
+_trabajador_lock = threading.Lock()
+
+
+def procesar(proveedor_ids=(), comerciante_ids=()):
+    """Recalcula lo afectado por cambios de proveedores y los comerciantes dados."""
+    afectados = set(comerciante_ids)
+    for proveedor_id in proveedor_ids:
+        afectados |= comerciantes_afectados(proveedor_id)
+    return recalcular_recomendaciones(afectados)
+
+
+def _trabajar():
+    while True:
+        tarea = _cola.get()
+        try:
+            procesar(*tarea)
+        except Exception:
+            logger.exception('Error al recalcular recomendaciones %s', tarea)
+        finally:
+            close_old_connections()
+            _cola.task_done()
+
+
+def en_segundo_plano(proveedor_ids=(), comerciante_ids=()):
+    """Pone el recálculo en la cola del hilo de recomendaciones (lo inicia si hace falta)."""
+    global _trabajador
+    _cola.put((tuple(proveedor_ids), tuple(comerciante_ids)))
+    with _trabajador_lock:
+        if _trabajador is None or not _trabajador.is_alive():
+            _trabajador = threading.Thread(target=_trabajar, name='recomendaciones', daemon=True)
+            _trabajador.start()
+
+
+def encolar(proveedor_ids=(), comerciante_ids=()):
+    """Recalcula cuando se confirme la transacción actual, fuera del request."""
+    proveedor_ids, comerciante_ids = tuple(proveedor_ids), tuple(comerciante_ids)
+    if proveedor_ids or comerciante_ids:
+        transaction.on_commit(lambda: en_segundo_plano(proveedor_ids, comerciante_ids))
+
+
+def recomendaciones_de(comerciante, limite=RECOMENDACIONES_POR_COMERCIANTE):
+    """Proveedores recomendados al comerciante, en orden (una consulta)."""
+    return [
+        recomendacion.proveedor
+        for recomendacion in RecomendacionProveedor.objects.filter(
+            comerciante=comerciante, proveedor__activo=True
+        ).select_related('proveedor').order_by('posicion')[:limite]
+    ]
@@ -0,0 +1,68 @@
+# usuarios/relevancia.py
+"""
+Motor de relevancia para noticias.
+
+Todas las palabras clave se compilan una sola vez en una expresión regular de
+alternativas y se comparan contra el texto normalizado (minúsculas y sin
+tildes). Cada coincidencia se traduce a la temática a la que pertenece.
+"""
+import re
+import unicodedata
+
+# Temática -> raíces de palabras clave (sin tildes, en minúsculas)
+TEMAS_PALABRAS_CLAVE = {
+    'Emprendimiento': [
+        'pyme', 'emprended', 'emprendimiento', 'asesoria', 'sercotec', 'corfo', 'fosis',
+    ],
+    'Negocios': [
+        'negocio', 'proveedor', 'distribuidor', 'costo', 'precio', 'inflacion', 'ipc',
+        'consumo', 'credito', 'caja', 'digital', 'transbank', 'pos', 'qr', 'inventario',
+    ],
+    'Leyes': [
+        'ley', 'normativa', 'laboral', 'jornada', 'salud', 'seremi', 'fiscalizacion',
+        'municipal', 'patente', 'tributario', 'iva', 'impuesto', 'factura', 'boleta',
+    ],
+    'Comercio': [
+        'comerciante', 'comercio', 'seguridad', 'delincuencia', 'robo', 'alerta',
+    ],
+}
+
+TEMATICAS = list(TEMAS_PALABRAS_CLAVE)
+
+# Siglas cortas que solo cuentan como palabra completa ("pos" no debe calzar con "posible")
+PALABRAS_EXACTAS = {'pos', 'qr', 'iva', 'ipc'}
+
+
+def normalizar_texto(texto):
+    """Minúsculas y sin tildes ni diéresis (la ñ pasa a n)."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def _compilar(temas):
+    tema_por_palabra = {}
+    alternativas = []
+    # Las raíces más largas primero para que la alternativa más específica gane
+    for palabra, tema in sorted(
+        ((normalizar_texto(p), tema) for tema, palabras in temas.items() for p in palabras),
+        key=lambda item: -len(item[0]),
+    ):
+        tema_por_palabra[palabra] = tema
+        fin = r'\b' if palabra in PALABRAS_EXACTAS else ''
+        alternativas.append(re.escape(palabra) + fin)
+    patron = re.compile(r'\b(' + '|'.join(alternativas) + ')')
+    return patron, tema_por_palabra
+
+
+_PATRON, _TEMA_POR_PALABRA = _compilar(TEMAS_PALABRAS_CLAVE)
+
+
+def temas_relevantes(*textos):
+    """Retorna las temáticas detectadas en los textos, en el orden de TEMATICAS."""
+    encontrados = set()
+    for texto in textos:
+        for match in _PATRON.finditer(normalizar_texto(texto)):
+            encontrados.add(_TEMA_POR_PALABRA[match.group(1)])
+            if len(encontrados) == len(TEMATICAS):
+                return list(TEMATICAS)
+    return [tema for tema in TEMATICAS if tema in encontrados]
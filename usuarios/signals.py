@@ -0,0 +1,110 @@
+# usuarios/signals.py
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from proveedor.models import Proveedor
+
+from .models import Comerciante, Post, Comentario
+from .imagenes import IMAGENES, imagen_guardada
+from .ranking import registrar_publicacion
+from .recomendaciones import encolar, recalcular_recomendaciones
+
+# Campos que cambian las recomendaciones
+CAMPOS_RECOMENDACION_COMERCIANTE = {'comuna', 'tipo_negocio', 'intereses'}
+CAMPOS_RECOMENDACION_PROVEEDOR = {'activo', 'region', 'comuna', 'cobertura'}
+
+
+def _cambia(update_fields, campos):
+    return update_fields is None or bool(campos.intersection(update_fields))
+
+
+@receiver(post_save, sender=Comentario)
+def incrementar_contador_comentarios(sender, instance, created, **kwargs):
+    """Suma el nuevo comentario al contador del post."""
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comentarios_count=F('comentarios_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comentario)
+def decrementar_contador_comentarios(sender, instance, **kwargs):
+    """
+    Resta el comentario eliminado del contador del post.
+    También se ejecuta en borrados en cascada (p. ej. al eliminar un comerciante).
+    """
+    Post.objects.filter(pk=instance.post_id, comentarios_count__gt=0).update(
+        comentarios_count=F('comentarios_count') - 1
+    )
+
+
+@receiver(post_save, sender=Post)
+def sumar_publicacion_ranking(sender, instance, created, **kwargs):
+    """Actualiza los contadores del ranking de publicadores."""
+    if created:
+        registrar_publicacion(instance, 1)
+
+
+@receiver(post_delete, sender=Post)
+def restar_publicacion_ranking(sender, instance, **kwargs):
+    registrar_publicacion(instance, -1)
+
+
+@receiver(post_save, sender=Comerciante)
+def recalcular_recomendaciones_comerciante(sender, instance, created=False, update_fields=None, **kwargs):
+    """Un comerciante nuevo o que cambió de comuna, rubro o intereses (no al iniciar sesión)."""
+    if created or (
+        _cambia(update_fields, CAMPOS_RECOMENDACION_COMERCIANTE)
+        and instance.campos_cambiados(CAMPOS_RECOMENDACION_COMERCIANTE)
+    ):
+        recalcular_recomendaciones([instance.id])
+
+
+@receiver(post_save, sender=Proveedor)
+def recalcular_recomendaciones_proveedor(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Solo si cambió algo que entra al puntaje: el formulario de perfil guarda
+    todos los campos aunque solo se edite la descripción.
+    """
+    if created or (
+        _cambia(update_fields, CAMPOS_RECOMENDACION_PROVEEDOR)
+        and instance.campos_cambiados(CAMPOS_RECOMENDACION_PROVEEDOR)
+    ):
+        encolar(proveedor_ids=[instance.id])
+
+
+@receiver(m2m_changed, sender=Proveedor.categorias.through)
+def recalcular_recomendaciones_categorias(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._proveedores_recomendacion = list(instance.proveedores.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action != 'post_clear' and not pk_set:
+        return  # add() de categorías que ya tenía
+    if not reverse:
+        ids = [instance.id]
+    elif action == 'post_clear':
+        ids = getattr(instance, '_proveedores_recomendacion', [])
+    else:
+        ids = pk_set
+    encolar(proveedor_ids=ids)
+
+
+@receiver(pre_delete, sender=Proveedor)
+def proveedor_por_eliminar(sender, instance, **kwargs):
+    # Sus recomendaciones se borran en cascada; hay que completar esos top N
+    instance._comerciantes_recomendados = list(
+        instance.recomendado_a.values_list('comerciante_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Proveedor)
+def completar_recomendaciones(sender, instance, **kwargs):
+    encolar(comerciante_ids=getattr(instance, '_comerciantes_recomendados', []))
+
+
+# Variantes de las imágenes subidas (ver usuarios/imagenes.py)
+for _modelo in sorted({modelo for modelo, _ in IMAGENES}):
+    post_save.connect(imagen_guardada, sender=_modelo, dispatch_uid=f'variantes-imagenes-{_modelo}')
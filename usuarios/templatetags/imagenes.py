@@ -0,0 +1,54 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from usuarios.imagenes import url_original, variantes_de
+
+register = template.Library()
+
+
+def _srcset(rutas):
+    return ', '.join(
+        f'{default_storage.url(ruta)} {ancho}w'
+        for ancho, ruta in sorted(rutas.items(), key=lambda par: int(par[0]))
+    )
+
+
+@register.simple_tag
+def srcset(objeto, campo, formato='webp'):
+    """srcset de las variantes ('webp' o 'respaldo') de la imagen; vacío si aún no hay."""
+    return _srcset(variantes_de(objeto, campo).get(formato, {}))
+
+
+@register.simple_tag
+def miniatura(objeto, campo, ancho):
+    """URL de la variante de respaldo más chica que cubre `ancho` px, o la original."""
+    respaldo = variantes_de(objeto, campo).get('respaldo')
+    if not respaldo:
+        return url_original(objeto, campo)
+    anchos = sorted(int(a) for a in respaldo)
+    elegido = next((a for a in anchos if a >= int(ancho)), anchos[-1])
+    return default_storage.url(respaldo[str(elegido)])
+
+
+@register.simple_tag
+def imagen(objeto, campo, sizes, ancho=None, **atributos):
+    """
+    <img> con srcset WebP y src de respaldo de la imagen `campo` de `objeto`.
+    `sizes` es el ancho en pantalla (p. ej. '64px' o '(max-width: 640px) 100vw, 320px');
+    `ancho` elige la variante del src (por defecto la más grande). Los demás
+    argumentos se agregan como atributos (alt, class, id...).
+
+        {% imagen producto 'imagen' '160px' alt=producto.nombre %}
+    """
+    variantes = variantes_de(objeto, campo)
+    atributos.setdefault('loading', 'lazy')
+    atributos.setdefault('decoding', 'async')
+    extra = format_html_join('', ' {}="{}"', ((nombre.replace('_', '-'), valor) for nombre, valor in atributos.items()))
+    if not variantes:
+        return format_html('<img src="{}"{}>', url_original(objeto, campo), extra)
+
+    src = miniatura(objeto, campo, ancho or max(int(a) for a in variantes['respaldo']))
+    return format_html(
+        '<img src="{}" srcset="{}" sizes="{}"{}>', src, _srcset(variantes['webp']), sizes, extra,
+    )
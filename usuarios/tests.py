@@ -1,3 +1,1010 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import noticias
+from .context_processors import comerciante_context
+from .middleware import UsuarioSesionMiddleware, reiniciar_usuario_sesion
+from proveedor.geo import REGION_DE_COMUNA
+from proveedor.models import CategoriaProveedor, ProductoServicio, Promocion, Proveedor
+
+from . import almacenamiento, imagenes, ranking, recomendaciones
+from .models import (
+    ArchivoMedia, Beneficio, Comentario, Comerciante, AlmacenNoticias, FuenteNoticias, NoticiaArticulo, Post,
+    RecomendacionProveedor,
+)
+from .noticias import NOTICIAS_CLAVE, PREVIEW_CLAVE, PREVIEW_TTL_SECONDS
+from .relevancia import temas_relevantes
+from .views import decode_feed_cursor, encode_feed_cursor, get_current_user, media_inmutable, paginate_feed
+
+
+class NewsPreviewSinRedTests(TestCase):
+    """El foro debe responder con la red deshabilitada, sin esperar a los feeds RSS."""
+
+    def setUp(self):
+        # Cualquier intento de conexión queda registrado y falla
+        self.conexiones = []
+
+        def sin_red(sock, address):
+            self.conexiones.append(address)
+            raise OSError('Red deshabilitada en los tests')
+
+        patcher = mock.patch.object(socket.socket, 'connect', sin_red)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: self.assertEqual(self.conexiones, []))
+
+        cache.clear()
+        self.comerciante = Comerciante.objects.create(
+            email='ana@example.com',
+            nombre_apellido='Ana Pérez',
+            password_hash='x',
+        )
+        session = self.client.session
+        session['comerciante_id'] = self.comerciante.id
+        session.save()
+
+    def _guardar_preview(self, antiguedad):
+        AlmacenNoticias.objects.create(
+            clave=PREVIEW_CLAVE,
+            noticias=[{
+                'title': 'Nueva ley pyme',
+                'link': 'https://example.com/ley-pyme',
+                'source_title': 'Google News: PYME y Leyes',
+                'image_url': None,
+            }],
+            actualizado=timezone.now() - antiguedad,
+        )
+
+    @mock.patch('usuarios.noticias.refrescar_en_segundo_plano')
+    def test_almacen_vacio_responde_y_agenda_refresco(self, refrescar):
+        response = self.client.get(reverse('plataforma_comerciante'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['news_preview'], [])
+        refrescar.assert_called_once_with(PREVIEW_CLAVE)
+
+    @mock.patch('usuarios.noticias.refrescar_en_segundo_plano')
+    def test_preview_vencido_se_sirve_mientras_se_revalida(self, refrescar):
+        self._guardar_preview(timedelta(seconds=PREVIEW_TTL_SECONDS + 60))
+
+        response = self.client.get(reverse('plataforma_comerciante'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Nueva ley pyme')
+        refrescar.assert_called_once_with(PREVIEW_CLAVE)
+
+    @mock.patch('usuarios.noticias.refrescar_en_segundo_plano')
+    def test_preview_vigente_no_refresca(self, refrescar):
+        self._guardar_preview(timedelta(minutes=1))
+
+        response = self.client.get(reverse('plataforma_comerciante'))
+
+        self.assertContains(response, 'Nueva ley pyme')
+        refrescar.assert_not_called()
+
+
+RSS_FIXTURE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Fixture</title>
+<item><title>Nueva ley para la pyme</title><link>https://example.com/1</link>
+<description>Cambios en la normativa</description></item>
+<item><title>Resultados deportivos</title><link>https://example.com/2</link>
+<description>Sin relacion</description></item>
+</channel></rss>"""
+
+FIXTURE_ETAG = '"v1"'
+FIXTURE_LAST_MODIFIED = 'Mon, 05 Jan 2026 10:00:00 GMT'
+LENTO_SEGUNDOS = 2
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    """Sirve un feed con ETag/Last-Modified; /lento nunca responde a tiempo."""
+
+    def do_GET(self):
+        self.server.peticiones.append((self.path, dict(self.headers)))
+        if self.path == '/lento':
+            time.sleep(LENTO_SEGUNDOS)
+        if self.headers.get('If-None-Match') == FIXTURE_ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml')
+        self.send_header('ETag', FIXTURE_ETAG)
+        self.send_header('Last-Modified', FIXTURE_LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(RSS_FIXTURE)
+
+    def log_message(self, *args):
+        pass
+
+
+class DescargaFeedsTests(TestCase):
+    """Descarga concurrente y condicional de feeds contra un servidor HTTP local."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _FeedHandler)
+        cls.server.daemon_threads = True
+        cls.server.peticiones = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.peticiones.clear()
+        feeds = {
+            f'Fuente {i}': {'url': f'{self.base_url}/feed{i}', 'key': f'f{i}'}
+            for i in range(4)
+        }
+        patcher = mock.patch.dict(noticias.RSS_FEEDS, feeds, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_descarga_guarda_validadores_y_304_evita_parsear(self):
+        primera = noticias.descargar_fuentes(noticias.RSS_FEEDS.keys())
+
+        self.assertEqual(len(primera['Fuente 0']), 2)
+        fuente = FuenteNoticias.objects.get(url=f'{self.base_url}/feed0')
+        self.assertEqual(fuente.etag, FIXTURE_ETAG)
+        self.assertEqual(fuente.last_modified, FIXTURE_LAST_MODIFIED)
+
+        self.server.peticiones.clear()
+        with mock.patch.object(noticias.feedparser, 'parse') as parse:
+            segunda = noticias.descargar_fuentes(noticias.RSS_FEEDS.keys())
+
+        parse.assert_not_called()
+        self.assertEqual(segunda, primera)
+        for _, headers in self.server.peticiones:
+            self.assertEqual(headers.get('If-None-Match'), FIXTURE_ETAG)
+            self.assertEqual(headers.get('If-Modified-Since'), FIXTURE_LAST_MODIFIED)
+
+    def test_fuente_creada_por_otra_descarga_en_paralelo(self):
+        url = f'{self.base_url}/feed0'
+        as_completed = noticias.as_completed
+
+        def completados_con_carrera(futuros):
+            # Otra descarga (p. ej. el preview) crea la fuente mientras esta corre
+            FuenteNoticias.objects.get_or_create(url=url)
+            return as_completed(futuros)
+
+        with mock.patch.object(noticias, 'as_completed', side_effect=completados_con_carrera):
+            resultados = noticias.descargar_fuentes(['Fuente 0'])
+
+        self.assertEqual(len(resultados['Fuente 0']), 2)
+        self.assertEqual(FuenteNoticias.objects.get(url=url).etag, FIXTURE_ETAG)
+
+    def test_fuente_lenta_no_bloquea_al_resto(self):
+        noticias.RSS_FEEDS['Lenta'] = {'url': f'{self.base_url}/lento', 'key': 'lenta'}
+
+        inicio = time.monotonic()
+        with mock.patch.object(noticias, 'FEED_READ_TIMEOUT', 0.5):
+            resultados = noticias.descargar_fuentes(noticias.RSS_FEEDS.keys())
+        duracion = time.monotonic() - inicio
+
+        self.assertLess(duracion, LENTO_SEGUNDOS)
+        self.assertEqual(resultados['Lenta'], [])
+        for i in range(4):
+            self.assertEqual(len(resultados[f'Fuente {i}']), 2)
+
+    def test_fetch_news_filtra_por_palabras_clave(self):
+        resultado = noticias.fetch_news(include_image=True)
+
+        self.assertEqual(len(resultado), 4)
+        self.assertTrue(all(n['titulo'] == 'Nueva ley para la pyme' for n in resultado))
+        self.assertEqual(resultado[0]['temas'], ['Emprendimiento', 'Leyes'])
+
+
+class ArchivoNoticiasTests(TestCase):
+    """El archivo deduplica por link y la página filtra y pagina en la base de datos."""
+
+    def setUp(self):
+        self.comerciante = Comerciante.objects.create(
+            email='ana@example.com',
+            nombre_apellido='Ana Pérez',
+            password_hash='x',
+        )
+        session = self.client.session
+        session['comerciante_id'] = self.comerciante.id
+        session.save()
+
+    def _noticia(self, i, fuente='Fuente A', temas=('Leyes',)):
+        return {
+            'titulo': f'Noticia {i}',
+            'resumen': 'Resumen',
+            'link': f'https://example.com/{i}',
+            'image_url': None,
+            'source_title': fuente,
+            'temas': list(temas),
+            'publicado': (timezone.now() - timedelta(hours=i)).isoformat(),
+        }
+
+    def test_refetch_no_duplica(self):
+        lote = [self._noticia(i) for i in range(3)]
+
+        self.assertEqual(noticias.archivar_noticias(lote), 3)
+        self.assertEqual(noticias.archivar_noticias(lote + [self._noticia(3)]), 1)
+        self.assertEqual(NoticiaArticulo.objects.count(), 4)
+        self.assertEqual(NoticiaArticulo.objects.filter(temas__tema='Leyes').count(), 4)
+
+    @mock.patch('usuarios.noticias.refrescar_en_segundo_plano')
+    def test_filtra_y_pagina(self, refrescar):
+        noticias.archivar_noticias(
+            [self._noticia(i) for i in range(30)]
+            + [self._noticia(i, fuente='Fuente B', temas=('Negocios',)) for i in range(30, 35)]
+        )
+        AlmacenNoticias.objects.create(clave=NOTICIAS_CLAVE, noticias=[])
+
+        response = self.client.get(reverse('noticias'))
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.count, 35)
+        self.assertEqual(len(page.object_list), 24)
+        self.assertEqual(page.object_list[0].titulo, 'Noticia 0')
+
+        response = self.client.get(reverse('noticias'), {'tematica': 'Leyes', 'page': 2})
+        self.assertEqual(len(response.context['page_obj'].object_list), 6)
+        self.assertContains(response, 'tematica=Leyes')
+
+        response = self.client.get(reverse('noticias'), {'fuente': 'Fuente B'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 5)
+        refrescar.assert_not_called()
+
+    @mock.patch('usuarios.noticias.refrescar_en_segundo_plano')
+    def test_revisar_vigencia_solo_lee_la_fecha(self, refrescar):
+        cache.clear()
+        AlmacenNoticias.objects.create(
+            clave=NOTICIAS_CLAVE, noticias=[self._noticia(i) for i in range(3)],
+            actualizado=timezone.now() - timedelta(days=2),
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            noticias.revisar_vigencia(NOTICIAS_CLAVE)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('"noticias"', ctx.captured_queries[0]['sql'])
+        refrescar.assert_called_once_with(NOTICIAS_CLAVE)
+
+
+class UsuarioSesionMiddlewareTests(TestCase):
+    """El comerciante se consulta a lo más una vez por request, y solo si se usa."""
+
+    def setUp(self):
+        self.comerciante = Comerciante.objects.create(
+            email='ana@example.com',
+            nombre_apellido='Ana Pérez',
+            password_hash='x',
+        )
+
+    def _request(self, **sesion):
+        request = RequestFactory().get('/')
+        request.session = SessionStore()
+        request.session.update(sesion)
+        UsuarioSesionMiddleware(lambda r: HttpResponse())(request)
+        return request
+
+    def test_sin_uso_no_consulta(self):
+        with self.assertNumQueries(0):
+            request = self._request(comerciante_id=self.comerciante.id)
+            comerciante_context(request)
+
+    def test_una_consulta_por_request(self):
+        request = self._request(comerciante_id=self.comerciante.id)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_current_user(request), self.comerciante)
+            self.assertEqual(request.comerciante.email, 'ana@example.com')
+            self.assertEqual(comerciante_context(request)['comerciante'].id, self.comerciante.id)
+            self.assertEqual(get_current_user(request), self.comerciante)
+
+    def test_login_en_el_mismo_request(self):
+        request = self._request()
+        self.assertIsNone(get_current_user(request))
+        self.assertFalse(request.comerciante)
+
+        request.session['comerciante_id'] = self.comerciante.id
+        self.assertEqual(get_current_user(request), self.comerciante)
+        # request.comerciante ya resolvió su valor: se reasigna al cambiar la sesión
+        reiniciar_usuario_sesion(request)
+        self.assertEqual(request.comerciante.id, self.comerciante.id)
+
+        del request.session['comerciante_id']
+        reiniciar_usuario_sesion(request)
+        self.assertFalse(request.comerciante)
+
+    def test_comerciante_eliminado_limpia_sesion(self):
+        request = self._request(comerciante_id=self.comerciante.id + 1000)
+
+        self.assertIsNone(get_current_user(request))
+        self.assertFalse(request.comerciante)
+        self.assertNotIn('comerciante_id', request.session)
+
+
+class ComunaCanonicaTests(TestCase):
+    """Comerciante.comuna usa los códigos de proveedor.geo y la región se deriva."""
+
+    def test_region_derivada_de_la_comuna(self):
+        comerciante = Comerciante.objects.create(
+            email='ana@example.com', nombre_apellido='Ana Pérez', password_hash='x', comuna='RM-Nunoa',
+        )
+        self.assertEqual(comerciante.region, 'CL-RM')
+        self.assertEqual(comerciante.get_comuna_display_name(), 'Ñuñoa')
+
+        comerciante.comuna = 'CO-La-Serena'
+        comerciante.save(update_fields=['comuna'])
+        comerciante.refresh_from_db()
+        self.assertEqual(comerciante.region, 'CL-CO')
+
+    def test_migracion_mapea_valores_antiguos(self):
+        from importlib import import_module
+
+        from django.apps import apps
+
+        migracion = import_module('usuarios.migrations.0018_comerciante_geo_canonico')
+        valores = ['SANTIAGO', 'LA_SERENA', 'Estación Central', 'OTRO_COMUNA', '']
+        Comerciante.objects.bulk_create([
+            Comerciante(email=f'c{i}@example.com', nombre_apellido=f'C {i}', password_hash='x', comuna=valor)
+            for i, valor in enumerate(valores)
+        ])
+
+        migracion.canonizar_comunas(apps, None)
+
+        self.assertEqual(
+            list(Comerciante.objects.order_by('email').values_list('comuna', 'region')),
+            [('RM-Santiago', 'CL-RM'), ('CO-La-Serena', 'CL-CO'), ('RM-Estacion-Central', 'CL-RM'), ('', ''), ('', '')],
+        )
+
+    def test_formulario_ofrece_codigos_canonicos(self):
+        from .forms import BusinessDataForm
+
+        comerciante = Comerciante.objects.create(email='ana@example.com', nombre_apellido='Ana', password_hash='x')
+        form = BusinessDataForm(
+            {'relacion_negocio': 'DUEÑO', 'tipo_negocio': 'ALMACEN', 'comuna': 'SANTIAGO', 'nombre_negocio': 'X'},
+            instance=comerciante,
+        )
+        self.assertIn('comuna', form.errors)
+
+        form = BusinessDataForm(
+            {'relacion_negocio': 'DUEÑO', 'tipo_negocio': 'ALMACEN', 'comuna': 'RM-Santiago', 'nombre_negocio': 'X'},
+            instance=comerciante,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().region, 'CL-RM')
+
+
+def _proveedor(nombre, comuna, cobertura='local', categorias=(), **extra):
+    proveedor = Proveedor.objects.create(
+        email=f'{nombre.lower().replace(" ", ".")}@example.com',
+        password_hash='x',
+        nombre_contacto='Contacto',
+        nombre_empresa=nombre,
+        whatsapp='+56911111111',
+        region=comuna and REGION_DE_COMUNA[comuna],
+        comuna=comuna,
+        cobertura=cobertura,
+        **extra
+    )
+    if categorias:
+        proveedor.categorias.add(*categorias)
+    return proveedor
+
+
+class RecomendacionesTests(TestCase):
+    """Top N precalculado por comerciante y actualizado por cambios puntuales."""
+
+    def setUp(self):
+        self.licores = CategoriaProveedor.objects.create(nombre='Vinos y Licores')
+        self.abarrotes = CategoriaProveedor.objects.create(nombre='Abarrotes')
+        self.software = CategoriaProveedor.objects.create(nombre='Software POS')
+
+        self.botillero = _proveedor('Licores Centro', 'RM-Santiago', categorias=[self.licores])
+        self.almacen = _proveedor('Abarrotes Centro', 'RM-Santiago', categorias=[self.abarrotes])
+        self.regional = _proveedor('Licores RM', 'RM-Providencia', 'regional', categorias=[self.licores])
+        self.nacional = _proveedor('Tech Chile', 'VS-Valparaiso', 'nacional', categorias=[self.software])
+        self.lejano = _proveedor('Abarrotes Serena', 'CO-La-Serena', categorias=[self.abarrotes])
+
+        self.comerciante = Comerciante.objects.create(
+            email='ana@example.com',
+            nombre_apellido='Ana Pérez',
+            password_hash='x',
+            comuna='RM-Santiago',
+            tipo_negocio='BOTILLERIA',
+        )
+        # El hilo de recomendaciones corre aquí mismo, al confirmar
+        en_linea = mock.patch.object(recomendaciones, 'en_segundo_plano', side_effect=recomendaciones.procesar)
+        self.en_segundo_plano = en_linea.start()
+        self.addCleanup(en_linea.stop)
+
+    def _recomendados(self, comerciante=None):
+        return list(
+            RecomendacionProveedor.objects.filter(comerciante=comerciante or self.comerciante)
+            .order_by('posicion').values_list('proveedor_id', flat=True)
+        )
+
+    def test_area_y_afinidad(self):
+        self.assertEqual(
+            self._recomendados(),
+            [self.botillero.id, self.almacen.id, self.regional.id, self.nacional.id],
+        )
+
+    def test_cambio_de_perfil_recalcula(self):
+        self.comerciante.comuna = 'CO-La-Serena'
+        self.comerciante.tipo_negocio = 'ALMACEN'
+        self.comerciante.save()
+
+        self.assertEqual(self._recomendados(), [self.lejano.id, self.nacional.id])
+
+    def test_inicio_de_sesion_no_recalcula(self):
+        with mock.patch('usuarios.signals.recalcular_recomendaciones') as recalcular:
+            self.comerciante.ultima_conexion = timezone.now()
+            self.comerciante.save(update_fields=['ultima_conexion'])
+        recalcular.assert_not_called()
+
+    def test_guardar_sin_cambios_no_recalcula(self):
+        with mock.patch('usuarios.signals.recalcular_recomendaciones') as recalcular:
+            self.comerciante.nombre_apellido = 'Ana María Pérez'
+            self.comerciante.save()
+        recalcular.assert_not_called()
+
+        proveedor = Proveedor.objects.get(pk=self.botillero.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            proveedor.descripcion = 'Vinos, cervezas y destilados'
+            proveedor.save()
+            proveedor.categorias.add(self.licores)
+        self.assertEqual(callbacks, [])
+
+    def test_editar_perfil_de_proveedor_no_toca_recomendaciones(self):
+        Comerciante.objects.bulk_create([
+            Comerciante(email=f'c{i}@example.com', nombre_apellido=f'C {i}', password_hash='x',
+                        comuna='RM-Santiago', region='CL-RM', tipo_negocio='BOTILLERIA')
+            for i in range(50)
+        ])
+        proveedor = Proveedor.objects.get(pk=self.botillero.pk)
+        # El UPDATE, el reindexado del texto y el ranking; ninguna depende de
+        # cuántos comerciantes hay
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(11):
+            proveedor.descripcion = 'Vinos, cervezas y destilados'
+            proveedor.save()
+        self.assertEqual(callbacks, [])
+
+    def test_cambios_de_proveedor_se_reflejan(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevo = _proveedor('Botillería Vecina', 'RM-Santiago', categorias=[self.licores])
+        self.assertIn(nuevo.id, self._recomendados())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.botillero.activo = False
+            self.botillero.save(update_fields=['activo'])
+        self.assertNotIn(self.botillero.id, self._recomendados())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lejano.categorias.add(self.licores)
+            self.lejano.cobertura = 'nacional'
+            self.lejano.save()
+        self.assertIn(self.lejano.id, self._recomendados())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.nacional.delete()
+        self.assertEqual(
+            self._recomendados(), [nuevo.id, self.almacen.id, self.regional.id, self.lejano.id],
+        )
+
+    def test_solo_recalcula_comerciantes_afectados(self):
+        otro = Comerciante.objects.create(
+            email='luis@example.com', nombre_apellido='Luis Soto', password_hash='x', comuna='CO-La-Serena',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            serena = _proveedor('Feria Serena', 'CO-La-Serena')
+
+        self.assertEqual(recomendaciones.comerciantes_afectados(serena.id), {otro.id})
+        self.assertIn(serena.id, self._recomendados(otro))
+
+    def test_catalogo_agrupa_perfiles(self):
+        Comerciante.objects.bulk_create([
+            Comerciante(email=f'c{i}@example.com', nombre_apellido=f'C {i}', password_hash='x',
+                        comuna='RM-Santiago', region='CL-RM', tipo_negocio='BOTILLERIA')
+            for i in range(20)
+        ])
+        with mock.patch.object(
+            recomendaciones.CatalogoProveedores, 'mejores', autospec=True,
+            side_effect=recomendaciones.CatalogoProveedores.mejores,
+        ) as mejores:
+            self.assertEqual(recomendaciones.recalcular_recomendaciones(), 21)
+        self.assertEqual(mejores.call_count, 1)
+        self.assertEqual(RecomendacionProveedor.objects.count(), 21 * 4)
+
+    @mock.patch('usuarios.noticias.refrescar_en_segundo_plano')
+    def test_plataforma_lee_sin_puntuar(self, refrescar):
+        session = self.client.session
+        session['comerciante_id'] = self.comerciante.id
+        session.save()
+
+        with mock.patch.object(recomendaciones, 'CatalogoProveedores') as catalogo:
+            response = self.client.get(reverse('plataforma_comerciante'))
+        catalogo.assert_not_called()
+        self.assertEqual(
+            [p.id for p in response.context['proveedores_recomendados']],
+            [self.botillero.id, self.almacen.id, self.regional.id, self.nacional.id],
+        )
+        self.assertContains(response, 'Licores Centro')
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), 'Definir RUN_BENCHMARKS=1 para correr los benchmarks')
+class RecomendacionesBenchmark(SimpleTestCase):
+    """Puntuar 50k comerciantes contra 10k proveedores, sin base de datos."""
+
+    PRESUPUESTO_S = 5
+
+    def test_benchmark(self):
+        import random
+
+        from proveedor.geo import COMUNAS_CHOICES
+
+        azar = random.Random(1)
+        comunas = [codigo for codigo, _ in COMUNAS_CHOICES if codigo]
+        coberturas = ['local', 'comunal', 'regional', 'nacional', 'internacional']
+        rubros = ['Abarrotes', 'Vinos', 'Lácteos', 'Software', 'Envases', 'Aseo', 'Carnes', 'Publicidad']
+        proveedores = [
+            (i, REGION_DE_COMUNA[c], c, azar.choice(coberturas), azar.random() * 100)
+            for i, c in ((i, azar.choice(comunas)) for i in range(1, 10001))
+        ]
+        categorias = [(i, azar.choice(rubros)) for i in range(1, 10001) for _ in range(2)]
+        tipos = ['ALMACEN', 'MINIMARKET', 'BOTILLERIA', 'PANADERIA', 'FERIA', 'KIOSCO', 'FOODTRUCK']
+        intereses = ['TECNOLOGIA', 'MARKETING', 'FINANZAS', 'SEGURIDAD', '']
+        comerciantes = [
+            (azar.choice(comunas), azar.choice(tipos), azar.choice(intereses)) for _ in range(50000)
+        ]
+
+        inicio = time.perf_counter()
+        catalogo = recomendaciones.CatalogoProveedores(proveedores, categorias)
+        por_perfil = {}
+        for comuna, tipo, interes in comerciantes:
+            perfil = recomendaciones.perfil_comerciante(comuna, REGION_DE_COMUNA[comuna], tipo, interes)
+            if perfil not in por_perfil:
+                por_perfil[perfil] = catalogo.mejores(perfil)
+        transcurrido = time.perf_counter() - inicio
+
+        print(f'\n50k comerciantes x 10k proveedores: {transcurrido:.2f} s, {len(por_perfil)} perfiles')
+        self.assertLess(transcurrido, self.PRESUPUESTO_S)
+
+
+class RelevanciaTests(SimpleTestCase):
+
+    def test_normaliza_tildes_y_mayusculas(self):
+        self.assertEqual(temas_relevantes('Cambios al IVA', ''), ['Leyes'])
+        self.assertEqual(temas_relevantes('FISCALIZACIÓN en ferias'), ['Leyes'])
+        self.assertEqual(temas_relevantes('Nuevo crédito para emprendedores'), ['Emprendimiento', 'Negocios'])
+
+    def test_siglas_solo_como_palabra_completa(self):
+        self.assertEqual(temas_relevantes('Es posible que llueva'), [])
+        self.assertEqual(temas_relevantes('Pagos con POS y QR'), ['Negocios'])
+
+    def test_sin_coincidencias(self):
+        self.assertEqual(temas_relevantes('Resultados deportivos', 'Sin relación'), [])
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), 'Definir RUN_BENCHMARKS=1 para correr los benchmarks')
+class RelevanciaBenchmark(SimpleTestCase):
+    """Compara el filtro anterior (loop de substrings) con el motor compilado."""
+
+    PALABRAS_ANTERIORES = [
+        'pyme', 'emprended', 'comerciante', 'negocio', 'asesoría', 'sercotec',
+        'corfo', 'fosis', 'proveedor', 'distribuidor',
+        'costo', 'precio', 'inflación', 'ipc', 'consumo', 'crédito', 'caja',
+        'ley', 'normativa', 'laboral', 'jornada', 'salud', 'seremi',
+        'fiscalización', 'municipal', 'patente', 'tributario', 'iva', 'impuesto',
+        'digital', 'transbank', 'pos', 'qr', 'factura', 'boleta', 'inventario',
+        'seguridad', 'delincuencia', 'robo', 'alerta',
+    ]
+
+    def test_benchmark(self):
+        from django.utils.html import strip_tags
+
+        items = ''.join(
+            f'<item><title>Titular número {i} sobre el mercado</title>'
+            f'<link>https://example.com/{i}</link>'
+            f'<description>&lt;p&gt;Texto de relleno {i} sin palabras de interés, '
+            f'{"con impuesto" if i % 10 == 0 else "nada que ver"}&lt;/p&gt;</description></item>'
+            for i in range(5000)
+        )
+        feed = noticias.feedparser.parse(f'<rss version="2.0"><channel>{items}</channel></rss>')
+        entradas = [noticias.normalizar_entrada(entry) for entry in feed.entries]
+
+        inicio = time.perf_counter()
+        anterior = [
+            e for e in entradas
+            if any(k in strip_tags(e['titulo']).lower() or k in strip_tags(e['resumen']).lower()
+                   for k in self.PALABRAS_ANTERIORES)
+        ]
+        t_anterior = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        nuevo = [e for e in entradas if temas_relevantes(e['titulo'], e['resumen'])]
+        t_nuevo = time.perf_counter() - inicio
+
+        print(f'\n{len(entradas)} entradas: anterior {t_anterior * 1000:.1f} ms '
+              f'({len(anterior)} relevantes), motor {t_nuevo * 1000:.1f} ms ({len(nuevo)} relevantes)')
+
+
+def _imagen(ancho, alto, formato='JPEG', modo='RGB'):
+    contenido = io.BytesIO()
+    Image.effect_noise((ancho, alto), 64).convert(modo).save(contenido, formato)
+    return contenido.getvalue()
+
+
+class VariantesImagenesTests(TestCase):
+    """Miniaturas y WebP generados fuera del request y servidos con srcset."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        ajuste = override_settings(MEDIA_ROOT=media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.proveedor = _proveedor('Distribuidora', 'RM-Santiago')
+
+    def test_generar_variantes(self):
+        nombre = default_storage.save('productos/foto.jpg', SimpleUploadedFile('foto.jpg', _imagen(1200, 800)))
+
+        variantes = imagenes.generar_variantes(nombre, imagenes.ANCHOS_TARJETA)
+
+        self.assertEqual(variantes['original'], nombre)
+        self.assertEqual(list(variantes['webp']), ['160', '320', '640'])
+        self.assertTrue(variantes['respaldo']['160'].startswith('variantes/productos/'))
+        self.assertTrue(variantes['respaldo']['160'].endswith('.jpg'))
+        with default_storage.open(variantes['webp']['160']) as archivo:
+            self.assertEqual(Image.open(archivo).size, (160, 107))
+        self.assertLess(default_storage.size(variantes['webp']['160']) * 10, default_storage.size(nombre))
+
+    def test_no_agranda_y_conserva_transparencia(self):
+        nombre = default_storage.save('perfiles/logo.png', SimpleUploadedFile('logo.png', _imagen(100, 100, 'PNG', 'RGBA')))
+
+        variantes = imagenes.generar_variantes(nombre, imagenes.ANCHOS_AVATAR)
+
+        self.assertEqual(list(variantes['webp']), ['64', '100'])
+        with default_storage.open(variantes['respaldo']['64']) as archivo:
+            self.assertEqual(Image.open(archivo).mode, 'RGBA')
+
+    def test_se_procesa_al_confirmar_y_se_sirve_con_srcset(self):
+        plantilla = Template("{% load imagenes %}{% imagen producto 'imagen' '160px' alt=producto.nombre %}")
+        with mock.patch('usuarios.imagenes.en_segundo_plano') as en_cola:
+            with self.captureOnCommitCallbacks(execute=True):
+                producto = ProductoServicio.objects.create(
+                    proveedor=self.proveedor, nombre='Arroz', descripcion='Saco',
+                    imagen=SimpleUploadedFile('arroz.jpg', _imagen(800, 800)),
+                )
+            en_cola.assert_called_once_with('proveedor.ProductoServicio', producto.pk, 'imagen')
+
+            # Mientras no haya variantes se usa la original
+            html = plantilla.render(Context({'producto': producto}))
+            self.assertIn(f'src="{producto.imagen.url}"', html)
+            self.assertNotIn('srcset', html)
+
+            self.assertTrue(imagenes.procesar('proveedor.ProductoServicio', producto.pk, 'imagen'))
+            producto.refresh_from_db()
+            html = plantilla.render(Context({'producto': producto}))
+            variantes = producto.imagen_variantes
+            self.assertIn(f"{default_storage.url(variantes['webp']['160'])} 160w", html)
+            self.assertIn(f"{default_storage.url(variantes['webp']['640'])} 640w", html)
+            self.assertIn(f"src=\"{default_storage.url(variantes['respaldo']['640'])}\" srcset=", html)
+            self.assertIn('loading="lazy"', html)
+
+            # Guardar sin cambiar la imagen no la vuelve a procesar
+            with self.captureOnCommitCallbacks(execute=True):
+                producto.nombre = 'Arroz grado 1'
+                producto.save()
+            self.assertEqual(en_cola.call_count, 1)
+
+        # Variantes de una imagen anterior: se vuelve a la original
+        producto.imagen.name = 'productos/otra.jpg'
+        self.assertNotIn('srcset', plantilla.render(Context({'producto': producto})))
+
+    def test_comando_procesa_lo_pendiente(self):
+        comerciante = Comerciante.objects.create(email='ana@example.com', password_hash='x')
+        nombre = default_storage.save('posts/foto.jpg', SimpleUploadedFile('foto.jpg', _imagen(2000, 1000)))
+        post = Post.objects.create(
+            comerciante=comerciante, titulo='Hola', contenido='Foto', imagen_url=default_storage.url(nombre),
+        )
+        Post.objects.create(comerciante=comerciante, titulo='Link', contenido='x', imagen_url='https://example.com/a.jpg')
+        Beneficio.objects.create(
+            titulo='Descuento', descripcion='10%', foto=SimpleUploadedFile('b.png', _imagen(300, 200, 'PNG')),
+        )
+
+        salida = io.StringIO()
+        call_command('generar_variantes_imagenes', stdout=salida)
+        self.assertIn('Variantes generadas para 2 imágenes', salida.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(list(post.imagen_url_variantes['webp']), ['320', '640', '1024', '1600'])
+
+        # El avatar por defecto del comerciante no se procesa y no queda nada pendiente
+        self.assertFalse(comerciante.foto_perfil_variantes)
+        self.assertEqual(imagenes.procesar_pendientes(), 0)
+
+
+class AlmacenamientoPorContenidoTests(TestCase):
+    """Un archivo físico por contenido, con referencias por nombre lógico."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        ajuste = override_settings(MEDIA_ROOT=self.media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.contenido = _imagen(50, 50)
+
+    def _archivos_fisicos(self):
+        return [
+            os.path.join(carpeta, archivo)
+            for carpeta, _, archivos in os.walk(os.path.join(self.media, almacenamiento.CARPETA_CONTENIDO))
+            for archivo in archivos
+        ]
+
+    def test_contenido_repetido_se_guarda_una_vez(self):
+        perfil = default_storage.save('perfiles/Captura.png', SimpleUploadedFile('Captura.png', self.contenido))
+        producto = default_storage.save('productos/abarrotes.PNG', SimpleUploadedFile('a.PNG', self.contenido))
+
+        self.assertRegex(perfil, r'^perfiles/[0-9a-f]{64}\.png$')
+        self.assertEqual(os.path.basename(perfil), os.path.basename(producto))
+        self.assertEqual(default_storage.path(perfil), default_storage.path(producto))
+        self.assertEqual(len(self._archivos_fisicos()), 1)
+        self.assertEqual(ArchivoMedia.objects.get().referencias, 2)
+        self.assertIn('/media/contenido/', default_storage.url(perfil))
+        with default_storage.open(producto) as archivo:
+            self.assertEqual(archivo.read(), self.contenido)
+
+        # El archivo se borra con la última referencia, al confirmar
+        with self.captureOnCommitCallbacks(execute=True):
+            default_storage.delete(perfil)
+        self.assertTrue(default_storage.exists(producto))
+        with self.captureOnCommitCallbacks(execute=True):
+            default_storage.delete(producto)
+        self.assertFalse(default_storage.exists(producto))
+        self.assertFalse(ArchivoMedia.objects.exists())
+
+    def test_subida_entre_el_borrado_y_la_confirmacion(self):
+        nombre = default_storage.save('productos/a.png', SimpleUploadedFile('a.png', self.contenido))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            default_storage.delete(nombre)
+        # La fila sigue (con cero referencias) hasta revisar el huérfano
+        self.assertEqual(ArchivoMedia.objects.get().referencias, 0)
+        otro = default_storage.save('perfiles/b.png', SimpleUploadedFile('b.png', self.contenido))
+        for callback in callbacks:
+            callback()
+
+        self.assertTrue(default_storage.exists(otro))
+        self.assertEqual(ArchivoMedia.objects.get().referencias, 1)
+
+    def test_cache_inmutable(self):
+        nombre = default_storage.save('productos/a.jpg', SimpleUploadedFile('a.jpg', self.contenido))
+        ruta = os.path.relpath(default_storage.path(nombre), os.path.join(self.media, almacenamiento.CARPETA_CONTENIDO))
+
+        response = media_inmutable(RequestFactory().get('/'), ruta)
+
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(b''.join(response.streaming_content), self.contenido)
+
+    def test_migrar_nombres_anteriores_y_recontar(self):
+        anterior = FileSystemStorage(location=self.media)
+        for nombre in ('productos/abarrotes.jpg', 'promociones/abarrotes.jpg', 'posts/chacarero.jpg'):
+            anterior.save(nombre, SimpleUploadedFile(nombre, self.contenido))
+        proveedor = _proveedor('Distribuidora', 'RM-Santiago')
+        producto = ProductoServicio.objects.create(
+            proveedor=proveedor, nombre='Arroz', descripcion='Saco', imagen='productos/abarrotes.jpg',
+        )
+        hoy = timezone.localdate()
+        promocion = Promocion.objects.create(
+            proveedor=proveedor, titulo='Oferta', descripcion='x', fecha_inicio=hoy, fecha_fin=hoy,
+            imagen='promociones/abarrotes.jpg',
+        )
+        comerciante = Comerciante.objects.create(email='ana@example.com', password_hash='x')
+        post = Post.objects.create(
+            comerciante=comerciante, titulo='Hola', contenido='x', imagen_url='/media/posts/chacarero.jpg',
+        )
+
+        salida = io.StringIO()
+        call_command('migrar_media_por_contenido', stdout=salida)
+
+        self.assertIn('3 archivos migrados (3 filas actualizadas', salida.getvalue())
+        producto.refresh_from_db()
+        promocion.refresh_from_db()
+        post.refresh_from_db()
+        self.assertRegex(producto.imagen.name, r'^productos/[0-9a-f]{64}\.jpg$')
+        self.assertEqual(producto.imagen.path, promocion.imagen.path)
+        self.assertEqual(post.imagen_url, producto.imagen.url)
+        self.assertEqual(ArchivoMedia.objects.get().referencias, 3)
+        self.assertEqual(len(self._archivos_fisicos()), 1)
+        self.assertFalse(anterior.exists('productos/abarrotes.jpg'))
+
+        # Una foto reemplazada deja de contar; la que nadie usa se borra al recontar
+        producto.imagen = SimpleUploadedFile('nueva.jpg', _imagen(60, 60))
+        producto.save()
+        Post.objects.filter(pk=post.pk).update(imagen_url='')
+        Promocion.objects.filter(pk=promocion.pk).update(imagen='')
+        with mock.patch.object(almacenamiento, 'MARGEN_SUBIDAS_SEGUNDOS', -60):
+            self.assertEqual(almacenamiento.recontar_referencias(), (0, 1))
+        self.assertEqual(list(ArchivoMedia.objects.values_list('referencias', flat=True)), [1])
+        self.assertTrue(os.path.exists(producto.imagen.path))
+
+
+class RankingForoTests(TestCase):
+    """Contadores de publicaciones por comerciante y top por ventana de días."""
+
+    def setUp(self):
+        cache.clear()
+        self.ana = Comerciante.objects.create(email='ana@example.com', nombre_apellido='Ana', password_hash='x')
+        self.luis = Comerciante.objects.create(email='luis@example.com', nombre_apellido='Luis', password_hash='x')
+
+    def _publicar(self, comerciante, dias_atras=0):
+        return Post.objects.create(
+            comerciante=comerciante, titulo='Hola', contenido='x',
+            fecha_publicacion=timezone.now() - timedelta(days=dias_atras),
+        )
+
+    def _top(self, dias=None):
+        return [(c.id, c.post_count) for c in ranking.top_publicadores(dias=dias)]
+
+    def test_senales_de_posts(self):
+        self._publicar(self.ana)
+        post = self._publicar(self.luis)
+        self.assertCountEqual(self._top(), [(self.ana.id, 1), (self.luis.id, 1)])
+
+        # El top en caché se invalida con cada post
+        self._publicar(self.luis)
+        self.assertEqual(self._top(), [(self.luis.id, 2), (self.ana.id, 1)])
+
+        post.delete()
+        self.assertCountEqual(self._top(), [(self.ana.id, 1), (self.luis.id, 1)])
+        self.ana.delete()
+        self.assertEqual(self._top(), [(self.luis.id, 1)])
+
+    def test_ventanas_de_dias(self):
+        self._publicar(self.ana, dias_atras=2)
+        self._publicar(self.luis, dias_atras=10)
+        self._publicar(self.luis, dias_atras=10)
+        self._publicar(self.luis, dias_atras=40)
+
+        self.assertEqual(self._top(7), [(self.ana.id, 1)])
+        self.assertEqual(self._top(30), [(self.luis.id, 2), (self.ana.id, 1)])
+        self.assertEqual(self._top(), [(self.luis.id, 3), (self.ana.id, 1)])
+
+    def test_comando_reconstruye_los_contadores(self):
+        self._publicar(self.ana)
+        # Posts cargados sin señales: los contadores quedan desajustados
+        Post.objects.bulk_create([
+            Post(comerciante=self.luis, titulo='Hola', contenido='x', fecha_publicacion=timezone.now())
+            for _ in range(2)
+        ] + [Post(comerciante=self.luis, titulo='Viejo', contenido='x',
+                  fecha_publicacion=timezone.now() - timedelta(days=20))])
+        self.assertEqual(self._top(), [(self.ana.id, 1)])
+
+        salida = io.StringIO()
+        call_command('reconstruir_ranking_foro', stdout=salida)
+
+        self.assertIn('2 comerciantes', salida.getvalue())
+        self.assertEqual(self._top(), [(self.luis.id, 3), (self.ana.id, 1)])
+        self.assertEqual(self._top(7), [(self.luis.id, 2), (self.ana.id, 1)])
+
+
+class PaginacionFeedTests(TestCase):
+    """Paginación por cursor (fecha_publicacion, id) del feed del foro."""
+
+    def setUp(self):
+        comerciante = Comerciante.objects.create(email='ana@example.com', password_hash='x')
+        ahora = timezone.now()
+        # Tres posts con la misma fecha: el desempate es el id
+        self.posts = [
+            Post.objects.create(comerciante=comerciante, titulo=f'Post {i}', contenido='x',
+                                fecha_publicacion=ahora - timedelta(minutes=0 if i < 3 else i))
+            for i in range(5)
+        ]
+
+    def _paginas(self, page_size):
+        ids, cursor = [], None
+        while True:
+            posts, cursor = paginate_feed(Post.objects.all(), cursor, page_size=page_size)
+            ids.append([post.id for post in posts])
+            if cursor is None:
+                return ids
+
+    def test_desempate_por_id_con_la_misma_fecha(self):
+        p = [post.id for post in self.posts]
+        self.assertEqual(self._paginas(2), [[p[2], p[1]], [p[0], p[3]], [p[4]]])
+
+    def test_ultima_pagina_sin_cursor(self):
+        posts, cursor = paginate_feed(Post.objects.all(), None, page_size=5)
+        self.assertEqual(len(posts), 5)
+        self.assertIsNone(cursor)
+
+    def test_cursor_invalido_vuelve_a_la_primera_pagina(self):
+        primera, _ = paginate_feed(Post.objects.all(), None, page_size=2)
+        valido = encode_feed_cursor(self.posts[4])
+        self.assertEqual(decode_feed_cursor(valido), (self.posts[4].fecha_publicacion, self.posts[4].id))
+        for cursor in ('basura', '2026-13-45T00:00:00_3', valido.replace('_', '_x'), valido + 'z', '_'):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decode_feed_cursor(cursor))
+                self.assertEqual(paginate_feed(Post.objects.all(), cursor, page_size=2)[0], primera)
+
+
+class ContadorComentariosTests(TestCase):
+    """Post.comentarios_count mantenido por las señales de Comentario."""
+
+    def setUp(self):
+        self.ana = Comerciante.objects.create(email='ana@example.com', nombre_apellido='Ana', password_hash='x')
+        self.luis = Comerciante.objects.create(email='luis@example.com', nombre_apellido='Luis', password_hash='x')
+        self.post = Post.objects.create(comerciante=self.ana, titulo='Hola', contenido='x')
+
+    def _comentar(self, comerciante, contenido='Buena idea'):
+        return Comentario.objects.create(post=self.post, comerciante=comerciante, contenido=contenido)
+
+    def _contador(self):
+        return Post.objects.values_list('comentarios_count', flat=True).get(pk=self.post.pk)
+
+    def test_suma_y_resta(self):
+        comentario = self._comentar(self.luis)
+        self._comentar(self.ana)
+        self.assertEqual(self._contador(), 2)
+
+        # Editar un comentario no cuenta de nuevo
+        comentario.contenido = 'Muy buena idea'
+        comentario.save()
+        self.assertEqual(self._contador(), 2)
+
+        comentario.delete()
+        self.assertEqual(self._contador(), 1)
+
+    def test_borrado_en_cascada_del_autor(self):
+        self._comentar(self.luis)
+        self._comentar(self.luis)
+        self._comentar(self.ana)
+
+        self.luis.delete()
+        self.assertEqual(self._contador(), 1)
+
+    def test_guardar_post_leido_antes_no_pisa_el_contador(self):
+        post = Post.objects.get(pk=self.post.pk)
+        self._comentar(self.luis)
+
+        post.titulo = 'Hola a todos'
+        post.save()
+
+        self.assertEqual(self._contador(), 1)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).titulo, 'Hola a todos')
+
+    def test_comando_corrige_desvios(self):
+        self._comentar(self.luis)
+        otro = Post.objects.create(comerciante=self.luis, titulo='Otro', contenido='x')
+        Post.objects.filter(pk=self.post.pk).update(comentarios_count=7)
+        Post.objects.filter(pk=otro.pk).update(comentarios_count=3)
+
+        salida = io.StringIO()
+        call_command('recalcular_comentarios', stdout=salida)
+
+        self.assertIn('Posts corregidos: 2.', salida.getvalue())
+        self.assertEqual(self._contador(), 1)
+        self.assertEqual(Post.objects.get(pk=otro.pk).comentarios_count, 0)
@@ -1,16 +1,15 @@
 from datetime import timedelta
-import re 
-
 from django.contrib import messages
 from django.contrib.auth.hashers import make_password, check_password
+from django.conf import settings
 from django.core.files.storage import default_storage
 from django.db import IntegrityError
-from django.db.models import Count, Q
+from django.db.models import Q
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
-import feedparser 
-from django.utils.html import strip_tags 
-from proveedor.models import REGIONES_CHOICES, COMUNAS_CHOICES, PAISES_CHOICES, CategoriaProveedor, ProductoServicio, Promocion
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+from proveedor.models import REGIONES_CHOICES, COMUNAS_CHOICES, PAISES_CHOICES, ProductoServicio, Promocion
 from django.core.paginator import Paginator
 from .models import (
     Comerciante,
@@ -24,6 +23,19 @@ from .models import (
     CATEGORIAS, 
     CATEGORIA_POST_CHOICES, 
 )
+from proveedor.busqueda import buscar_proveedores
+from .almacenamiento import CARPETA_CONTENIDO
+from .middleware import obtener_comerciante, reiniciar_usuario_sesion
+from .ranking import top_publicadores, VENTANAS_RANKING
+from .recomendaciones import recomendaciones_de
+from .noticias import (
+    RSS_FEEDS,
+    NOTICIAS_CLAVE,
+    buscar_noticias,
+    obtener_preview_noticias,
+    revisar_vigencia,
+)
+from .relevancia import TEMATICAS
 from .forms import (
     RegistroComercianteForm,
     LoginForm,
@@ -64,231 +76,67 @@ ADMIN_CATEGORIES = [
     ('ACTIVIDADES', 'Actividades en curso'),
 ]
 
-# --- CACHÉ Y RSS ---
-LAST_NEWS_UPDATE_KEY = 'last_news_update'
-CACHE_NEWS_KEY = 'cached_news_list'
-UPDATE_INTERVAL_SECONDS = 86400  # 24 horas
-
-RSS_FEEDS = {
-    'Google News: PYME y Leyes': {
-        'url': 'https://news.google.com/rss/search?q=%22pymes%22+OR+%22emprendedores%22+OR+%22leyes+pyme%22+site%3Adf.cl+OR+site%3Aemol.com+OR+site%3Alatercera.com&hl=es&gl=CL&ceid=CL:es',
-        'key': 'google_pyme',
-    },
-    'Diario Financiero - Empresas (Filtrado)': {
-        'url': 'https://www.diariofinanciero.cl/feed/empresas',
-        'key': 'df_empresas',
-    },
-    'Emol - Economía (Filtrado)': {
-        'url': 'http://rss.emol.com/economia.asp', 
-        'key': 'emol_econ',
-    },
-    'La Tercera - Pulso (Negocios) (Filtrado)': {
-        'url': 'https://www.latercera.com/canal/pulso/feed/',
-        'key': 'pulso',
-    },
-    'El Dínamo - Actualidad': { 
-        'url': 'https://www.eldinamo.com/feed/', 
-        'key': 'dinamo',
-    },
-    'CIPER Chile - Investigación': {
-        'url': 'https://ciperchile.cl/feed/',
-        'key': 'ciper',
-    },
-}
+# --- FEED DEL FORO ---
+FEED_PAGE_SIZE = 20
+FEED_CURSOR_PARAM = 'cursor'
+NOTICIAS_PAGE_SIZE = 24
 
 # =========================================================================
 # II. FUNCIONES AUXILIARES (HELPERS)
 # =========================================================================
 
 def get_current_user(request):
-    comerciante_id = request.session.get('comerciante_id')
-    if comerciante_id:
-        try:
-            return Comerciante.objects.get(id=comerciante_id) 
-        except (Comerciante.DoesNotExist, Exception) as e:
-            if 'comerciante_id' in request.session:
-                del request.session['comerciante_id']
-            return None
-    return None
-
-
-def is_online(last_login):
-    if not last_login:
-        return False
-    return (timezone.now() - last_login) < timedelta(minutes=5)
-
-def extract_image_url(entry):
-    """Intenta extraer la URL de la imagen de una entrada de feedparser."""
-    
-    for attr in ['media_thumbnail', 'media_content', 'enclosures']:
-        if hasattr(entry, attr) and getattr(entry, attr):
-            data = getattr(entry, attr)
-            if isinstance(data, list):
-                 for media in data:
-                    if media.get('url') and 'image' in media.get('type', ''):
-                        return media['url']
-            elif isinstance(data, dict) and data.get('url'):
-                 if 'image' in data.get('type', ''):
-                     return data['url']
-    
-    if hasattr(entry, 'media_thumbnail') and isinstance(entry.media_thumbnail, list) and entry.media_thumbnail:
-        if entry.media_thumbnail[0].get('url'):
-            return entry.media_thumbnail[0]['url']
-        
-    description_html = getattr(entry, 'summary', getattr(entry, 'description', ''))
-    
-    if isinstance(description_html, str):
-        match = re.search(r'<img[^>]+src="([^">]+)"', description_html)
-        if match:
-            if not match.group(1).lower().endswith(('.gif', '.ico')) and 'thumb' not in match.group(1).lower():
-                return match.group(1)
-
-    return None
-
-def fetch_news(max_entries_per_source=15, include_image=False):
-    """Obtiene y filtra noticias de todos los feeds configurados."""
-    all_news = []
-
-    KEYWORDS = [
-        'pyme', 'emprended', 'comerciante', 'negocio', 'asesoría', 'sercotec', 
-        'corfo', 'fosis', 'proveedor', 'distribuidor',
-        'costo', 'precio', 'inflación', 'ipc', 'consumo', 'crédito', 'caja',
-        'ley', 'normativa', 'laboral', 'jornada', 'salud', 'seremi', 
-        'fiscalización', 'municipal', 'patente', 'tributario', 'iva', 'impuesto',
-        'digital', 'transbank', 'pos', 'qr', 'factura', 'boleta', 'inventario',
-        'seguridad', 'delincuencia', 'robo', 'alerta',
-    ]
-
-    for source_title, source in RSS_FEEDS.items():
-        try:
-            feed = feedparser.parse(source['url']) 
-            
-            for entry in getattr(feed, 'entries', [])[:max_entries_per_source]: 
-                
-                description = getattr(entry, 'summary', getattr(entry, 'content', [{'value': ''}])[0]['value'])
-                
-                title_lower = strip_tags(entry.title).lower()
-                desc_lower = strip_tags(description).lower()
-                
-                is_relevant = False
-                
-                if source_title.startswith('Google News'):
-                    is_relevant = True
-                else:
-                    for keyword in KEYWORDS:
-                        if keyword in title_lower or keyword in desc_lower:
-                            is_relevant = True
-                            break
-                
-                if not is_relevant:
-                    continue 
-
-                news_item = {
-                    'titulo': strip_tags(entry.title),
-                    'resumen': strip_tags(description),
-                    'link': entry.link,
-                    'source_title': source_title,
-                }
-                
-                if include_image:
-                    news_item['image_url'] = extract_image_url(entry)
-                
-                all_news.append(news_item)
-                
-        except Exception as e:
-            print(f"Error al obtener feed de {source_title}: {e}")
-            continue 
-            
-    return all_news
-
-
-def fetch_news_if_needed(request):
-    """Controla la actualización de noticias a una vez cada 24 horas usando la sesión."""
-    
-    last_update = request.session.get(LAST_NEWS_UPDATE_KEY)
-    current_time = timezone.now()
+    """Comerciante logueado (resuelto una sola vez por request) o None."""
+    return obtener_comerciante(request)
 
-    # Intenta convertir el timestamp de la sesión a un objeto datetime
-    if last_update:
-        try:
-            last_update_dt = timezone.datetime.fromtimestamp(last_update, tz=timezone.get_current_timezone())
-        except (TypeError, ValueError):
-            # Si el valor de la sesión es inválido, forzar actualización
-            last_update_dt = None
-    else:
-        last_update_dt = None
-
-    # Verificar si es la primera vez o si han pasado 24 horas
-    if not last_update_dt or (current_time - last_update_dt).total_seconds() > UPDATE_INTERVAL_SECONDS:
-        
-        print("--- FORZANDO ACTUALIZACIÓN COMPLETA DE FEEDS (24H CUMPLIDAS) ---")
-        all_news = fetch_news(max_entries_per_source=15, include_image=True)
-        
-        request.session[CACHE_NEWS_KEY] = all_news
-        request.session[LAST_NEWS_UPDATE_KEY] = current_time.timestamp()
-        request.session.modified = True 
-        
-        return all_news
-        
-    else:
-        # Usar la versión en caché (rápida)
-        elapsed_seconds = (current_time - last_update_dt).total_seconds()
-        remaining_seconds = UPDATE_INTERVAL_SECONDS - elapsed_seconds
-        
-        remaining_minutes = int(remaining_seconds / 60)
-        remaining_hours = int(remaining_minutes / 60)
-        
-        print(f"--- USANDO CACHÉ. Próxima actualización en: {remaining_hours}h {remaining_minutes % 60}m ---")
-        return request.session.get(CACHE_NEWS_KEY, [])
 
+def encode_feed_cursor(post):
+    """Genera el cursor (fecha_publicacion, id) del último post de una página."""
+    return f"{post.fecha_publicacion.isoformat()}_{post.id}"
 
-def fetch_news_preview():
-    """Función para obtener el preview de noticias para la barra lateral (sin caché de 24h)."""
-    sources_to_preview = [
-        'Google News: PYME y Leyes', 
-        'Diario Financiero - Empresas (Filtrado)', 
-        'La Tercera - Pulso (Negocios) (Filtrado)',
-    ] 
-    
-    preview_news = []
-    
-    # Lógica de filtrado de keywords (redundante, pero necesaria para este helper)
-    KEYWORDS = [
-        'pyme', 'emprended', 'comerciante', 'negocio', 'ley', 'normativa', 
-        'IVA', 'fiscalización', 'patente', 'corfo', 'sercotec', 'fosis', 
-        'digital', 'seguridad', 'costo', 'precio'
-    ]
-    
-    for source_title in sources_to_preview:
-        if source_title in RSS_FEEDS:
-            source = RSS_FEEDS[source_title]
-            try:
-                feed = feedparser.parse(source['url']) 
-                
-                for entry in getattr(feed, 'entries', [])[:2]: 
-                    
-                    description = getattr(entry, 'summary', getattr(entry, 'content', [{'value': ''}])[0]['value'])
-                    title_lower = strip_tags(entry.title).lower()
-                    desc_lower = strip_tags(description).lower()
 
-                    is_relevant = source_title.startswith('Google News') or any(
-                        keyword in title_lower or keyword in desc_lower for keyword in KEYWORDS
-                    )
-                    
-                    if not is_relevant:
-                        continue
+def decode_feed_cursor(raw_cursor):
+    """Devuelve (fecha, id) a partir del cursor, o None si es inválido."""
+    if not raw_cursor:
+        return None
+    fecha_str, _, post_id = raw_cursor.rpartition('_')
+    try:
+        fecha = timezone.datetime.fromisoformat(fecha_str)
+        post_id = int(post_id)
+    except (TypeError, ValueError):
+        return None
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha, post_id
+
+
+def paginate_feed(posts_query, raw_cursor, page_size=FEED_PAGE_SIZE):
+    """
+    Paginación por cursor (keyset) sobre (fecha_publicacion, id).
+    Retorna la página de posts y el cursor de la siguiente (o None).
+    """
+    posts_query = posts_query.order_by('-fecha_publicacion', '-id')
+
+    cursor = decode_feed_cursor(raw_cursor)
+    if cursor:
+        fecha, post_id = cursor
+        posts_query = posts_query.filter(
+            Q(fecha_publicacion__lt=fecha) |
+            Q(fecha_publicacion=fecha, id__lt=post_id)
+        )
 
-                    preview_news.append({
-                        'title': strip_tags(entry.title),
-                        'link': entry.link,
-                        'source_title': source_title,
-                        'image_url': extract_image_url(entry), 
-                    })
-            except Exception:
-                continue
+    posts = list(posts_query[:page_size + 1])
+    next_cursor = None
+    if len(posts) > page_size:
+        posts = posts[:page_size]
+        next_cursor = encode_feed_cursor(posts[-1])
+    return posts, next_cursor
 
-    return preview_news
 
+def is_online(last_login):
+    if not last_login:
+        return False
+    return (timezone.now() - last_login) < timedelta(minutes=5)
 
 # =========================================================================
 # III. VISTAS DE AUTENTICACIÓN Y PERFIL
@@ -335,6 +183,7 @@ def registro_view(request):
                     request.session['comerciante_email'] = comerciante.email
                     request.session['comerciante_rol'] = comerciante.rol
                     request.session['comerciante_nombre'] = comerciante.nombre_apellido
+                    reiniciar_usuario_sesion(request)
                     
                     messages.success(request, f'¡Bienvenido {comerciante.nombre_apellido}!')
                     
@@ -419,6 +268,7 @@ def logout_view(request):
     
     if 'comerciante_id' in request.session:
         del request.session['comerciante_id'] 
+        reiniciar_usuario_sesion(request)
     
     return redirect('registro')
 
@@ -517,12 +367,7 @@ def plataforma_comerciante_view(request):
         messages.warning(request, 'Por favor, inicia sesión para acceder a la plataforma.')
         return redirect('registro')
         
-    posts_query = (
-        Post.objects
-        .select_related('comerciante')
-        .annotate(comentarios_count=Count('comentarios', distinct=True))
-        .prefetch_related('comentarios','comentarios__comerciante')
-    )
+    posts_query = Post.objects.select_related('comerciante')
 
     tipo_filtro = request.GET.get('tipo_filtro', 'COMUNIDAD')
     
@@ -538,12 +383,21 @@ def plataforma_comerciante_view(request):
     valid_categories_keys = [key for key, value in category_options]
     
     if categoria_filtros and 'TODAS' not in categoria_filtros and 'TODOS' not in categoria_filtros:
-        posts = posts_query.filter(categoria__in=categoria_filtros).order_by('-fecha_publicacion')
+        posts_query = posts_query.filter(categoria__in=categoria_filtros)
     else:
-        posts = posts_query.filter(categoria__in=valid_categories_keys).order_by('-fecha_publicacion')
+        posts_query = posts_query.filter(categoria__in=valid_categories_keys)
         if categoria_filtros and ('TODAS' in categoria_filtros or 'TODOS' in categoria_filtros):
             categoria_filtros = ['TODAS'] 
 
+    # Paginación por cursor: el costo por página no crece con el tamaño del foro
+    posts, next_cursor = paginate_feed(posts_query, request.GET.get(FEED_CURSOR_PARAM))
+
+    next_page_query = None
+    if next_cursor:
+        query_params = request.GET.copy()
+        query_params[FEED_CURSOR_PARAM] = next_cursor
+        next_page_query = query_params.urlencode()
+
     user_can_post = True
     if comerciante and comerciante.rol != 'ADMIN' and tipo_filtro == 'ADMIN':
         user_can_post = False
@@ -551,15 +405,24 @@ def plataforma_comerciante_view(request):
     # ✅ CAMBIO: Usar REGIONES_CHOICES en lugar de Region.objects
     regiones = REGIONES_CHOICES  # Lista de tuplas (código, nombre)
 
-    top_posters = Comerciante.objects.annotate(post_count=Count('posts')).exclude(rol='ADMIN').order_by('-post_count')[:5]
+    # Ranking precalculado (histórico, 7 o 30 días)
+    ranking_dias = request.GET.get('ranking', '')
+    ranking_dias = int(ranking_dias) if ranking_dias.isdigit() else None
+    if ranking_dias not in VENTANAS_RANKING:
+        ranking_dias = None
+    top_posters = top_publicadores(5, dias=ranking_dias)
 
-    news_preview = fetch_news_preview() 
+    news_preview = obtener_preview_noticias()
+
+    # Top N precalculado (usuarios.recomendaciones): una lectura, sin puntuar aquí
+    proveedores_recomendados = recomendaciones_de(comerciante, 5)
     
     context = {
         'comerciante': comerciante,
         'rol_usuario': ROLES.get(comerciante.rol, 'Usuario'),
         'post_form': PostForm(),
         'posts': posts,
+        'next_page_query': next_page_query,
         'CATEGORIA_POST_CHOICES': CATEGORIA_POST_CHOICES,
         'COMMUNITY_CATEGORIES': COMMUNITY_CATEGORIES,
         'ADMIN_CATEGORIES': ADMIN_CATEGORIES,
@@ -570,7 +433,9 @@ def plataforma_comerciante_view(request):
         'regiones': regiones, 
         'user_can_post': user_can_post, 
         'top_posters': top_posters,  
+        'ranking_dias': ranking_dias,
         'news_preview': news_preview,
+        'proveedores_recomendados': proveedores_recomendados,
     }
 
     return render(request, 'usuarios/plataforma_comerciante.html', context)
@@ -633,12 +498,7 @@ def post_detail_view(request, post_id):
         messages.warning(request, 'Debes iniciar sesión para ver los detalles.')
         return redirect('login')
 
-    post = get_object_or_404(
-        Post.objects
-        .select_related('comerciante')
-        .annotate(comentarios_count=Count('comentarios', distinct=True)),
-        pk=post_id
-    )
+    post = get_object_or_404(Post.objects.select_related('comerciante'), pk=post_id)
 
     comentarios = post.comentarios.select_related('comerciante').all().order_by('fecha_creacion')
 
@@ -705,21 +565,34 @@ def noticias_view(request):
     source_seleccionada = request.GET.get('fuente', 'TODOS')
     theme_seleccionada = request.GET.get('tematica', 'TODOS')
 
-    # Obtener todas las noticias, usando la caché si no ha pasado el tiempo
-    all_news = fetch_news_if_needed(request) 
+    # El archivo se alimenta fuera del request; aquí solo se agenda un refresco si venció
+    revisar_vigencia(NOTICIAS_CLAVE)
 
-    noticias_filtradas = all_news
-    
-    if source_seleccionada != 'TODOS':
-        noticias_filtradas = [n for n in noticias_filtradas if n['source_title'] == source_seleccionada]
+    # Limpiar la copia por sesión que guardaban versiones anteriores
+    for legacy_key in ('cached_news_list', 'last_news_update'):
+        request.session.pop(legacy_key, None)
+
+    # Filtros y paginación en la base de datos
+    noticias_filtradas = buscar_noticias(
+        fuente=source_seleccionada if source_seleccionada != 'TODOS' else None,
+        tema=theme_seleccionada if theme_seleccionada != 'TODOS' else None,
+    )
+    paginator = Paginator(noticias_filtradas, NOTICIAS_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    # Filtros actuales para los links de paginación
+    filtros_query = request.GET.copy()
+    filtros_query.pop('page', None)
 
     fuentes_disponibles = sorted(list(RSS_FEEDS.keys()))
-    tematicas_disponibles = ['Negocios', 'Leyes', 'Emprendimiento', 'Comercio'] 
+    tematicas_disponibles = TEMATICAS
 
     context = {
         'comerciante': comerciante,
         'rol_usuario': ROLES.get(comerciante.rol, 'Usuario'),
-        'noticias': noticias_filtradas, 
+        'noticias': page_obj,
+        'page_obj': page_obj,
+        'filtros_query': filtros_query.urlencode(),
         'fuentes': fuentes_disponibles, 
         'source_seleccionada': source_seleccionada,
         'tematicas': tematicas_disponibles, 
@@ -807,59 +680,25 @@ def directorio_view(request):
         messages.warning(request, 'Por favor, inicia sesión para acceder al directorio.')
         return redirect('registro')
     
-    # Obtener filtros
-    busqueda = request.GET.get('q', '')
-    categoria_id = request.GET.get('categoria', '')
-    region = request.GET.get('region', '')
     orden = request.GET.get('orden', '')
     
-    # Base queryset - solo proveedores activos
-    proveedores = Proveedor.objects.filter(activo=True).prefetch_related('categorias')
-    
-    # Aplicar filtros
-    if busqueda:
-        proveedores = proveedores.filter(
-            Q(nombre_empresa__icontains=busqueda) |
-            Q(descripcion__icontains=busqueda)
-        )
-    
-    if categoria_id:
-        proveedores = proveedores.filter(categorias__id=categoria_id)
-    
-    if region:
-        proveedores = proveedores.filter(region=region)
-    
-    # Ordenamiento
-    if orden == 'nombre':
-        proveedores = proveedores.order_by('nombre_empresa')
-    elif orden == '-nombre':
-        proveedores = proveedores.order_by('-nombre_empresa')
-    elif orden == '-fecha':
-        proveedores = proveedores.order_by('-fecha_registro')
-    else:
-        # Por defecto: destacados primero, luego por fecha
-        proveedores = proveedores.order_by('-destacado', '-fecha_registro')
-    
-    # Paginación
-    paginator = Paginator(proveedores, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Datos para filtros
-    categorias = CategoriaProveedor.objects.filter(activo=True)
+    # Resultados y conteos por faceta (servicio compartido con proveedor.views)
+    resultado = buscar_proveedores(request.GET, orden=orden, pagina=request.GET.get('page'))
+    filtros = resultado['filtros']
     
-    # ✅ Usar REGIONES_CHOICES directamente (lista de tuplas)
-    regiones = REGIONES_CHOICES
+    # Filtros actuales para los links de paginación
+    filtros_query = request.GET.copy()
+    filtros_query.pop('page', None)
     
     context = {
-        'page_obj': page_obj,
-        'categorias': categorias,
+        'page_obj': resultado['page_obj'],
+        'facetas': resultado['facetas'],
+        'filtros_query': filtros_query.urlencode(),
         'comerciante': comerciante,
         'rol_usuario': ROLES.get(comerciante.rol, 'Comerciante'),
-        'regiones': regiones,
-        'busqueda': busqueda,
-        'categoria_seleccionada': categoria_id,
-        'region_seleccionada': region,
+        'busqueda': filtros.get('q', ''),
+        'categoria_seleccionada': filtros.get('categoria', ''),
+        'region_seleccionada': filtros.get('region', ''),
         'orden': orden,
     }
     
@@ -868,10 +707,8 @@ def directorio_view(request):
 def proveedor_perfil_view(request, pk):
     proveedor = get_object_or_404(Proveedor, pk=pk)
     
-    # Incrementar visitas
-    if hasattr(proveedor, 'visitas'):
-        proveedor.visitas = (proveedor.visitas or 0) + 1
-        proveedor.save(update_fields=['visitas'])
+    # Incrementar visitas (buffer en memoria, se vuelca en lote)
+    proveedor.incrementar_visitas()
     
     # Obtener productos activos
     productos = ProductoServicio.objects.filter(
@@ -931,3 +768,20 @@ def contactos_clubalmacen(request):
     return render(request, 'usuarios/contacto.html')
 
 
+# =========================================================================
+# MEDIA POR CONTENIDO (SOLO DESARROLLO)
+# =========================================================================
+
+CACHE_INMUTABLE_SEGUNDOS = 365 * 24 * 3600
+
+
+def media_inmutable(request, path):
+    """
+    Sirve los archivos del almacenamiento por contenido: su URL cambia si
+    cambia el contenido, así que el navegador los puede guardar sin revalidar.
+    En producción el servidor web debe enviar la misma cabecera.
+    """
+    response = serve(request, f'{CARPETA_CONTENIDO}/{path}', document_root=settings.MEDIA_ROOT)
+    patch_cache_control(response, public=True, max_age=CACHE_INMUTABLE_SEGUNDOS, immutable=True)
+    return response
+